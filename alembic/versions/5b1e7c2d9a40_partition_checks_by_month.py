@@ -0,0 +1,141 @@
+"""Partition checks by month on checked_at
+
+Revision ID: 5b1e7c2d9a40
+Revises: 914926815b9c
+Create Date: 2026-10-17 09:00:00
+
+Turns checks into a table range-partitioned by checked_at, one partition
+per month, without copying existing rows or blocking check writes for
+longer than a catalog change:
+
+1. A CHECK (checked_at < cutover) constraint is added NOT VALID and then
+   validated, and the indexes a partition needs are built CONCURRENTLY;
+   all of this runs while the worker keeps inserting. The primary key is
+   then switched to the (id, checked_at) index, a catalog-only change
+2. In one short transaction (lock_timeout bounded) the table is renamed to
+   checks_legacy, a partitioned checks is created in its place, and
+   checks_legacy is attached as the partition FROM (MINVALUE) TO (cutover).
+   The validated constraint lets ATTACH skip scanning the old rows
+3. Monthly partitions are created from the cutover month onwards; the worker
+   keeps PARTITION_MONTHS_AHEAD months ahead (app/services/check_partitions.py)
+
+cutover is the first day of next month, so rows written during the
+migration still satisfy the legacy constraint. checks_legacy is dropped
+like any other partition once all of its checks are past retention.
+
+The primary key becomes (id, checked_at): PostgreSQL requires the partition
+key in unique constraints. ids still come from checks_id_seq and stay unique.
+
+PostgreSQL 12+ only; other databases are left unchanged.
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5b1e7c2d9a40'
+down_revision = '914926815b9c'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _month_after(month: datetime, months: int = 1) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _is_partitioned(bind) -> bool:
+    return bind.execute(sa.text("""
+        SELECT 1
+        FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = 'checks' AND c.relnamespace = current_schema()::regnamespace
+    """)).first() is not None
+
+
+def _has_constraint(bind, table: str, name: str) -> bool:
+    return bind.execute(sa.text("""
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = to_regclass(:table) AND conname = :name
+    """), {"table": table, "name": name}).first() is not None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or _is_partitioned(bind):
+        return
+
+    cutover = _month_after(datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0))
+
+    # === ONLINE PREPARATION (no long locks) ===
+    with op.get_context().autocommit_block():
+        # Every step is skipped if done already, so a failed upgrade can be re-run
+        op.execute("UPDATE checks SET checked_at = now() AT TIME ZONE 'utc' WHERE checked_at IS NULL")
+        if not _has_constraint(bind, "checks", "checks_legacy_range"):
+            op.execute(f"""
+                ALTER TABLE checks ADD CONSTRAINT checks_legacy_range
+                CHECK (checked_at IS NOT NULL AND checked_at < '{cutover.isoformat(' ')}') NOT VALID
+            """)
+        op.execute("ALTER TABLE checks VALIDATE CONSTRAINT checks_legacy_range")
+        # Databases created from the models already have this index; its name goes to the parent
+        op.execute("ALTER INDEX IF EXISTS ix_checks_monitor_id_checked_at RENAME TO ix_checks_legacy_monitor_id_checked_at")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_checks_legacy_monitor_id_checked_at ON checks (monitor_id, checked_at)")
+        # Uses the validated constraint instead of scanning the table
+        op.execute("ALTER TABLE checks ALTER COLUMN checked_at SET NOT NULL")
+        # ATTACH only reuses a partition index for the parent's primary key if
+        # it backs a constraint; otherwise it fails with "multiple primary keys"
+        if not _has_constraint(bind, "checks", "checks_legacy_pkey"):
+            op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_checks_legacy_id_checked_at ON checks (id, checked_at)")
+            op.execute("""
+                ALTER TABLE checks
+                    DROP CONSTRAINT checks_pkey,
+                    ADD CONSTRAINT checks_legacy_pkey PRIMARY KEY USING INDEX ix_checks_legacy_id_checked_at
+            """)
+
+    # === SWAP (one short transaction) ===
+    op.execute("SET LOCAL lock_timeout = '10s'")
+    op.execute("ALTER TABLE checks RENAME TO checks_legacy")
+    op.execute("ALTER INDEX IF EXISTS ix_checks_checked_at RENAME TO ix_checks_legacy_checked_at")
+    op.execute("ALTER INDEX IF EXISTS ix_checks_id RENAME TO ix_checks_legacy_id")
+
+    op.execute("CREATE TABLE checks (LIKE checks_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (checked_at)")
+    op.execute("ALTER TABLE checks ADD CONSTRAINT checks_partitioned_pkey PRIMARY KEY (id, checked_at)")
+    op.execute("ALTER TABLE checks ADD CONSTRAINT checks_partitioned_monitor_id_fkey "
+               "FOREIGN KEY (monitor_id) REFERENCES monitors(id)")
+    op.create_index('ix_checks_checked_at', 'checks', ['checked_at'], unique=False)
+    op.create_index('ix_checks_monitor_id_checked_at', 'checks', ['monitor_id', 'checked_at'], unique=False)
+    # The sequence must outlive checks_legacy, which is eventually dropped
+    op.execute("ALTER SEQUENCE checks_id_seq OWNED BY checks.id")
+
+    op.execute(f"ALTER TABLE checks ATTACH PARTITION checks_legacy "
+               f"FOR VALUES FROM (MINVALUE) TO ('{cutover.isoformat(' ')}')")
+    op.execute("ALTER TABLE checks_legacy DROP CONSTRAINT checks_legacy_range")
+
+    # === MONTHLY PARTITIONS ===
+    month = cutover
+    for _ in range(MONTHS_AHEAD):
+        following = _month_after(month)
+        op.execute(f"CREATE TABLE checks_{month:%Y_%m} PARTITION OF checks "
+                   f"FOR VALUES FROM ('{month.isoformat(' ')}') TO ('{following.isoformat(' ')}')")
+        month = following
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not _is_partitioned(bind):
+        return
+
+    # Offline: copies every remaining check back into a plain table
+    op.execute("CREATE TABLE checks_unpartitioned (LIKE checks INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO checks_unpartitioned SELECT * FROM checks")
+    op.execute("ALTER SEQUENCE checks_id_seq OWNED BY checks_unpartitioned.id")
+    op.execute("DROP TABLE checks CASCADE")
+    op.execute("ALTER TABLE checks_unpartitioned RENAME TO checks")
+    op.execute("ALTER TABLE checks ADD PRIMARY KEY (id)")
+    op.execute("ALTER TABLE checks ADD FOREIGN KEY (monitor_id) REFERENCES monitors(id)")
+    op.execute("ALTER TABLE checks ALTER COLUMN checked_at DROP NOT NULL")
+    op.create_index('ix_checks_id', 'checks', ['id'], unique=False)
+    op.create_index('ix_checks_checked_at', 'checks', ['checked_at'], unique=False)
+    op.create_index('ix_checks_monitor_id_checked_at', 'checks', ['monitor_id', 'checked_at'], unique=False)
@@ -18,7 +18,8 @@ from app.core.deps import get_current_user
 from app.models.user import User
 from app.models.monitor import Monitor
 from app.models.incident import Incident
-from app.models.check import Check
+from app.models.check_rollup import CheckRollup
+from app.services.check_compaction import raw_check_retention_days
 from app.services.intelligent_incident_service import (
     calculate_health_score,
     detect_patterns,
@@ -44,6 +45,11 @@ def get_monitor_health(
     if not monitor:
         raise HTTPException(status_code=404, detail="Monitor not found")
 
+    # The score counts raw checks; past retention only failures and transitions are left
+    retention = raw_check_retention_days(current_user.plan)
+    if retention > 0:
+        days = min(days, retention)
+
     health_data = calculate_health_score(db, monitor, days)
 
     return {
@@ -317,16 +323,17 @@ def get_value_stats(
         Incident.monitor_id.in_(monitor_ids)
     ).scalar() or 0
 
-    # Total checks performed
-    total_checks = db.query(func.count(Check.id)).filter(
-        Check.monitor_id.in_(monitor_ids)
-    ).scalar() or 0
-
-    # Average response time
-    avg_response = db.query(func.avg(Check.response_time)).filter(
-        Check.monitor_id.in_(monitor_ids),
-        Check.response_time.isnot(None)
-    ).scalar() or 0
+    # Total checks performed and average response time (daily rollups)
+    total_checks, rt_sum, rt_count = db.query(
+        func.sum(CheckRollup.total),
+        func.sum(CheckRollup.rt_sum),
+        func.sum(CheckRollup.rt_count)
+    ).filter(
+        CheckRollup.monitor_id.in_(monitor_ids),
+        CheckRollup.granularity == "day"
+    ).one()
+    total_checks = int(total_checks or 0)
+    avg_response = rt_sum / rt_count if rt_count else 0
 
     # Total minutes and money lost
     incidents = db.query(Incident).filter(
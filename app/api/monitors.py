@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List
@@ -11,6 +11,7 @@ from app.models.check import Check
 from app.models.incident import Incident
 from app.schemas.monitor import MonitorCreate, MonitorUpdate, MonitorResponse
 from app.schemas.check import CheckResponse
+from app.services.check_rollups import WINDOWS, rollup_totals, window_percentiles
 from app.services.subscription_service import get_user_limits
 from app.services.tracking_service import track_event
 
@@ -57,6 +58,11 @@ def get_monitors_enriched(db: Session = Depends(get_db), current_user: User = De
 
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
 
+    # Last 24h uptime and response time percentiles, one query each for all monitors
+    monitor_ids = [monitor.id for monitor in monitors]
+    last_24h = rollup_totals(db, monitor_ids, datetime.utcnow() - timedelta(days=1))
+    latency = window_percentiles(db, monitor_ids, "day")
+
     enriched_monitors = []
     for monitor in monitors:
         # Calculate money lost today
@@ -85,6 +91,11 @@ def get_monitors_enriched(db: Session = Depends(get_db), current_user: User = De
             "is_degrading": monitor.is_degrading,
             "tags": monitor.tags,
             "estimated_revenue_per_hour": monitor.estimated_revenue_per_hour,
+            "uptime_24h": round(last_24h[monitor.id]["up"] / last_24h[monitor.id]["total"] * 100, 2)
+            if last_24h[monitor.id]["total"] else None,
+            "response_time_p50_24h": latency[monitor.id]["p50"],
+            "response_time_p95_24h": latency[monitor.id]["p95"],
+            "response_time_p99_24h": latency[monitor.id]["p99"],
             # Today's stats
             "money_lost_today": money_lost_today,
             "minutes_lost_today": minutes_lost_today,
@@ -127,6 +138,7 @@ def create_monitor(monitor_data: MonitorCreate, db: Session = Depends(get_db), c
         url=monitor_data.url,
         interval=limits["check_interval"],
         timeout=monitor_data.timeout,
+        read_body=monitor_data.read_body,
         is_active=True
     )
     db.add(monitor)
@@ -167,6 +179,8 @@ def update_monitor(monitor_id: int, monitor_data: MonitorUpdate, db: Session = D
         monitor.url = monitor_data.url
     if monitor_data.timeout is not None:
         monitor.timeout = monitor_data.timeout
+    if monitor_data.read_body is not None:
+        monitor.read_body = monitor_data.read_body
     if monitor_data.is_active is not None:
         monitor.is_active = monitor_data.is_active
     
@@ -194,3 +208,23 @@ def get_monitor_checks(monitor_id: int, limit: int = 50, db: Session = Depends(g
     
     checks = db.query(Check).filter(Check.monitor_id == monitor_id).order_by(Check.checked_at.desc()).limit(limit).all()
     return checks
+
+
+@router.get("/{monitor_id}/latency")
+def get_monitor_latency(
+    monitor_id: int,
+    window: str = Query("day", regex="^(day|week|month)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Response time percentiles (p50/p95/p99) of successful checks over the window."""
+    monitor = db.query(Monitor).filter(Monitor.id == monitor_id, Monitor.user_id == current_user.id).first()
+    if not monitor:
+        raise HTTPException(status_code=404, detail="Monitor not found")
+
+    return {
+        "monitor_id": monitor_id,
+        "window": window,
+        "days": WINDOWS[window],
+        **window_percentiles(db, [monitor_id], window)[monitor_id]
+    }
@@ -12,6 +12,7 @@ from app.models.user import User
 from app.services.status_page_service import (
     calculate_uptime_percentage,
     get_average_response_time,
+    get_response_time_percentiles,
     get_recent_incidents,
     get_daily_uptime
 )
@@ -470,6 +471,7 @@ async def get_public_status_page(
 
         # Get average response time
         avg_response_time = get_average_response_time(db, monitor.id, days=7) if page.show_response_time else None
+        response_time_percentiles = get_response_time_percentiles(db, monitor.id, days=7) if page.show_response_time else None
 
         # Get recent incidents
         incidents = get_recent_incidents(db, monitor.id, limit=5) if page.show_incident_history else []
@@ -487,6 +489,7 @@ async def get_public_status_page(
             "uptime_30d": uptime_30d,
             "uptime_90d": uptime_90d,
             "avg_response_time": avg_response_time,
+            "response_time_percentiles": response_time_percentiles,
             "recent_incidents": incidents,
             "daily_uptime": daily_uptime
         })
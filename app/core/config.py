@@ -4,6 +4,8 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+    DATABASE_ASYNC: bool = False  # Worker uses an async engine (asyncpg/aiosqlite)
+    DATABASE_ASYNC_URL: str = ""  # Defaults to DATABASE_URL with the async driver
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
@@ -47,6 +49,48 @@ class Settings(BaseSettings):
     NOTIFICATION_COOLDOWN_SECONDS: int = 300  # 5 minutes cooldown between duplicate notifications
     MAX_NOTIFICATION_RETRIES: int = 3
 
+    # Check worker
+    CHECK_MAX_CONCURRENCY: int = 100  # Max in-flight HTTP checks per worker
+    CHECK_CYCLE_DEADLINE_SECONDS: int = 60  # Stragglers are cancelled after this
+    CHECK_MAX_PER_HOST: int = 10  # In-flight checks per hostname (0 = unlimited)
+    CHECK_COALESCE_WINDOW_SECONDS: float = 5  # Identical checks due within this share one request (0 = off)
+    SCHEDULER_SYNC_SECONDS: int = 30  # Pick up new/paused/re-intervalled monitors this often
+    SCHEDULER_SPREAD_PHASES: bool = True  # Spread same-interval monitors across the interval (stable per-monitor phase)
+    HTTP_POOL_MAX_CONNECTIONS: int = 200  # Per shared client
+    HTTP_POOL_MAX_KEEPALIVE: int = 100  # Idle keep-alive connections kept per shared client
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: int = 120  # > check interval so connections survive between checks
+    HTTP_CLIENT_IDLE_SECONDS: int = 900  # Shared clients unused this long are closed
+    DNS_CACHE_TTL_SECONDS: int = 300
+    DNS_NEGATIVE_CACHE_TTL_SECONDS: int = 30
+    SSRF_VALIDATION_TTL_SECONDS: int = 300  # Validated hostname -> pinned IP cache
+    TLS_CERT_REFRESH_SECONDS: int = 6 * 3600  # Fallback cert expiry lookups per host:port
+    CHECK_MAX_BODY_BYTES: int = 5 * 1024 * 1024  # Checks abort once this many body bytes are read
+    CHECK_WRITE_BATCH_SIZE: int = 200  # Checks per bulk INSERT
+    CHECK_WRITE_FLUSH_MS: int = 200  # Max time a check waits in the write buffer
+    CHECK_WRITE_MAX_PENDING: int = 5000  # Buffered checks before new results wait for the DB
+    CHECK_HISTORY_SIZE: int = 128  # Recent checks kept in memory per monitor for the detectors
+    HEALTH_RECONCILE_SECONDS: int = 6 * 3600  # Health score counters are re-seeded from the DB this often
+    HEALTH_RECONCILE_BATCH: int = 500  # Max monitors re-seeded per maintenance tick
+    DNA_REFRESH_BATCH: int = 100  # Monitors whose Site DNA is recomputed per maintenance tick
+    ANALYSIS_INTELLIGENCE_CONCURRENCY: int = 2  # Consumers of the post-check intelligence stage
+    ANALYSIS_INCIDENT_CONCURRENCY: int = 2  # Consumers of the incident detection stage
+    ANALYSIS_NOTIFICATION_CONCURRENCY: int = 4  # Consumers of the notification stage
+    ANALYSIS_MAX_BACKLOG: int = 10000  # Queued events per stage before the producer waits
+    ANALYSIS_BATCH_SIZE: int = 100  # Events handled per stage batch (one load + one commit)
+    CHECK_PARTITION_MONTHS_AHEAD: int = 3  # Monthly checks partitions kept created ahead (PostgreSQL)
+    CHECK_PARTITION_RETENTION_DAYS: int = 0  # Check partitions entirely older than this are dropped (0 = keep all; floored, see check_partitions)
+    CHECK_COMPACTION_ENABLED: bool = True  # Compact raw checks past the plan's raw_check_retention_days
+    CHECK_COMPACTION_HOURS: str = "2-6"  # Off-peak UTC hours (start-end) the worker compacts in
+    CHECK_COMPACTION_BATCH_SIZE: int = 5000  # Checks deleted per batch (one transaction)
+    CHECK_COMPACTION_PAUSE_MS: int = 500  # Pause between compaction batches
+    CHECK_ROLLUP_MINUTE_RETENTION_DAYS: int = 14  # Minute rollups older than this are deleted (0 = keep all)
+    WORKER_SHARDING_ENABLED: bool = False  # Split monitors across workers via DB shard leases
+    WORKER_SHARD_COUNT: int = 64  # Must be identical on every worker
+    WORKER_LEASE_SECONDS: int = 30  # Shards of a dead worker are reassigned after this
+    WORKER_HEARTBEAT_SECONDS: int = 10  # Must be well below WORKER_LEASE_SECONDS
+    WORKER_ID: str = ""  # Defaults to hostname:pid; pool processes append :index
+    WORKER_PROCESSES: int = 1  # >1 runs that many check processes (one event loop + DB pool each)
+
     # Better Stack Features (Feature Flags)
     FEATURE_ONCALL_ENABLED: bool = True
     FEATURE_INCIDENT_MANAGEMENT_ENABLED: bool = True
@@ -72,6 +116,7 @@ PLAN_LIMITS = {
         "white_label": False,
         "api_rate_limit": 10,  # req/min
         "priority_support": False,
+        "raw_check_retention_days": 31,  # then compacted into rollups (-1 = keep all)
     },
     "PAID": {  # PRO plan
         "max_monitors": -1,  # unlimited
@@ -83,6 +128,7 @@ PLAN_LIMITS = {
         "white_label": True,
         "api_rate_limit": 100,  # req/min
         "priority_support": False,
+        "raw_check_retention_days": 90,
     },
     "AGENCY": {
         "max_monitors": -1,  # unlimited
@@ -97,6 +143,7 @@ PLAN_LIMITS = {
         "sub_accounts": True,
         "white_label_reports": True,
         "sla": "99.9%",
+        "raw_check_retention_days": 400,
     }
 }
 
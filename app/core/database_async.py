@@ -0,0 +1,80 @@
+"""
+Async database layer for the check worker.
+
+With DATABASE_ASYNC enabled, the worker talks to the database through an
+AsyncSession (asyncpg for PostgreSQL, aiosqlite for SQLite), so database
+round-trips no longer block the event loop running the HTTP checks.
+
+The models and the synchronous service functions are shared with the API:
+run_db() runs a function taking a Session either directly (sync session) or
+through AsyncSession.run_sync(), where its I/O is awaited on the loop.
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional, TypeVar, Union
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+T = TypeVar("T")
+
+# Sync driver -> async driver for the same database
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_async_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+
+
+def async_database_url(url: str) -> str:
+    """Rewrite a sync DATABASE_URL to use the matching async driver."""
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Create the async engine on first use (the async driver is only needed then)."""
+    global _async_engine, _async_sessionmaker
+    if _async_sessionmaker is None:
+        _async_engine = create_async_engine(
+            settings.DATABASE_ASYNC_URL or async_database_url(settings.DATABASE_URL),
+            pool_pre_ping=True
+        )
+        # Objects stay usable after commit without lazy reloads outside run_sync()
+        _async_sessionmaker = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_sessionmaker
+
+
+async def dispose_async_engine():
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_sessionmaker = None
+
+
+@asynccontextmanager
+async def worker_session() -> AsyncIterator[Union[Session, AsyncSession]]:
+    """Session for worker code: AsyncSession if DATABASE_ASYNC, else a sync Session."""
+    if settings.DATABASE_ASYNC:
+        async with get_async_sessionmaker()() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+async def run_db(db: Union[Session, AsyncSession], fn: Callable[..., T], *args, **kwargs) -> T:
+    """Call fn(session, *args, **kwargs) without blocking the loop on an AsyncSession."""
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return fn(db, *args, **kwargs)
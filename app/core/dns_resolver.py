@@ -0,0 +1,185 @@
+"""
+DNS Resolver Module
+
+Non-blocking hostname resolution with a shared TTL cache, used by the check
+path (monitor_service) and SSRF validation (security_ssrf).
+
+- Async lookups run getaddrinfo in the loop's executor, never on the loop thread
+- Concurrent async lookups of the same hostname share one resolution task;
+  a waiter that is cancelled leaves it running for the others
+- Failed lookups are cached for a shorter negative TTL
+- Hit rate and resolution latency are tracked for the worker logs
+"""
+import asyncio
+import ipaddress
+import socket
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+
+
+class DNSResolver:
+    """
+    Hostname -> IPv4 addresses resolver with positive and negative caching.
+
+    getaddrinfo does not expose record TTLs, so cached answers live for a
+    fixed, configurable TTL.
+    """
+
+    def __init__(self, ttl: float = 300, negative_ttl: float = 30, max_entries: int = 10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        # hostname -> (expires_at, [ips]); empty list = negative entry
+        self._cache: Dict[str, Tuple[float, List[str]]] = {}
+        self._lock = Lock()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.resolution_time_total = 0.0
+
+    @staticmethod
+    def _literal(hostname: str) -> Optional[List[str]]:
+        """Return [hostname] if it is already an IP address."""
+        try:
+            ipaddress.ip_address(hostname)
+            return [hostname]
+        except ValueError:
+            return None
+
+    def _lookup_cache(self, hostname: str) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._cache.get(hostname)
+            if entry is None:
+                return None
+            expires_at, ips = entry
+            if expires_at < time.monotonic():
+                del self._cache[hostname]
+                return None
+            if ips:
+                self.hits += 1
+            else:
+                self.negative_hits += 1
+            return ips
+
+    def _store(self, hostname: str, ips: List[str], elapsed: float):
+        ttl = self.ttl if ips else self.negative_ttl
+        with self._lock:
+            self.misses += 1
+            self.resolution_time_total += elapsed
+            if len(self._cache) >= self.max_entries:
+                self._prune_locked()
+            self._cache[hostname] = (time.monotonic() + ttl, ips)
+
+    def _prune_locked(self):
+        """Drop expired entries, then the oldest ones if still over capacity."""
+        now = time.monotonic()
+        for hostname in [h for h, (exp, _) in self._cache.items() if exp < now]:
+            del self._cache[hostname]
+        overflow = len(self._cache) - self.max_entries + 1
+        for hostname in list(self._cache)[:max(0, overflow)]:
+            del self._cache[hostname]
+
+    @staticmethod
+    def _parse_addrinfo(infos) -> List[str]:
+        ips = []
+        for info in infos:
+            ip = info[4][0]
+            if ip not in ips:
+                ips.append(ip)
+        return ips
+
+    def resolve_all_sync(self, hostname: str) -> List[str]:
+        """Resolve hostname to its IPv4 addresses (blocking on cache miss)."""
+        hostname = hostname.lower()
+        literal = self._literal(hostname)
+        if literal:
+            return literal
+
+        cached = self._lookup_cache(hostname)
+        if cached is not None:
+            return cached
+
+        started = time.monotonic()
+        try:
+            ips = self._parse_addrinfo(
+                socket.getaddrinfo(hostname, None, socket.AF_INET, socket.SOCK_STREAM)
+            )
+        except (socket.gaierror, socket.herror, UnicodeError):
+            ips = []
+        self._store(hostname, ips, time.monotonic() - started)
+        return ips
+
+    async def resolve_all(self, hostname: str) -> List[str]:
+        """Resolve hostname to its IPv4 addresses without blocking the event loop."""
+        hostname = hostname.lower()
+        literal = self._literal(hostname)
+        if literal:
+            return literal
+
+        cached = self._lookup_cache(hostname)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        lookup = self._inflight.get(hostname)
+        if lookup is None or lookup.get_loop() is not loop:
+            lookup = loop.create_task(self._lookup(hostname))
+            # Retrieve the outcome even if every waiter was cancelled (no "never retrieved" warning)
+            lookup.add_done_callback(lambda task: task.cancelled() or task.exception())
+            self._inflight[hostname] = lookup
+        # Cancelling a waiter must not cancel the lookup the other waiters share
+        return await asyncio.shield(lookup)
+
+    async def _lookup(self, hostname: str) -> List[str]:
+        """The one resolution of hostname that concurrent resolve_all() calls wait for."""
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        try:
+            try:
+                infos = await loop.getaddrinfo(hostname, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+                ips = self._parse_addrinfo(infos)
+            except (socket.gaierror, socket.herror, UnicodeError):
+                ips = []
+            self._store(hostname, ips, time.monotonic() - started)
+            return ips
+        finally:
+            if self._inflight.get(hostname) is asyncio.current_task():
+                del self._inflight[hostname]
+
+    def resolve_sync(self, hostname: str) -> Optional[str]:
+        """Resolve hostname to its first IPv4 address, or None."""
+        ips = self.resolve_all_sync(hostname)
+        return ips[0] if ips else None
+
+    async def resolve(self, hostname: str) -> Optional[str]:
+        """Async variant of resolve_sync()."""
+        ips = await self.resolve_all(hostname)
+        return ips[0] if ips else None
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.negative_hits) / lookups, 3) if lookups else 0.0,
+                "avg_resolution_ms": round(self.resolution_time_total / self.misses * 1000, 2) if self.misses else 0.0,
+            }
+
+
+# Global resolver instance (shared by the check path and SSRF validation)
+dns_resolver = DNSResolver(
+    ttl=settings.DNS_CACHE_TTL_SECONDS,
+    negative_ttl=settings.DNS_NEGATIVE_CACHE_TTL_SECONDS
+)
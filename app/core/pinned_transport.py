@@ -0,0 +1,60 @@
+"""
+HTTP transport that connects checks to SSRF-validated IPs only.
+
+httpx normally resolves the hostname itself when opening a connection, which
+is a second lookup after SSRF validation and leaves a DNS rebinding window
+(validation sees a public IP, the connection gets a private one). Here the
+network backend resolves every new connection through the validation cache
+and opens the TCP socket to the exact IP that passed validation.
+
+TLS SNI, certificate verification and the Host header still use the
+hostname from the URL: httpcore takes them from the request origin, not
+from the connected address. Redirect targets are validated the same way
+when their connection is opened.
+"""
+from typing import Iterable, Optional
+import httpcore
+import httpx
+from app.core.security_ssrf import validate_hostname_async
+
+
+class PinnedIPBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that replaces the hostname with its validated IP on connect."""
+
+    def __init__(self, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self._backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        ip, error = await validate_hostname_async(host)
+        if ip is None:
+            raise httpcore.ConnectError(f"SSRF Protection: {error}")
+        return await self._backend.connect_tcp(
+            ip, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+        )
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None):
+        raise httpcore.ConnectError("SSRF Protection: Unix sockets are not allowed.")
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+class PinnedIPTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport whose connection pool connects through PinnedIPBackend."""
+
+    def __init__(self, limits: httpx.Limits = httpx.Limits(), verify: bool = True):
+        super().__init__(limits=limits, verify=verify, trust_env=False)
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(verify=verify, trust_env=False),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=PinnedIPBackend(),
+        )
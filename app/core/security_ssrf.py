@@ -3,11 +3,22 @@ SSRF Protection Module
 
 Protects against Server-Side Request Forgery attacks by validating URLs
 and blocking access to private networks, localhost, and cloud metadata endpoints.
+
+Validation results are cached per hostname for SSRF_VALIDATION_TTL_SECONDS,
+together with the IP that passed validation; checks connect to exactly that
+IP (see pinned_transport), so DNS is not resolved again between validation
+and connection.
 """
+import bisect
 import ipaddress
+import re
 import socket
+import time
+from threading import Lock
 from urllib.parse import urlparse
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+from app.core.config import settings
+from app.core.dns_resolver import dns_resolver
 
 
 # Private IP ranges to block
@@ -35,25 +46,150 @@ BLOCKED_HOSTNAMES = [
 ]
 
 
+def _build_range_table(networks) -> Dict[int, Tuple[List[int], List[int]]]:
+    """Merge networks into sorted, non-overlapping (starts, ends) integer ranges per IP version."""
+    table = {}
+    for version in (4, 6):
+        ranges = sorted(
+            (int(net.network_address), int(net.broadcast_address))
+            for net in networks if net.version == version
+        )
+        starts, ends = [], []
+        for start, end in ranges:
+            if ends and start <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        table[version] = (starts, ends)
+    return table
+
+
+# Precompiled lookups: bisect over merged ranges, one regex for the blocklist
+_PRIVATE_RANGE_TABLE = _build_range_table(PRIVATE_IP_RANGES)
+_BLOCKED_HOSTNAME_RE = re.compile("|".join(re.escape(blocked) for blocked in BLOCKED_HOSTNAMES))
+
+
 def is_private_ip(ip_str: str) -> bool:
     """Check if an IP address is private/internal."""
     try:
         ip = ipaddress.ip_address(ip_str)
-        for private_range in PRIVATE_IP_RANGES:
-            if ip in private_range:
-                return True
-        return False
     except ValueError:
         return False
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped  # ::ffff:127.0.0.1 is still localhost
+    starts, ends = _PRIVATE_RANGE_TABLE[ip.version]
+    value = int(ip)
+    index = bisect.bisect_right(starts, value) - 1
+    return index >= 0 and value <= ends[index]
 
 
 def is_blocked_hostname(hostname: str) -> bool:
-    """Check if hostname is in blocklist."""
-    hostname_lower = hostname.lower()
-    for blocked in BLOCKED_HOSTNAMES:
-        if blocked in hostname_lower:
-            return True
-    return False
+    """Check if hostname is in blocklist (substring match)."""
+    return _BLOCKED_HOSTNAME_RE.search(hostname.lower()) is not None
+
+
+class SSRFValidationCache:
+    """hostname -> (pinned_ip, error) validation results with a TTL."""
+
+    def __init__(self, ttl: float = 300, negative_ttl: float = 30, max_entries: int = 10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._cache: Dict[str, Tuple[float, Optional[str], str]] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, hostname: str) -> Optional[Tuple[Optional[str], str]]:
+        with self._lock:
+            entry = self._cache.get(hostname)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, hostname: str, ip: Optional[str], error: str):
+        ttl = self.ttl if ip else self.negative_ttl
+        with self._lock:
+            if len(self._cache) >= self.max_entries:
+                now = time.monotonic()
+                for expired in [h for h, entry in self._cache.items() if entry[0] < now]:
+                    del self._cache[expired]
+                if len(self._cache) >= self.max_entries:
+                    del self._cache[next(iter(self._cache))]
+            self._cache[hostname] = (time.monotonic() + ttl, ip, error)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Global validation cache (shared by API validation and the check path)
+validation_cache = SSRFValidationCache(
+    ttl=settings.SSRF_VALIDATION_TTL_SECONDS,
+    negative_ttl=settings.DNS_NEGATIVE_CACHE_TTL_SECONDS
+)
+
+
+def _precheck_hostname(hostname: str) -> str:
+    """Checks that need no DNS. Returns an error message, empty if fine."""
+    if is_blocked_hostname(hostname):
+        return f"Access to '{hostname}' is not allowed (blocked hostname)."
+    if is_private_ip(hostname):
+        return f"Access to private IP address '{hostname}' is not allowed."
+    return ""
+
+
+def _check_resolved_ip(hostname: str, ip: Optional[str]) -> Tuple[Optional[str], str]:
+    if ip is None:
+        return None, f"Cannot resolve '{hostname}' or it resolves to a blocked IP address."
+    # DNS rebinding protection: the resolved IP is what the check connects to
+    if is_private_ip(ip):
+        return None, f"Hostname '{hostname}' resolves to private IP '{ip}' which is not allowed."
+    return ip, ""
+
+
+def validate_hostname(hostname: str) -> Tuple[Optional[str], str]:
+    """
+    Validate a hostname (cached).
+
+    Returns:
+        (pinned_ip, error_message) - pinned_ip is None when blocked
+    """
+    hostname = hostname.lower()
+    cached = validation_cache.get(hostname)
+    if cached is not None:
+        return cached
+
+    error = _precheck_hostname(hostname)
+    result = (None, error) if error else _check_resolved_ip(hostname, dns_resolver.resolve_sync(hostname))
+    validation_cache.set(hostname, *result)
+    return result
+
+
+async def validate_hostname_async(hostname: str) -> Tuple[Optional[str], str]:
+    """validate_hostname() resolving without blocking the event loop."""
+    hostname = hostname.lower()
+    cached = validation_cache.get(hostname)
+    if cached is not None:
+        return cached
+
+    error = _precheck_hostname(hostname)
+    result = (None, error) if error else _check_resolved_ip(hostname, await dns_resolver.resolve(hostname))
+    validation_cache.set(hostname, *result)
+    return result
 
 
 def resolve_hostname_safely(hostname: str) -> Optional[str]:
@@ -68,8 +204,10 @@ def resolve_hostname_safely(hostname: str) -> Optional[str]:
         if is_blocked_hostname(hostname):
             return None
 
-        # Resolve hostname to IP
-        ip = socket.gethostbyname(hostname)
+        # Resolve hostname to IP (shared TTL cache, see dns_resolver)
+        ip = dns_resolver.resolve_sync(hostname)
+        if ip is None:
+            return None
 
         # Check if resolved IP is private
         if is_private_ip(ip):
@@ -104,30 +242,10 @@ def validate_url_for_ssrf(url: str) -> Tuple[bool, str]:
         if not parsed.hostname:
             return False, "URL must have a valid hostname."
 
-        hostname = parsed.hostname.lower()
-
-        # 3. Check if hostname is blocked
-        if is_blocked_hostname(hostname):
-            return False, f"Access to '{hostname}' is not allowed (blocked hostname)."
-
-        # 4. Check if hostname is an IP address
-        try:
-            ip = ipaddress.ip_address(hostname)
-            # If we get here, hostname is already an IP
-            if is_private_ip(hostname):
-                return False, f"Access to private IP address '{hostname}' is not allowed."
-        except ValueError:
-            # Hostname is not an IP, need to resolve it
-            pass
-
-        # 5. Resolve hostname and check resolved IP
-        resolved_ip = resolve_hostname_safely(hostname)
+        # 3. Blocklist, private IPs, resolution (cached per hostname)
+        resolved_ip, error = validate_hostname(parsed.hostname)
         if resolved_ip is None:
-            return False, f"Cannot resolve '{hostname}' or it resolves to a blocked IP address."
-
-        # 6. Double-check resolved IP (DNS rebinding protection)
-        if is_private_ip(resolved_ip):
-            return False, f"Hostname '{hostname}' resolves to private IP '{resolved_ip}' which is not allowed."
+            return False, error
 
         return True, ""
 
@@ -148,3 +266,27 @@ def validate_url_before_check(url: str) -> None:
     is_valid, error_msg = validate_url_for_ssrf(url)
     if not is_valid:
         raise ValueError(f"SSRF Protection: {error_msg}")
+
+
+async def validate_url_for_check(url: str) -> str:
+    """
+    Async validation for the check path.
+
+    Returns:
+        The validated IP the check must connect to
+
+    Raises:
+        ValueError: If URL is not safe for SSRF
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ['http', 'https']:
+        raise ValueError(
+            f"SSRF Protection: Invalid URL scheme '{parsed.scheme}'. Only http and https are allowed."
+        )
+    if not parsed.hostname:
+        raise ValueError("SSRF Protection: URL must have a valid hostname.")
+
+    resolved_ip, error = await validate_hostname_async(parsed.hostname)
+    if resolved_ip is None:
+        raise ValueError(f"SSRF Protection: {error}")
+    return resolved_ip
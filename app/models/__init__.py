@@ -6,6 +6,8 @@ from app.models.notification_log import NotificationLog
 from app.models.escalation_rule import EscalationRule
 from app.models.status_page import StatusPage, StatusPageMonitor, SSOProvider
 from app.models.status_page_subscriber import StatusPageSubscriber
+from app.models.worker_lease import WorkerNode, ShardLease
+from app.models.check_rollup import CheckRollup
 
 # Better Stack additions
 from app.models.service import Service
@@ -17,6 +19,7 @@ from app.models.errors import ErrorProject, ErrorGroup, ErrorEvent, ErrorLevel,
 __all__ = [
     "User", "Monitor", "Check", "Incident", "IncidentStatus", "IncidentSeverity",
     "NotificationLog", "EscalationRule", "StatusPage", "StatusPageMonitor", "StatusPageSubscriber", "SSOProvider",
+    "WorkerNode", "ShardLease", "CheckRollup",
     # Better Stack
     "Service", "IncidentRole", "RoleType",
     "OnCallSchedule", "OnCallShift", "CoverRequest", "RotationType", "CoverRequestStatus",
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -6,6 +6,10 @@ from app.core.database import Base
 
 class Check(Base):
     __tablename__ = "checks"
+    # On PostgreSQL the table is partitioned by month on checked_at (see check_partitions)
+    __table_args__ = (
+        Index("ix_checks_monitor_id_checked_at", "monitor_id", "checked_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     monitor_id = Column(Integer, ForeignKey("monitors.id"), nullable=False)
@@ -13,13 +17,17 @@ class Check(Base):
     status_code = Column(Integer, nullable=True)
     response_time = Column(Float, nullable=True)  # milliseconds
     error_message = Column(String, nullable=True)
-    checked_at = Column(DateTime, default=datetime.utcnow, index=True)
+    checked_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
 
     # Additional metadata
     ip_address = Column(String, nullable=True)
     server = Column(String, nullable=True)
     content_type = Column(String, nullable=True)
     ssl_expires_at = Column(DateTime, nullable=True)
+    tls_handshake_time = Column(Float, nullable=True)  # milliseconds, None if connection reused
+    bytes_read = Column(Integer, nullable=True)  # raw body bytes read, None if body skipped
+    peak_buffer_bytes = Column(Integer, nullable=True)  # largest chunk held in memory
+    timings = Column(JSON, nullable=True)  # ms per phase: resolve, connect, tls, send, wait, download, ttfb, overhead, total
     response_headers = Column(Text, nullable=True)  # JSON string
 
     monitor = relationship("Monitor", back_populates="checks")
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, LargeBinary, Index
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+
+class CheckRollup(Base):
+    """Check counts and response times of one monitor over one minute, hour or day (see check_rollups service)."""
+    __tablename__ = "check_rollups"
+    __table_args__ = (
+        Index("ix_check_rollups_granularity_bucket_start", "granularity", "bucket_start"),
+    )
+
+    monitor_id = Column(Integer, ForeignKey("monitors.id"), primary_key=True)
+    granularity = Column(String, primary_key=True)  # minute, hour, day
+    bucket_start = Column(DateTime, primary_key=True)  # UTC, truncated to the granularity
+    total = Column(Integer, nullable=False, default=0)
+    up = Column(Integer, nullable=False, default=0)
+    rt_count = Column(Integer, nullable=False, default=0)  # up checks with a response time
+    rt_sum = Column(Float, nullable=False, default=0.0)  # milliseconds
+    rt_min = Column(Float, nullable=True)
+    rt_max = Column(Float, nullable=True)
+    sketch = Column(LargeBinary, nullable=True)  # DDSketch.to_bytes() of the response times
+
+    monitor = relationship("Monitor", back_populates="rollups")
@@ -14,6 +14,7 @@ class Monitor(Base):
     url = Column(String, nullable=False)
     interval = Column(Integer, default=600)  # seconds (10min default)
     timeout = Column(Integer, default=30)  # seconds
+    read_body = Column(Boolean, default=True)  # False = stop after response headers
     is_active = Column(Boolean, default=True)
     last_status = Column(String, nullable=True)  # up, down, unknown
     last_checked_at = Column(DateTime, nullable=True)
@@ -27,9 +28,12 @@ class Monitor(Base):
     is_flapping = Column(Boolean, default=False)  # Currently flapping
     is_degrading = Column(Boolean, default=False)  # Currently degrading
     site_dna = Column(JSON, nullable=True)  # Stores pattern analysis
+    latency_baseline = Column(JSON, nullable=True)  # Streaming response-time baseline (see latency_baseline)
+    checks_compacted_until = Column(DateTime, nullable=True)  # Raw checks before this are compacted (see check_compaction)
 
     owner = relationship("User", back_populates="monitors")
     # service = relationship("Service", back_populates="monitors")  # Better Stack - DISABLED until migration
     checks = relationship("Check", back_populates="monitor", cascade="all, delete-orphan")
     incidents = relationship("Incident", back_populates="monitor", cascade="all, delete-orphan")
     escalation_rules = relationship("EscalationRule", back_populates="monitor", cascade="all, delete-orphan")
+    rollups = relationship("CheckRollup", back_populates="monitor", cascade="all, delete-orphan")
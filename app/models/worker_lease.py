@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class WorkerNode(Base):
+    """Live check worker, kept alive by periodic heartbeats."""
+    __tablename__ = "worker_nodes"
+
+    worker_id = Column(String, primary_key=True)  # hostname:pid unless WORKER_ID is set
+    started_at = Column(DateTime, default=datetime.utcnow)
+    heartbeat_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ShardLease(Base):
+    """Time-limited ownership of one monitor shard (monitor_id % shard_count)."""
+    __tablename__ = "shard_leases"
+
+    shard_id = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String, nullable=True, index=True)  # worker_id, NULL when free
+    expires_at = Column(DateTime, nullable=True)
+    acquired_at = Column(DateTime, nullable=True)
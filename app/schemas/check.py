@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 
 class CheckResponse(BaseModel):
@@ -17,6 +17,10 @@ class CheckResponse(BaseModel):
     server: Optional[str] = None
     content_type: Optional[str] = None
     ssl_expires_at: Optional[datetime] = None
+    tls_handshake_time: Optional[float] = None
+    bytes_read: Optional[int] = None
+    peak_buffer_bytes: Optional[int] = None
+    timings: Optional[Dict[str, float]] = None  # ms per phase (see PhaseTimer)
     response_headers: Optional[str] = None
 
     class Config:
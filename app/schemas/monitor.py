@@ -8,6 +8,7 @@ class MonitorCreate(BaseModel):
     url: str
     interval: int = 600
     timeout: int = 30
+    read_body: bool = True
 
 
 class MonitorUpdate(BaseModel):
@@ -15,6 +16,7 @@ class MonitorUpdate(BaseModel):
     url: Optional[str] = None
     interval: Optional[int] = None
     timeout: Optional[int] = None
+    read_body: Optional[bool] = None
     is_active: Optional[bool] = None
 
 
@@ -24,6 +26,7 @@ class MonitorResponse(BaseModel):
     url: str
     interval: int
     timeout: int
+    read_body: Optional[bool] = True
     is_active: bool
     last_status: Optional[str] = None
     last_checked_at: Optional[datetime] = None
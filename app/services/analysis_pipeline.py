@@ -0,0 +1,164 @@
+"""
+In-process pipeline for the work that follows a recorded check.
+
+The check loop used to run flapping, degradation, health score, Site DNA,
+incident detection, root-cause analysis, loss calculation and notification
+enqueueing inline before a check counted as finished. Instead it now only
+probes and persists, then emits an event; each later step is a
+PipelineStage with its own consumers:
+
+- Events are partitioned by monitor id across the stage's consumers, so a
+  monitor's checks are always handled in order (flapping, incidents) while
+  different monitors are handled concurrently
+- Consumers take events in batches (one monitor load and one commit per
+  batch instead of per check) and hand results to the next stage
+- Queues are bounded: a stage that falls behind makes put() wait
+  (backpressure) instead of growing without limit
+- stats() reports backlog, throughput, failures and queueing lag per stage
+
+Usage:
+    stage = PipelineStage("incidents", handle_incidents, concurrency=2)
+    await stage.put(CheckEvent(monitor.id, check))
+    stage.stats()
+    await stage.aclose(timeout=10)
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.models.check import Check
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CheckEvent:
+    """A check that has been written to the database."""
+    monitor_id: int
+    check: Check
+    emitted_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class IncidentEvent:
+    """An incident opened or resolved by a check, to notify about."""
+    monitor_id: int
+    incident_id: int
+    incident_type: str
+    emitted_at: float = field(default_factory=time.monotonic)
+
+
+class PipelineStage:
+    """
+    Bounded, monitor-ordered queue with `concurrency` consumers calling
+    handler(events) on batches of up to batch_size events.
+
+    A handler exception fails the whole batch (logged, counted); handlers
+    that can fail per event should catch and continue themselves.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[List], Awaitable[None]],
+        concurrency: int = 1,
+        max_backlog: int = 10000,
+        batch_size: int = 100
+    ):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.max_backlog = max(1, max_backlog)
+        self.batch_size = max(1, batch_size)
+        self._queues: List[asyncio.Queue] = []
+        self._consumers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.processed = 0
+        self.failed = 0
+        self.batches = 0
+        self.backpressure_waits = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+
+    def _start(self):
+        """Create queues and consumers on the running loop (again after a loop change)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        per_queue = max(1, self.max_backlog // self.concurrency)
+        self._queues = [asyncio.Queue(maxsize=per_queue) for _ in range(self.concurrency)]
+        self._consumers = [
+            asyncio.create_task(self._consume(queue), name=f"{self.name}-stage-{i}")
+            for i, queue in enumerate(self._queues)
+        ]
+
+    async def put(self, event):
+        self._start()
+        queue = self._queues[event.monitor_id % self.concurrency]
+        if queue.full():
+            self.backpressure_waits += 1
+        await queue.put(event)
+
+    async def _consume(self, queue: asyncio.Queue):
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            now = time.monotonic()
+            for event in batch:
+                lag = now - event.emitted_at
+                self._lag_total += lag
+                self._lag_max = max(self._lag_max, lag)
+            try:
+                await self.handler(batch)
+                self.processed += len(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"Analysis stage {self.name} failed on {len(batch)} events: {e}", exc_info=True)
+            finally:
+                self.batches += 1
+                for _ in batch:
+                    queue.task_done()
+
+    @property
+    def backlog(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def join(self):
+        """Wait until every event put so far has been handled."""
+        for queue in self._queues:
+            await queue.join()
+
+    async def aclose(self, timeout: float = 10):
+        """Drain the backlog (bounded by timeout), then stop the consumers."""
+        if self._consumers:
+            try:
+                await asyncio.wait_for(self.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Analysis stage {self.name}: {self.backlog} events dropped on shutdown")
+            for consumer in self._consumers:
+                consumer.cancel()
+            await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+        self._queues = []
+        self._loop = None
+
+    def stats(self) -> Dict:
+        """Counters since start; lag (put -> handled) max is since the previous stats() call."""
+        stats = {
+            "backlog": self.backlog,
+            "processed": self.processed,
+            "failed": self.failed,
+            "backpressure_waits": self.backpressure_waits,
+            "avg_batch": round((self.processed + self.failed) / self.batches, 1) if self.batches else 0.0,
+            "avg_lag_ms": round(self._lag_total / (self.processed + self.failed) * 1000, 1)
+            if self.processed + self.failed else 0.0,
+            "max_lag_ms": round(self._lag_max * 1000, 1),
+        }
+        self._lag_max = 0.0
+        return stats
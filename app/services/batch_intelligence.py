@@ -0,0 +1,315 @@
+"""
+Vectorized intelligence pass over many monitors at once.
+
+The per-check detectors in intelligent_incident_service loop over ORM
+objects one monitor at a time. For re-scoring the whole fleet (after a
+formula change, a restore, or as a periodic consistency pass) this module
+instead:
+
+1. Loads the last `window` checks of every monitor with one query (window
+   function) per ID_CHUNK monitors into columnar NumPy arrays, plus one
+   GROUP BY query for the 30-day health totals and one for incident counts
+2. Computes flapping (transitions), degradation (baseline vs recent
+   averages) and health scores for all monitors in vectorized passes
+3. Writes back only the monitors whose flags or score changed, with one
+   executemany UPDATE
+
+Thresholds and formulas are the same as the per-check detectors. Monitors
+whose streaming latency baseline has warmed up keep the worker's
+is_degrading verdict (see latency_baseline); the window check only covers
+the others.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.orm import Session
+from app.models.monitor import Monitor
+from app.models.check import Check
+from app.models.incident import Incident
+from app.services.latency_baseline import LatencyBaseline
+
+logger = logging.getLogger(__name__)
+
+FLAPPING_LOOKBACK_MINUTES = 30
+FLAPPING_MIN_CHECKS = 6
+FLAPPING_MIN_TRANSITIONS = 3
+DEGRADATION_BASELINE = 50
+DEGRADATION_RECENT = 5
+DEGRADATION_MIN_BASELINE = 10
+
+GRADES = [(95, "A+"), (90, "A"), (85, "B+"), (80, "B"), (70, "C")]
+ID_CHUNK = 1000  # monitor ids per IN (...) list
+
+
+@dataclass
+class CheckWindows:
+    """Recent checks of many monitors as parallel arrays, sorted by (monitor, id)."""
+    monitor_ids: np.ndarray  # int64, unique monitor ids (group order)
+    group: np.ndarray  # int64, index into monitor_ids for each check
+    ts: np.ndarray  # float64, checked_at as epoch seconds
+    status: np.ndarray  # int64, status code (see statuses)
+    up: np.ndarray  # bool
+    response_time: np.ndarray  # float64, NaN when missing
+    statuses: List[str]
+
+    def __len__(self) -> int:
+        return len(self.group)
+
+
+def _window_rows(db: Session, since: datetime, window: int, monitor_ids: Optional[List[int]] = None) -> List:
+    ranked = select(
+        Check.monitor_id,
+        Check.id,
+        Check.checked_at,
+        Check.status,
+        Check.response_time,
+        func.row_number().over(partition_by=Check.monitor_id, order_by=Check.id.desc()).label("rn")
+    ).where(Check.checked_at >= since)
+    if monitor_ids is not None:
+        ranked = ranked.where(Check.monitor_id.in_(monitor_ids))
+    ranked = ranked.subquery()
+
+    return db.execute(
+        select(ranked.c.monitor_id, ranked.c.checked_at, ranked.c.status, ranked.c.response_time)
+        .where(ranked.c.rn <= window)
+        .order_by(ranked.c.monitor_id, ranked.c.id)
+    ).all()
+
+
+def load_check_windows(
+    db: Session,
+    monitor_ids: Optional[List[int]] = None,
+    window: int = 64,
+    lookback_days: int = 2
+) -> CheckWindows:
+    """Last `window` checks (within lookback_days) of each monitor, one query per ID_CHUNK monitors."""
+    since = datetime.utcnow() - timedelta(days=lookback_days)
+    if monitor_ids is None:
+        rows = _window_rows(db, since, window)
+    else:
+        # Sorted chunks keep the rows in (monitor, id) order across queries
+        monitor_ids = sorted(monitor_ids)
+        rows = []
+        for i in range(0, len(monitor_ids), ID_CHUNK):
+            rows.extend(_window_rows(db, since, window, monitor_ids[i:i + ID_CHUNK]))
+
+    if not rows:
+        empty_int = np.zeros(0, dtype=np.int64)
+        return CheckWindows(empty_int, empty_int, np.zeros(0), empty_int,
+                            np.zeros(0, dtype=bool), np.zeros(0), [])
+
+    monitor_col, checked_col, status_col, rt_col = zip(*rows)
+    monitor_ids_arr, group = np.unique(np.asarray(monitor_col, dtype=np.int64), return_inverse=True)
+    statuses, status = np.unique(np.asarray(status_col, dtype=object).astype(str), return_inverse=True)
+    ts = np.asarray(checked_col, dtype="datetime64[us]").astype(np.int64) / 1e6
+    return CheckWindows(
+        monitor_ids=monitor_ids_arr,
+        group=group.astype(np.int64),
+        ts=ts,
+        status=status.astype(np.int64),
+        up=np.asarray(status_col, dtype=object) == "up",
+        response_time=np.asarray(rt_col, dtype=np.float64),
+        statuses=list(statuses)
+    )
+
+
+def flapping_flags(w: CheckWindows, now_ts: float) -> np.ndarray:
+    """Per monitor: >= 3 status changes among >= 6 checks in the last 30 minutes."""
+    n = len(w.monitor_ids)
+    in_window = w.ts >= now_ts - FLAPPING_LOOKBACK_MINUTES * 60
+    checks = np.bincount(w.group[in_window], minlength=n)
+
+    pairs = (w.group[1:] == w.group[:-1]) & in_window[1:] & in_window[:-1]
+    changed = pairs & (w.status[1:] != w.status[:-1])
+    transitions = np.bincount(w.group[1:][changed], minlength=n)
+    return (checks >= FLAPPING_MIN_CHECKS) & (transitions >= FLAPPING_MIN_TRANSITIONS)
+
+
+def degradation_flags(w: CheckWindows) -> np.ndarray:
+    """
+    Per monitor: latest check up and the 5 previous up checks average more
+    than 2x (and > 2s) the 50 previous up checks.
+    """
+    n = len(w.monitor_ids)
+    if not len(w):
+        return np.zeros(n, dtype=bool)
+    has_rt = w.up & ~np.isnan(w.response_time)
+
+    last = np.zeros(len(w), dtype=bool)
+    last[np.flatnonzero(np.diff(w.group))] = True
+    last[-1] = True
+    current_ok = np.zeros(n, dtype=bool)
+    current_ok[w.group[last]] = has_rt[last]
+
+    # Up checks before the latest one, ranked newest first within each monitor
+    idx = np.flatnonzero(has_rt & ~last)
+    g = w.group[idx]
+    counts = np.bincount(g, minlength=n)
+    starts = np.cumsum(counts) - counts
+    rank = counts[g] - 1 - (np.arange(len(idx)) - starts[g])
+
+    rt = w.response_time[idx]
+    base = rank < DEGRADATION_BASELINE
+    recent = rank < DEGRADATION_RECENT
+    base_n = np.bincount(g[base], minlength=n)
+    base_sum = np.bincount(g[base], weights=rt[base], minlength=n)
+    recent_n = np.bincount(g[recent], minlength=n)
+    recent_sum = np.bincount(g[recent], weights=rt[recent], minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        baseline_avg = base_sum / base_n
+        recent_avg = recent_sum / recent_n
+        return (
+            current_ok
+            & (base_n >= DEGRADATION_MIN_BASELINE)
+            & (recent_avg > baseline_avg * 2)
+            & (recent_avg > 2000)
+        )
+
+
+def health_scores(
+    total: np.ndarray,
+    up: np.ndarray,
+    incidents: np.ndarray,
+    rt_sum: np.ndarray,
+    rt_count: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized health_score_from_stats(): (scores, grades)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        uptime_score = (up / total * 100) / 100 * 60
+        avg = np.where(rt_count > 0, rt_sum / np.maximum(rt_count, 1), np.nan)
+
+    incident_score = np.select(
+        [incidents == 0, incidents <= 2, incidents <= 5],
+        [20, 15, 10],
+        default=np.maximum(0, 20 - incidents)
+    )
+    response_score = np.where(
+        np.isnan(avg) | (avg < 500), 20.0,
+        np.where(avg > 5000, 0.0, 20 - ((avg - 500) / 4500) * 20)
+    )
+    scores = np.where(
+        total > 0,
+        np.nan_to_num(uptime_score + incident_score + response_score).astype(np.int64),
+        100
+    )
+    grades = np.select([scores >= threshold for threshold, _ in GRADES], [grade for _, grade in GRADES], default="D")
+    return scores, grades
+
+
+def load_health_totals(db: Session, monitor_ids: np.ndarray, days: int = 30) -> Dict[str, np.ndarray]:
+    """30-day check and incident totals for monitor_ids (two GROUP BY queries per ID_CHUNK monitors)."""
+    since = datetime.utcnow() - timedelta(days=days)
+    position = {int(monitor_id): i for i, monitor_id in enumerate(monitor_ids)}
+    n = len(monitor_ids)
+    totals = {key: np.zeros(n) for key in ("total", "up", "rt_sum", "rt_count", "incidents")}
+
+    is_up = Check.status == "up"
+    has_rt = and_(is_up, Check.response_time.isnot(None))
+    ids = list(position)
+    for start in range(0, len(ids), ID_CHUNK):
+        chunk = ids[start:start + ID_CHUNK]
+        rows = db.query(
+            Check.monitor_id,
+            func.count(Check.id),
+            func.sum(case((is_up, 1), else_=0)),
+            func.sum(case((has_rt, Check.response_time), else_=0)),
+            func.sum(case((has_rt, 1), else_=0))
+        ).filter(
+            Check.checked_at >= since,
+            Check.monitor_id.in_(chunk)
+        ).group_by(Check.monitor_id).all()
+        for monitor_id, total, up, rt_sum, rt_count in rows:
+            i = position[monitor_id]
+            totals["total"][i] = total
+            totals["up"][i] = up or 0
+            totals["rt_sum"][i] = rt_sum or 0
+            totals["rt_count"][i] = rt_count or 0
+
+        for monitor_id, count in db.query(Incident.monitor_id, func.count(Incident.id)).filter(
+            Incident.started_at >= since,
+            Incident.monitor_id.in_(chunk)
+        ).group_by(Incident.monitor_id).all():
+            totals["incidents"][position[monitor_id]] = count
+    return totals
+
+
+def rescore_monitors(
+    db: Session,
+    monitor_ids: Optional[List[int]] = None,
+    window: int = 64,
+    write: bool = True
+) -> Dict:
+    """
+    Recompute is_flapping, is_degrading, health_score and health_grade for
+    all active monitors (or monitor_ids) and bulk-write the changed ones.
+    """
+    started = time.monotonic()
+    query = db.query(
+        Monitor.id, Monitor.is_flapping, Monitor.is_degrading, Monitor.health_score, Monitor.health_grade,
+        Monitor.latency_baseline
+    ).filter(Monitor.is_active == True)
+    if monitor_ids is None:
+        current = query.order_by(Monitor.id).all()
+    else:
+        monitor_ids = sorted(set(monitor_ids))
+        current = []
+        for i in range(0, len(monitor_ids), ID_CHUNK):
+            current.extend(query.filter(Monitor.id.in_(monitor_ids[i:i + ID_CHUNK])).order_by(Monitor.id).all())
+    if not current:
+        return {"monitors": 0, "changed": 0, "checks_loaded": 0, "seconds": 0.0}
+
+    ids = np.asarray([row[0] for row in current], dtype=np.int64)
+    windows = load_check_windows(db, [int(m) for m in ids], window=window)
+    loaded = time.monotonic()
+
+    # Monitors with recent checks are a subset of ids (both sorted by id)
+    at = np.searchsorted(ids, windows.monitor_ids)
+    flapping = np.zeros(len(ids), dtype=bool)
+    degrading = np.zeros(len(ids), dtype=bool)
+    if len(windows):
+        flapping[at] = flapping_flags(windows, datetime.now(timezone.utc).timestamp())
+        degrading[at] = degradation_flags(windows)
+
+    totals = load_health_totals(db, ids)
+    scores, grades = health_scores(
+        totals["total"], totals["up"], totals["incidents"], totals["rt_sum"], totals["rt_count"]
+    )
+    computed = time.monotonic()
+
+    changes = []
+    for i, (monitor_id, was_flapping, was_degrading, score, grade, baseline) in enumerate(current):
+        if LatencyBaseline.from_state(baseline).warm:
+            degrading[i] = bool(was_degrading)
+        new = {
+            "id": monitor_id,
+            "is_flapping": bool(flapping[i]),
+            "is_degrading": bool(degrading[i]),
+            "health_score": int(scores[i]),
+            "health_grade": str(grades[i]),
+        }
+        if (bool(was_flapping), bool(was_degrading), score, grade) != (
+            new["is_flapping"], new["is_degrading"], new["health_score"], new["health_grade"]
+        ):
+            changes.append(new)
+
+    if write and changes:
+        db.execute(update(Monitor), changes)
+        db.commit()
+
+    stats = {
+        "monitors": len(ids),
+        "changed": len(changes),
+        "flapping": int(flapping.sum()),
+        "degrading": int(degrading.sum()),
+        "checks_loaded": len(windows),
+        "load_seconds": round(loaded - started, 3),
+        "compute_seconds": round(computed - loaded, 3),
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(f"Batch intelligence: {stats}")
+    return stats
@@ -0,0 +1,290 @@
+"""
+Raw check retention: compaction of checks past their plan's retention.
+
+Nothing used to delete checks, so a 1-minute monitor added 525k rows a
+year. Past raw_check_retention_days (PLAN_LIMITS, per plan) a monitor's
+checks are compacted one day at a time:
+
+- The day's rollups (see check_rollups) are verified against the raw rows
+  first, and rebuilt from them if they are missing checks, so uptime,
+  response times and percentiles of the day are kept
+- Then every "up" check that follows another "up" check is deleted. Kept
+  at full fidelity: every failure (down, timeout, error), every state
+  transition (the first check of each up / down run), and the day's first
+  check as an anchor
+- Each monitor records how far it has been compacted
+  (Monitor.checks_compacted_until), so every run continues where the last
+  one stopped and each day is only compacted once
+
+Deletes run in batches (one select + one delete + commit per step), so the
+caller can throttle between steps; the worker does so during the off-peak
+hours (CHECK_COMPACTION_HOURS). Minute rollups older than
+CHECK_ROLLUP_MINUTE_RETENTION_DAYS are deleted the same way once all due
+checks are compacted; hour and day rollups are kept.
+
+Retention never goes below MIN_RETENTION_DAYS: the health score still
+counts raw checks over 30 days (the health endpoint caps its window at the
+plan's retention). Whole months are removed later by the
+partition drop (see check_partitions), which also returns the space of
+the rows deleted here to the operating system; a row delete only frees it
+for reuse by new rows (after autovacuum).
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, func, or_, select, text, tuple_
+from sqlalchemy.orm import Session
+from app.core.config import get_plan_limit
+from app.models.check import Check
+from app.models.check_rollup import CheckRollup
+from app.models.monitor import Monitor
+from app.models.user import User
+from app.services.check_rollups import backfill_rollups, bucket_start
+
+logger = logging.getLogger(__name__)
+
+MIN_RETENTION_DAYS = 31  # health score window (30 days) + today
+COMPACTION_CHUNK = 50  # monitors compacted together (same day)
+DUE_CHUNK = 1000  # monitors per first-check query
+
+
+def raw_check_retention_days(plan: str) -> int:
+    """Days a plan keeps every raw check; -1 keeps them forever."""
+    days = get_plan_limit(plan, "raw_check_retention_days")
+    if days is None or days < 0:
+        return -1
+    return max(days, MIN_RETENTION_DAYS)
+
+
+def in_off_peak(hours: str, now: datetime) -> bool:
+    """Whether now's UTC hour is in "start-end" (end excluded, may wrap midnight)."""
+    start, end = (int(hour) for hour in hours.split("-"))
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+def first_check_days(
+    db: Session,
+    monitor_ids: List[int],
+    until: datetime,
+    since: Optional[datetime] = None
+) -> Dict[int, datetime]:
+    """
+    {monitor_id: day of its first check before until}, counting from since or,
+    if None, from each monitor's watermark. One GROUP BY query per chunk.
+    """
+    days = {}
+    for i in range(0, len(monitor_ids), DUE_CHUNK):
+        query = db.query(Check.monitor_id, func.min(Check.checked_at)).filter(
+            Check.monitor_id.in_(monitor_ids[i:i + DUE_CHUNK]),
+            Check.checked_at < until
+        )
+        if since is not None:
+            query = query.filter(Check.checked_at >= since)
+        else:
+            query = query.join(Monitor, Monitor.id == Check.monitor_id).filter(or_(
+                Monitor.checks_compacted_until.is_(None),
+                Check.checked_at >= Monitor.checks_compacted_until
+            ))
+        for monitor_id, first in query.group_by(Check.monitor_id).all():
+            days[monitor_id] = bucket_start(first, "day")
+    return days
+
+
+def due_monitors(db: Session, now: datetime) -> Dict[int, Tuple[datetime, datetime]]:
+    """
+    {monitor_id: (next day to compact, cutoff)} of monitors with raw checks
+    past retention. Monitors with none get their watermark moved to the cutoff.
+    """
+    by_cutoff: Dict[datetime, List[int]] = {}
+    for monitor_id, compacted_until, plan in db.query(
+        Monitor.id, Monitor.checks_compacted_until, User.plan
+    ).join(User, Monitor.user_id == User.id).all():
+        days = raw_check_retention_days(plan)
+        if days < 0:
+            continue
+        cutoff = bucket_start(now - timedelta(days=days), "day")
+        if compacted_until is None or compacted_until < cutoff:
+            by_cutoff.setdefault(cutoff, []).append(monitor_id)
+
+    # One cutoff per plan, so a few GROUP BY queries cover the whole fleet
+    due = {}
+    for cutoff, monitor_ids in by_cutoff.items():
+        first_days = first_check_days(db, monitor_ids, cutoff)
+        due.update((monitor_id, (day, cutoff)) for monitor_id, day in first_days.items())
+        caught_up = [monitor_id for monitor_id in monitor_ids if monitor_id not in first_days]
+        if caught_up:
+            mark_compacted(db, caught_up, cutoff, commit=False)
+    db.commit()
+    return due
+
+
+def mark_compacted(db: Session, monitor_ids: List[int], until: datetime, commit: bool = True):
+    db.query(Monitor).filter(Monitor.id.in_(monitor_ids)).update(
+        {Monitor.checks_compacted_until: until}, synchronize_session=False
+    )
+    if commit:
+        db.commit()
+
+
+def ensure_day_rollups(db: Session, monitor_ids: List[int], day: datetime) -> int:
+    """Rebuild the day's rollups of monitors whose day row misses raw checks; returns how many."""
+    following = day + timedelta(days=1)
+    raw = dict(db.query(Check.monitor_id, func.count(Check.id)).filter(
+        Check.monitor_id.in_(monitor_ids),
+        Check.checked_at >= day,
+        Check.checked_at < following
+    ).group_by(Check.monitor_id).all())
+    rolled = dict(db.query(CheckRollup.monitor_id, CheckRollup.total).filter(
+        CheckRollup.monitor_id.in_(monitor_ids),
+        CheckRollup.granularity == "day",
+        CheckRollup.bucket_start == day
+    ).all())
+    # More rows than the rollup counted: rollups started mid-day (or were lost).
+    # Fewer: this day was partly compacted already and its rollup is complete.
+    stale = sorted(monitor_id for monitor_id, count in raw.items() if rolled.get(monitor_id, 0) < count)
+    if stale:
+        backfill_rollups(db, monitor_ids=stale, since=day, until=following)
+    return len(stale)
+
+
+def delete_batch(db: Session, monitor_ids: List[int], day: datetime, batch_size: int) -> int:
+    """Delete up to batch_size compactable checks of the day; returns rows deleted."""
+    following = day + timedelta(days=1)
+    in_day = and_(Check.monitor_id.in_(monitor_ids), Check.checked_at >= day, Check.checked_at < following)
+    previous_status = func.lag(Check.status).over(
+        partition_by=Check.monitor_id, order_by=[Check.checked_at, Check.id]
+    ).label("previous_status")
+    ranked = select(Check.id, Check.status, previous_status).where(in_day).subquery()
+    ids = db.execute(
+        select(ranked.c.id)
+        .where(ranked.c.status == "up", ranked.c.previous_status == "up")
+        .limit(batch_size)
+    ).scalars().all()
+    if ids:
+        # checked_at bounds keep the delete on the day's partition
+        db.query(Check).filter(
+            Check.id.in_(ids), Check.checked_at >= day, Check.checked_at < following
+        ).delete(synchronize_session=False)
+    db.commit()
+    return len(ids)
+
+
+def delete_minute_rollups(db: Session, before: datetime, batch_size: int) -> int:
+    """Delete up to batch_size minute rollups older than before; returns rows deleted."""
+    keys = db.query(CheckRollup.monitor_id, CheckRollup.bucket_start).filter(
+        CheckRollup.granularity == "minute",
+        CheckRollup.bucket_start < before
+    ).limit(batch_size).all()
+    if keys:
+        db.query(CheckRollup).filter(
+            CheckRollup.granularity == "minute",
+            tuple_(CheckRollup.monitor_id, CheckRollup.bucket_start).in_([tuple(key) for key in keys])
+        ).delete(synchronize_session=False)
+    db.commit()
+    return len(keys)
+
+
+def average_check_bytes(db: Session) -> Optional[float]:
+    """Table + index bytes per check row (PostgreSQL statistics), None elsewhere."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    size, rows = db.execute(text("""
+        SELECT SUM(pg_total_relation_size(c.oid)), SUM(GREATEST(c.reltuples, 0))
+        FROM pg_class c
+        WHERE c.oid = 'checks'::regclass
+           OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'checks'::regclass)
+    """)).one()
+    return float(size) / float(rows) if size and rows else None
+
+
+class CheckCompactor:
+    """
+    Compacts due checks one batch per step(); the caller throttles.
+
+    Usage:
+        compactor = CheckCompactor(batch_size=5000)
+        while compactor.step(db):
+            time.sleep(0.5)
+        compactor.stats()
+    """
+
+    def __init__(self, batch_size: int = 5000, minute_rollup_days: int = 14, chunk: int = COMPACTION_CHUNK):
+        self.batch_size = max(1, batch_size)
+        self.minute_rollup_days = minute_rollup_days
+        self.chunk = max(1, chunk)
+        self._due: Optional[Dict[int, Tuple[datetime, datetime]]] = None
+        self._work: Optional[Tuple[datetime, List[int]]] = None
+        self._row_bytes: Optional[float] = None
+        self.started = time.monotonic()
+        self.rows_deleted = 0
+        self.minute_rollups_deleted = 0
+        self.monitor_days = 0
+        self.rollups_rebuilt = 0
+        self.batches = 0
+
+    def _next_work(self) -> Optional[Tuple[datetime, List[int]]]:
+        """The oldest due day, with up to chunk monitors due that same day."""
+        if not self._due:
+            return None
+        day = min(start for start, _ in self._due.values())
+        monitor_ids = sorted(monitor_id for monitor_id, (start, _) in self._due.items() if start == day)
+        return day, monitor_ids[:self.chunk]
+
+    def _finish_day(self, db: Session, day: datetime, monitor_ids: List[int]):
+        """Move the watermarks past the day and each monitor to its next day with checks."""
+        following = day + timedelta(days=1)
+        mark_compacted(db, monitor_ids, following)
+        self.monitor_days += len(monitor_ids)
+        by_cutoff: Dict[datetime, List[int]] = {}
+        for monitor_id in monitor_ids:
+            cutoff = self._due.pop(monitor_id)[1]
+            if following < cutoff:
+                by_cutoff.setdefault(cutoff, []).append(monitor_id)
+        for cutoff, ids in by_cutoff.items():
+            next_days = first_check_days(db, ids, cutoff, since=following)
+            self._due.update((monitor_id, (next_day, cutoff)) for monitor_id, next_day in next_days.items())
+            done = [monitor_id for monitor_id in ids if monitor_id not in next_days]
+            if done:
+                mark_compacted(db, done, cutoff)
+
+    def step(self, db: Session, now: Optional[datetime] = None) -> bool:
+        """Compact one batch; False once nothing is left to do."""
+        now = now or datetime.utcnow()
+        if self._due is None:
+            self._row_bytes = average_check_bytes(db)
+            self._due = due_monitors(db, now)
+
+        if self._work is None:
+            self._work = self._next_work()
+            if self._work is None:
+                if self.minute_rollup_days <= 0:
+                    return False
+                deleted = delete_minute_rollups(db, now - timedelta(days=self.minute_rollup_days), self.batch_size)
+                self.minute_rollups_deleted += deleted
+                self.batches += 1
+                return deleted == self.batch_size
+            day, monitor_ids = self._work
+            self.rollups_rebuilt += ensure_day_rollups(db, monitor_ids, day)
+
+        day, monitor_ids = self._work
+        deleted = delete_batch(db, monitor_ids, day, self.batch_size)
+        self.rows_deleted += deleted
+        self.batches += 1
+        if deleted < self.batch_size:
+            self._finish_day(db, day, monitor_ids)
+            self._work = None
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            "rows_deleted": self.rows_deleted,
+            "bytes_freed_estimate": int(self.rows_deleted * self._row_bytes) if self._row_bytes else None,
+            "minute_rollups_deleted": self.minute_rollups_deleted,
+            "monitor_days": self.monitor_days,
+            "rollups_rebuilt": self.rollups_rebuilt,
+            "batches": self.batches,
+            "seconds": round(time.monotonic() - self.started, 3),
+        }
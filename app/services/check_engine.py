@@ -0,0 +1,171 @@
+"""
+Concurrent check execution engine.
+
+Runs monitor probes in parallel with:
+- A bounded number of in-flight checks (semaphore)
+- A per-cycle deadline after which stragglers are cancelled
+- Per-cycle throughput stats (checks/sec, cycle duration) for worker sizing
+- Optional per-host cap and coalescing of identical probes (see shared_targets)
+
+Probes run concurrently; results are handed to a callback one at a time on
+the calling task, so downstream steps (persistence, incidents, intelligence)
+keep using a single database session safely.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional
+from app.models.monitor import Monitor
+from app.models.check import Check
+from app.services.shared_targets import HostLimiter, ProbeCoalescer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CycleStats:
+    """Execution stats for one check cycle."""
+    scheduled: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    duration_seconds: float = 0.0
+
+    @property
+    def checks_per_second(self) -> float:
+        if self.duration_seconds <= 0:
+            return 0.0
+        return self.completed / self.duration_seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "duration_seconds": round(self.duration_seconds, 3),
+            "checks_per_second": round(self.checks_per_second, 2),
+        }
+
+
+class CheckEngine:
+    """
+    Bounded-concurrency runner for monitor probes.
+
+    Usage:
+        engine = CheckEngine(max_concurrency=100, cycle_deadline_seconds=60)
+        stats = await engine.run_cycle(monitors, probe_monitor, on_result)
+
+    Coalesced monitors wait for the shared probe without holding a slot;
+    only the probe that actually sends a request takes a per-host slot and
+    then an in-flight slot (in that order, so monitors queued behind a busy
+    host do not block other hosts).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 100,
+        cycle_deadline_seconds: float = 60,
+        max_per_host: int = 0,
+        coalesce_window_seconds: float = 0
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.cycle_deadline_seconds = cycle_deadline_seconds
+        self.host_limiter = HostLimiter(max_per_host)
+        self.coalescer = ProbeCoalescer(coalesce_window_seconds)
+        self.last_stats: Optional[CycleStats] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """One semaphore per event loop, shared by overlapping cycles."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run_probe(
+        self,
+        semaphore: asyncio.Semaphore,
+        probe: Callable[[Monitor], Awaitable[Check]],
+        monitor: Monitor
+    ) -> Check:
+        async def limited_probe(target: Monitor) -> Check:
+            async with self.host_limiter.slot(target):
+                async with semaphore:
+                    return await probe(target)
+
+        return await self.coalescer.run(monitor, limited_probe)
+
+    async def run_cycle(
+        self,
+        monitors: Iterable[Monitor],
+        probe: Callable[[Monitor], Awaitable[Check]],
+        on_result: Callable[[Monitor, Check], Awaitable[None]]
+    ) -> CycleStats:
+        """
+        Probe all monitors concurrently and feed each result to on_result.
+
+        Monitors still running when the cycle deadline expires are cancelled
+        and left unrecorded, so they are picked up again on the next cycle.
+        The in-flight bound is shared by all cycles running on the same loop.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore()
+        self.coalescer.prune()
+        stats = CycleStats()
+        started = time.monotonic()
+        deadline = loop.time() + self.cycle_deadline_seconds
+
+        tasks = {}
+        for monitor in monitors:
+            task = asyncio.create_task(self._run_probe(semaphore, probe, monitor))
+            tasks[task] = monitor
+        stats.scheduled = len(tasks)
+
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    monitor = tasks[task]
+                    try:
+                        check = task.result()
+                    except Exception as e:
+                        stats.failed += 1
+                        logger.error(f"  Probe crashed for monitor {monitor.id}: {e}", exc_info=True)
+                        continue
+
+                    try:
+                        await on_result(monitor, check)
+                        stats.completed += 1
+                    except Exception as e:
+                        stats.failed += 1
+                        logger.error(f"  Error handling result for monitor {monitor.id}: {e}", exc_info=True)
+        finally:
+            # Cancel stragglers (deadline hit or caller cancelled)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                stats.cancelled = len(pending)
+                logger.warning(
+                    f"Cycle deadline ({self.cycle_deadline_seconds}s) exceeded: "
+                    f"cancelled {len(pending)} straggling checks"
+                )
+
+            stats.duration_seconds = time.monotonic() - started
+            self.last_stats = stats
+
+        return stats
@@ -0,0 +1,194 @@
+"""
+In-memory recent check history for the worker's intelligence hot path.
+
+Flapping, degradation, health score, root-cause analysis and incident
+detection all look at a monitor's last few dozen checks. Rather than each
+querying the checks table after every check, the worker keeps a fixed-size
+ring buffer per monitor:
+
+- Plain arrays (id, time, status, response time, phase timings), about
+  70 bytes per check and no ORM objects
+- Seeded with one query the first time a monitor is analyzed, then kept up
+  to date by adding every new check
+- Dropped when the monitor leaves this worker (deleted, handed to another
+  shard owner), so a monitor coming back is re-seeded from the database
+
+recent() returns lightweight CheckRecord tuples with the same attribute
+names as Check, so detectors work the same on records and on query results.
+"""
+import math
+from array import array
+from datetime import datetime, timezone
+from typing import Container, Dict, List, NamedTuple, Optional
+from sqlalchemy.orm import Session
+from app.models.check import Check
+
+# Phases kept from Check.timings (those the detectors use)
+HISTORY_PHASES = ("resolve", "connect", "tls", "wait", "download")
+
+# Statuses are stored as small codes; new values are interned on first sight
+_STATUSES: List[str] = ["up", "down", "timeout", "error"]
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+_NAN = float("nan")
+
+
+def _status_code(status: str) -> int:
+    code = _STATUS_CODES.get(status)
+    if code is None:
+        code = _STATUS_CODES[status] = len(_STATUSES)
+        _STATUSES.append(status)
+    return code
+
+
+class CheckRecord(NamedTuple):
+    id: int
+    checked_at: datetime
+    status: str
+    response_time: Optional[float]
+    timings: Optional[Dict[str, float]]
+
+
+def _to_ts(dt: datetime) -> float:
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _from_ts(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+class MonitorHistory:
+    """Ring buffer of one monitor's most recent checks, oldest overwritten first."""
+
+    def __init__(self, capacity: int = 128):
+        self.capacity = max(1, capacity)
+        self._ids = array("q", [0]) * self.capacity
+        self._times = array("d", [0.0]) * self.capacity
+        self._statuses = array("H", [0]) * self.capacity
+        self._response_times = array("d", [_NAN]) * self.capacity
+        self._phases = {phase: array("d", [_NAN]) * self.capacity for phase in HISTORY_PHASES}
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def newest_id(self) -> int:
+        return self._ids[(self._next - 1) % self.capacity] if self._size else 0
+
+    def add(self, check_id: int, checked_at: datetime, status: str,
+            response_time: Optional[float], timings: Optional[Dict[str, float]]) -> bool:
+        """Append a check; checks not newer than the newest one are ignored."""
+        if check_id is None or check_id <= self.newest_id:
+            return False
+        i = self._next
+        self._ids[i] = check_id
+        self._times[i] = _to_ts(checked_at)
+        self._statuses[i] = _status_code(status)
+        self._response_times[i] = _NAN if response_time is None else response_time
+        for phase, values in self._phases.items():
+            values[i] = (timings or {}).get(phase, _NAN)
+        self._next = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        return True
+
+    def add_check(self, check: Check) -> bool:
+        return self.add(check.id, check.checked_at, check.status, check.response_time, check.timings)
+
+    def _record(self, i: int) -> CheckRecord:
+        timings = {
+            phase: values[i] for phase, values in self._phases.items()
+            if not math.isnan(values[i])
+        }
+        rt = self._response_times[i]
+        return CheckRecord(
+            id=self._ids[i],
+            checked_at=_from_ts(self._times[i]),
+            status=_STATUSES[self._statuses[i]],
+            response_time=None if math.isnan(rt) else rt,
+            timings=timings or None
+        )
+
+    def recent(
+        self,
+        before_id: Optional[int] = None,
+        status: Optional[str] = None,
+        with_response_time: bool = False,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[CheckRecord]:
+        """Matching checks, newest first (like ORDER BY id DESC with the same filters)."""
+        status_code = _status_code(status) if status is not None else None
+        since_ts = _to_ts(since) if since is not None else None
+        records = []
+        for n in range(self._size):
+            if limit is not None and len(records) >= limit:
+                break
+            i = (self._next - 1 - n) % self.capacity
+            if before_id is not None and self._ids[i] >= before_id:
+                continue
+            if since_ts is not None and self._times[i] < since_ts:
+                continue
+            if status_code is not None and self._statuses[i] != status_code:
+                continue
+            if with_response_time and math.isnan(self._response_times[i]):
+                continue
+            records.append(self._record(i))
+        return records
+
+
+class CheckHistoryCache:
+    """
+    MonitorHistory per monitor, seeded from the database on first use.
+
+    Usage:
+        histories = CheckHistoryCache(capacity=128)
+        history = histories.get(db, monitor.id)   # one query the first time
+        history.add_check(check)                  # after the check is written
+        histories.retain(check_scheduler)         # forget monitors no longer ours
+    """
+
+    def __init__(self, capacity: int = 128):
+        self.capacity = max(1, capacity)
+        self._histories: Dict[int, MonitorHistory] = {}
+        self.seeds = 0
+
+    def __contains__(self, monitor_id: int) -> bool:
+        return monitor_id in self._histories
+
+    def get(self, db: Session, monitor_id: int) -> MonitorHistory:
+        history = self._histories.get(monitor_id)
+        if history is None:
+            history = self._seed(db, monitor_id)
+            self._histories[monitor_id] = history
+        return history
+
+    def _seed(self, db: Session, monitor_id: int) -> MonitorHistory:
+        rows = db.query(
+            Check.id, Check.checked_at, Check.status, Check.response_time, Check.timings
+        ).filter(
+            Check.monitor_id == monitor_id
+        ).order_by(
+            # (monitor_id, checked_at) index: stops after the newest partitions
+            Check.checked_at.desc(), Check.id.desc()
+        ).limit(self.capacity).all()
+        history = MonitorHistory(self.capacity)
+        for check_id, checked_at, status, response_time, timings in reversed(rows):
+            history.add(check_id, checked_at, status, response_time, timings)
+        self.seeds += 1
+        return history
+
+    def discard(self, monitor_id: int):
+        self._histories.pop(monitor_id, None)
+
+    def retain(self, monitor_ids: Container[int]):
+        """Drop every history whose monitor is not in monitor_ids (e.g. the scheduler)."""
+        for monitor_id in [m for m in self._histories if m not in monitor_ids]:
+            del self._histories[monitor_id]
+
+    def stats(self) -> Dict:
+        return {
+            "monitors": len(self._histories),
+            "capacity": self.capacity,
+            "seeds": self.seeds,
+        }
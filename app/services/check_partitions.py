@@ -0,0 +1,206 @@
+"""
+Monthly range partitions of the checks table (PostgreSQL).
+
+checks is partitioned by checked_at (see the partition_checks_by_month
+Alembic revision). Every query that bounds checked_at (uptime windows,
+reports, flapping, rollups) then only scans the partitions of its range,
+and each partition has its own small (monitor_id, checked_at) index.
+
+This module keeps the partitions in shape:
+
+- ensure_partitions() creates the current month and PARTITION_MONTHS_AHEAD
+  months ahead, so inserts never hit a missing range (there is no DEFAULT
+  partition; a row outside every partition would fail the insert)
+- drop_expired_partitions() detaches and drops partitions entirely older
+  than the retention cutoff: expiring a month of checks is a catalog
+  operation instead of millions of row deletes. The cutoff never goes past
+  the longest raw_check_retention_days of any plan nor past checks not yet
+  compacted (see drop_cutoff): a drop must not take checks a plan still
+  keeps raw or whose days were never verified against their rollups
+
+The pre-partitioning table is kept as the first partition (FROM MINVALUE
+to the cutover month) and is dropped the same way once all of it expires.
+
+On other databases (SQLite in tests and local runs) checks is a plain
+table and every function here is a no-op.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from app.core.config import PLAN_LIMITS
+from app.models.check import Check
+from app.models.monitor import Monitor
+from app.services.check_compaction import raw_check_retention_days
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "checks"
+PARTITION_MONTHS_AHEAD = 3
+
+_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+@dataclass
+class Partition:
+    """One partition of checks and its [lower, upper) bound (None = unbounded)."""
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+
+
+def month_start(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_{month:%Y_%m}"
+
+
+def _parse_bound_value(value: str) -> Optional[datetime]:
+    value = value.strip()
+    if value.upper() in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def parse_bound(name: str, bound: str) -> Optional[Partition]:
+    """Partition from pg_get_expr(relpartbound); None for the DEFAULT partition."""
+    match = _BOUND.search(bound)
+    if match is None:
+        return None
+    return Partition(name, _parse_bound_value(match.group(1)), _parse_bound_value(match.group(2)))
+
+
+def plan_partitions(
+    existing: List[Partition],
+    now: datetime,
+    months_ahead: int = PARTITION_MONTHS_AHEAD
+) -> List[Tuple[str, datetime, datetime]]:
+    """(name, lower, upper) of the months from now's to months_ahead that no partition covers."""
+    missing = []
+    month = month_start(now)
+    for _ in range(months_ahead + 1):
+        following = add_months(month, 1)
+        covered = any(
+            (p.lower is None or p.lower < following) and (p.upper is None or p.upper > month)
+            for p in existing
+        )
+        if not covered:
+            missing.append((partition_name(month), month, following))
+        month = following
+    return missing
+
+
+def expired_partitions(existing: List[Partition], cutoff: datetime) -> List[Partition]:
+    """Partitions whose whole range is before cutoff."""
+    return [p for p in existing if p.upper is not None and p.upper <= cutoff]
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(text("""
+        SELECT 1
+        FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = :parent AND c.relnamespace = current_schema()::regnamespace
+    """), {"parent": PARENT_TABLE}).first() is not None
+
+
+def list_partitions(db: Session) -> List[Partition]:
+    """Partitions of checks, oldest first (empty when checks is not partitioned)."""
+    if not is_partitioned(db):
+        return []
+    rows = db.execute(text("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname = :parent AND parent.relnamespace = current_schema()::regnamespace
+    """), {"parent": PARENT_TABLE}).all()
+    partitions = [p for p in (parse_bound(name, bound) for name, bound in rows) if p is not None]
+    return sorted(partitions, key=lambda p: p.lower or datetime.min)
+
+
+def ensure_partitions(
+    db: Session,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    now: Optional[datetime] = None
+) -> List[str]:
+    """Create missing monthly partitions up to months_ahead; returns their names."""
+    if not is_partitioned(db):
+        return []
+    missing = plan_partitions(list_partitions(db), now or datetime.utcnow(), months_ahead)
+    for name, lower, upper in missing:
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{lower.isoformat(' ')}') TO ('{upper.isoformat(' ')}')"
+        ))
+    db.commit()
+    if missing:
+        logger.info(f"Created check partitions: {[name for name, _, _ in missing]}")
+    return [name for name, _, _ in missing]
+
+
+def drop_cutoff(db: Session, retention_days: int, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Partitions entirely before this may be dropped; None when nothing may.
+
+    retention_days, moved back to the longest plan retention and to the
+    oldest check not yet compacted (watermark, or first check of a monitor
+    never compacted).
+    """
+    if retention_days <= 0:
+        return None
+    now = now or datetime.utcnow()
+    plan_days = [raw_check_retention_days(plan) for plan in PLAN_LIMITS]
+    if any(days < 0 for days in plan_days):
+        return None  # some plan keeps every raw check
+    cutoff = now - timedelta(days=max([retention_days] + plan_days))
+    oldest_watermark = db.query(func.min(Monitor.checks_compacted_until)).scalar()
+    if oldest_watermark is not None:
+        cutoff = min(cutoff, oldest_watermark)
+    first_uncompacted = db.query(func.min(Check.checked_at)).join(
+        Monitor, Monitor.id == Check.monitor_id
+    ).filter(
+        Monitor.checks_compacted_until.is_(None),
+        Check.checked_at < cutoff
+    ).scalar()
+    if first_uncompacted is not None:
+        cutoff = min(cutoff, first_uncompacted)
+    if cutoff < now - timedelta(days=retention_days):
+        logger.info(f"Check partition cutoff held back to {cutoff} (plan retention / compaction)")
+    return cutoff
+
+
+def drop_expired_partitions(
+    db: Session,
+    retention_days: int,
+    now: Optional[datetime] = None,
+    dry_run: bool = False
+) -> List[str]:
+    """Detach and drop partitions holding only checks past retention (see drop_cutoff); returns their names."""
+    if retention_days <= 0 or not is_partitioned(db):
+        return []
+    cutoff = drop_cutoff(db, retention_days, now)
+    if cutoff is None:
+        return []
+    expired = expired_partitions(list_partitions(db), cutoff)
+    if dry_run:
+        return [p.name for p in expired]
+    for partition in expired:
+        # One short lock per partition; no row is read or deleted
+        db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition.name}"))
+        db.execute(text(f"DROP TABLE {partition.name}"))
+        db.commit()
+        logger.info(f"Dropped check partition {partition.name} (checks before {partition.upper})")
+    return [p.name for p in expired]
@@ -0,0 +1,421 @@
+"""
+Per-monitor check rollups at minute, hour and day granularity.
+
+Uptime for the status page, reports, dashboard and monthly emails used to
+count raw checks over 7 / 30 / 90-day windows (130k rows for a 90-day
+uptime of a 1-minute monitor). check_rollups keeps, per monitor and bucket:
+
+- total and up checks, and count / sum / min / max of up response times
+- a DDSketch of those response times, for percentiles (see latency_sketch)
+
+The worker adds each written check to in-memory buckets (RollupAccumulator)
+and merges them into the table once a minute, so the check path does no
+extra query. Readers cover a window with the coarsest whole buckets (days
+in the middle, hours and minutes at the edges): a 90-day uptime reads
+about 90 + 2 * 24 + 2 * 60 rows. Windows have minute resolution.
+
+backfill_rollups() rebuilds whole days from raw checks, for history written
+before rollups existed (scripts/backfill_check_rollups.py).
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, false, func, or_
+from sqlalchemy.orm import Session
+from app.models.check import Check
+from app.models.check_rollup import CheckRollup
+from app.models.monitor import Monitor
+from app.services.latency_sketch import DDSketch
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("day", "hour", "minute")  # coarsest first
+STEPS = {"day": timedelta(days=1), "hour": timedelta(hours=1), "minute": timedelta(minutes=1)}
+FLUSH_CHUNK = 1000  # monitors per lookup query in flush()
+BACKFILL_CHUNK = 50  # monitors per backfill query (one day at a time)
+
+# Named windows for the APIs (days)
+WINDOWS = {"day": 1, "week": 7, "month": 30}
+
+
+def bucket_start(dt: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return dt.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return dt.replace(minute=0, second=0, microsecond=0)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _ceil(dt: datetime, granularity: str) -> datetime:
+    start = bucket_start(dt, granularity)
+    return start if start == dt else start + STEPS[granularity]
+
+
+def cover(since: datetime, until: datetime) -> List[Tuple[str, datetime, datetime]]:
+    """
+    (granularity, first, end) bucket_start ranges covering [since, until)
+    with the coarsest whole buckets; since and until are widened to minutes.
+    """
+    ranges = []
+
+    def split(low: datetime, high: datetime, granularities: Tuple[str, ...]):
+        if low >= high:
+            return
+        granularity, finer = granularities[0], granularities[1:]
+        first, end = _ceil(low, granularity), bucket_start(high, granularity)
+        if not finer or first < end:
+            if finer:
+                split(low, first, finer)
+            ranges.append((granularity, first, end))
+            if finer:
+                split(end, high, finer)
+        else:
+            split(low, high, finer)
+
+    split(bucket_start(since, "minute"), _ceil(until, "minute"), GRANULARITIES)
+    return ranges
+
+
+def _cover_filter(since: datetime, until: Optional[datetime]):
+    return or_(false(), *[
+        and_(
+            CheckRollup.granularity == granularity,
+            CheckRollup.bucket_start >= first,
+            CheckRollup.bucket_start < end
+        )
+        for granularity, first, end in cover(since, until or datetime.utcnow())
+    ])
+
+
+class RollupBucket:
+    """Counters of one monitor's checks in one bucket."""
+
+    __slots__ = ("total", "up", "rt_count", "rt_sum", "rt_min", "rt_max", "sketch")
+
+    def __init__(self):
+        self.total = 0
+        self.up = 0
+        self.rt_count = 0
+        self.rt_sum = 0.0
+        self.rt_min: Optional[float] = None
+        self.rt_max: Optional[float] = None
+        self.sketch: Optional[DDSketch] = None
+
+    def add(self, status: str, response_time: Optional[float]):
+        self.total += 1
+        if status != "up":
+            return
+        self.up += 1
+        if response_time is None:
+            return
+        self.rt_count += 1
+        self.rt_sum += response_time
+        self.rt_min = response_time if self.rt_min is None else min(self.rt_min, response_time)
+        self.rt_max = response_time if self.rt_max is None else max(self.rt_max, response_time)
+        if self.sketch is None:
+            self.sketch = DDSketch()
+        self.sketch.add(response_time)
+
+    def merge(self, other: "RollupBucket"):
+        self.total += other.total
+        self.up += other.up
+        self.rt_count += other.rt_count
+        self.rt_sum += other.rt_sum
+        for value in (other.rt_min, other.rt_max):
+            if value is not None:
+                self.rt_min = value if self.rt_min is None else min(self.rt_min, value)
+                self.rt_max = value if self.rt_max is None else max(self.rt_max, value)
+        if other.sketch is not None:
+            if self.sketch is None:
+                self.sketch = DDSketch()
+            self.sketch.merge(other.sketch)
+
+    @classmethod
+    def from_row(cls, row: CheckRollup) -> "RollupBucket":
+        bucket = cls()
+        bucket.total, bucket.up = row.total, row.up
+        bucket.rt_count, bucket.rt_sum = row.rt_count, row.rt_sum
+        bucket.rt_min, bucket.rt_max = row.rt_min, row.rt_max
+        bucket.sketch = DDSketch.from_bytes(row.sketch) if row.sketch else None
+        return bucket
+
+    def write(self, row: CheckRollup):
+        row.total, row.up = self.total, self.up
+        row.rt_count, row.rt_sum = self.rt_count, self.rt_sum
+        row.rt_min, row.rt_max = self.rt_min, self.rt_max
+        row.sketch = self.sketch.to_bytes() if self.sketch is not None else None
+
+
+class RollupAccumulator:
+    """
+    Minute, hour and day buckets of checks not yet written, merged into
+    check_rollups by flush().
+
+    Usage:
+        rollups = RollupAccumulator()
+        rollups.add_check(check)      # hot path, in memory
+        rollups.flush(db)             # periodically (and on shutdown)
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple[int, str, datetime], RollupBucket] = {}
+        self.flushes = 0
+        self.rows_written = 0
+
+    def add(self, monitor_id: int, checked_at: datetime, status: str, response_time: Optional[float]):
+        for granularity in GRANULARITIES:
+            key = (monitor_id, granularity, bucket_start(checked_at, granularity))
+            bucket = self._pending.get(key)
+            if bucket is None:
+                bucket = self._pending[key] = RollupBucket()
+            bucket.add(status, response_time)
+
+    def add_check(self, check: Check):
+        self.add(check.monitor_id, check.checked_at or datetime.utcnow(), check.status, check.response_time)
+
+    def flush(self, db: Session) -> int:
+        """Merge pending buckets into their rows; returns rows written."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            monitor_ids = sorted({monitor_id for monitor_id, _, _ in pending})
+            existing = {}
+            for granularity in GRANULARITIES:
+                starts = {start for _, g, start in pending if g == granularity}
+                for i in range(0, len(monitor_ids), FLUSH_CHUNK):
+                    for row in db.query(CheckRollup).filter(
+                        CheckRollup.monitor_id.in_(monitor_ids[i:i + FLUSH_CHUNK]),
+                        CheckRollup.granularity == granularity,
+                        CheckRollup.bucket_start.in_(starts)
+                    ).all():
+                        existing[(row.monitor_id, row.granularity, row.bucket_start)] = row
+            for (monitor_id, granularity, start), bucket in pending.items():
+                row = existing.get((monitor_id, granularity, start))
+                if row is None:
+                    row = CheckRollup(monitor_id=monitor_id, granularity=granularity, bucket_start=start)
+                    db.add(row)
+                    merged = bucket
+                else:
+                    merged = RollupBucket.from_row(row)
+                    merged.merge(bucket)
+                merged.write(row)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Keep the checks for the next flush
+            for key, bucket in pending.items():
+                if key in self._pending:
+                    bucket.merge(self._pending[key])
+                self._pending[key] = bucket
+            raise
+        self.flushes += 1
+        self.rows_written += len(pending)
+        return len(pending)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
+
+
+def record_rollups(db: Session, checks: Iterable[Check]) -> int:
+    """Add checks written outside the worker (one-off checks) to their rollups."""
+    rollups = RollupAccumulator()
+    for check in checks:
+        rollups.add_check(check)
+    return rollups.flush(db)
+
+
+def rollup_totals(
+    db: Session,
+    monitor_ids: Iterable[int],
+    since: datetime,
+    until: Optional[datetime] = None
+) -> Dict[int, Dict]:
+    """
+    {"total", "up", "rt_count", "rt_sum", "rt_min", "rt_max"} per monitor
+    over [since, until), in one query.
+    """
+    monitor_ids = list(monitor_ids)
+    totals = {
+        monitor_id: {"total": 0, "up": 0, "rt_count": 0, "rt_sum": 0.0, "rt_min": None, "rt_max": None}
+        for monitor_id in monitor_ids
+    }
+    if not monitor_ids:
+        return totals
+    rows = db.query(
+        CheckRollup.monitor_id,
+        func.sum(CheckRollup.total),
+        func.sum(CheckRollup.up),
+        func.sum(CheckRollup.rt_count),
+        func.sum(CheckRollup.rt_sum),
+        func.min(CheckRollup.rt_min),
+        func.max(CheckRollup.rt_max)
+    ).filter(
+        CheckRollup.monitor_id.in_(monitor_ids),
+        _cover_filter(since, until)
+    ).group_by(CheckRollup.monitor_id).all()
+    for monitor_id, total, up, rt_count, rt_sum, rt_min, rt_max in rows:
+        totals[monitor_id] = {
+            "total": int(total or 0),
+            "up": int(up or 0),
+            "rt_count": int(rt_count or 0),
+            "rt_sum": float(rt_sum or 0),
+            "rt_min": rt_min,
+            "rt_max": rt_max,
+        }
+    return totals
+
+
+def rollup_series(
+    db: Session,
+    monitor_id: int,
+    granularity: str,
+    since: datetime,
+    until: Optional[datetime] = None
+) -> List[CheckRollup]:
+    """A monitor's rows of one granularity from since's bucket on, oldest first."""
+    query = db.query(CheckRollup).filter(
+        CheckRollup.monitor_id == monitor_id,
+        CheckRollup.granularity == granularity,
+        CheckRollup.bucket_start >= bucket_start(since, granularity)
+    )
+    if until is not None:
+        query = query.filter(CheckRollup.bucket_start < until)
+    return query.order_by(CheckRollup.bucket_start).all()
+
+
+def merged_sketches(
+    db: Session,
+    monitor_ids: Iterable[int],
+    since: datetime,
+    until: Optional[datetime] = None
+) -> Dict[int, DDSketch]:
+    """One merged response-time sketch per monitor over [since, until)."""
+    monitor_ids = list(monitor_ids)
+    sketches = {monitor_id: DDSketch() for monitor_id in monitor_ids}
+    if not monitor_ids:
+        return sketches
+    for monitor_id, data in db.query(CheckRollup.monitor_id, CheckRollup.sketch).filter(
+        CheckRollup.monitor_id.in_(monitor_ids),
+        CheckRollup.sketch.isnot(None),
+        _cover_filter(since, until)
+    ).all():
+        sketches[monitor_id].merge(DDSketch.from_bytes(data))
+    return sketches
+
+
+def latency_percentiles(
+    db: Session,
+    monitor_id: int,
+    since: datetime,
+    until: Optional[datetime] = None
+) -> Dict:
+    """{"count", "mean", "p50", "p95", "p99"} of successful checks' response times."""
+    return merged_sketches(db, [monitor_id], since, until)[monitor_id].summary()
+
+
+def window_percentiles(db: Session, monitor_ids: List[int], window: str = "day") -> Dict[int, Dict]:
+    """latency_percentiles() for several monitors over a named window (WINDOWS)."""
+    since = datetime.utcnow() - timedelta(days=WINDOWS[window])
+    return {
+        monitor_id: sketch.summary()
+        for monitor_id, sketch in merged_sketches(db, monitor_ids, since).items()
+    }
+
+
+def _thinned_monitors(db: Session, monitor_ids: List[int], day: datetime) -> set:
+    """Monitors whose day rollup counted more checks than the raw rows left (compacted)."""
+    following = day + STEPS["day"]
+    raw = dict(db.query(Check.monitor_id, func.count(Check.id)).filter(
+        Check.monitor_id.in_(monitor_ids),
+        Check.checked_at >= day,
+        Check.checked_at < following
+    ).group_by(Check.monitor_id).all())
+    return {
+        monitor_id
+        for monitor_id, total in db.query(CheckRollup.monitor_id, CheckRollup.total).filter(
+            CheckRollup.monitor_id.in_(monitor_ids),
+            CheckRollup.granularity == "day",
+            CheckRollup.bucket_start == day
+        ).all()
+        if total > raw.get(monitor_id, 0)
+    }
+
+
+def backfill_rollups(
+    db: Session,
+    monitor_ids: Optional[List[int]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    chunk: int = BACKFILL_CHUNK
+) -> Dict:
+    """
+    Rebuild the rollups of whole days in [since, until) from raw checks.
+
+    until defaults to the start of today: today's buckets are being merged
+    into by the worker, and replacing them could count a check twice. Each
+    (monitor chunk, day) is replaced in one transaction, so the backfill can
+    run while the worker is live and can be re-run.
+
+    Days whose raw checks were compacted (see check_compaction) are never
+    rebuilt from the few checks left: days before a monitor's
+    checks_compacted_until are skipped, and so is any day whose rollup
+    already counted more checks than remain (a day being compacted).
+    """
+    started = time.monotonic()
+    until = bucket_start(until or datetime.utcnow(), "day")
+    if since is None:
+        since = db.query(func.min(Check.checked_at)).scalar()
+    if monitor_ids is None:
+        monitor_ids = [monitor_id for monitor_id, in db.query(Monitor.id).order_by(Monitor.id).all()]
+    stats = {"monitors": len(monitor_ids), "days": 0, "checks": 0, "rows": 0}
+    if since is None or not monitor_ids:
+        return {**stats, "seconds": 0.0}
+
+    compacted_until = dict(db.query(Monitor.id, Monitor.checks_compacted_until).filter(
+        Monitor.checks_compacted_until.isnot(None)
+    ).all())
+    stats["skipped"] = 0
+
+    day = bucket_start(since, "day")
+    while day < until:
+        following = day + STEPS["day"]
+        for i in range(0, len(monitor_ids), chunk):
+            chunk_ids = monitor_ids[i:i + chunk]
+            ids = [m for m in chunk_ids if compacted_until.get(m) is None or compacted_until[m] <= day]
+            if ids:
+                thinned = _thinned_monitors(db, ids, day)
+                ids = [m for m in ids if m not in thinned]
+            stats["skipped"] += len(chunk_ids) - len(ids)
+            if not ids:
+                continue
+            rollups = RollupAccumulator()
+            for monitor_id, checked_at, status, response_time in db.query(
+                Check.monitor_id, Check.checked_at, Check.status, Check.response_time
+            ).filter(
+                Check.monitor_id.in_(ids),
+                Check.checked_at >= day,
+                Check.checked_at < following
+            ).yield_per(10000):
+                rollups.add(monitor_id, checked_at, status, response_time)
+                stats["checks"] += 1
+            db.query(CheckRollup).filter(
+                CheckRollup.monitor_id.in_(ids),
+                CheckRollup.bucket_start >= day,
+                CheckRollup.bucket_start < following
+            ).delete(synchronize_session=False)
+            written = rollups.flush(db)
+            if not written:
+                db.commit()  # the delete alone
+            stats["rows"] += written
+        stats["days"] += 1
+        day = following
+
+    stats["seconds"] = round(time.monotonic() - started, 3)
+    logger.info(f"Check rollups backfilled: {stats}")
+    return stats
@@ -0,0 +1,339 @@
+"""
+Due-time scheduler for monitor checks.
+
+Keeps every active monitor in a min-heap keyed on its next due time, so the
+worker sleeps until exactly the next check is due and only touches monitors
+that are actually due, instead of scanning every active monitor each tick.
+
+- Interval changes, pause/resume and removal are applied in place
+  (stale heap entries are invalidated lazily by version number)
+- A popped monitor stays "in flight" until reschedule() is called with the
+  outcome of its check, so it can never be dispatched twice at once
+- Scheduling lag (dispatch time - due time) is kept for percentile reporting
+- Optional phase offsets spread monitors sharing an interval across it (see
+  assign_phases), so same-interval monitors do not fire together
+"""
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+
+# Fractional part of id * golden ratio: consecutive ids land far apart and
+# keep filling the largest gaps (Fibonacci hashing)
+_GOLDEN_RATIO_FRACTION = 0.6180339887498949
+
+
+def monitor_phase(monitor_id: int, interval: int) -> float:
+    """Phase offset in [0, interval) seconds of one monitor, from its id alone."""
+    return (monitor_id * _GOLDEN_RATIO_FRACTION) % 1.0 * interval
+
+
+def assign_phases(monitors: Iterable[Tuple[int, int]]) -> Dict[int, float]:
+    """
+    Assign each monitor a phase offset in [0, interval) seconds.
+
+    A monitor's phase depends only on its id and interval (see monitor_phase),
+    so it never moves when other monitors are added or removed, survives
+    restarts, and is the same on whichever worker owns the monitor. Ids are
+    spread by Fibonacci hashing, which is close to evenly spaced for the
+    consecutive ids the database hands out.
+    """
+    return {monitor_id: monitor_phase(monitor_id, interval) for monitor_id, interval in monitors}
+
+
+def align_to_phase(target: float, interval: int, phase: float, not_before: Optional[float] = None) -> float:
+    """Nearest epoch time to target that sits on the monitor's phase grid."""
+    if interval <= 0:
+        return target
+    slot = phase + round((target - phase) / interval) * interval
+    if not_before is not None:
+        while slot < not_before:
+            slot += interval
+    return slot
+
+
+def phase_load_histogram(monitors: Iterable[Tuple[int, int]]) -> Dict[int, List[int]]:
+    """
+    Checks starting in each second of the interval, per interval group.
+
+    A flat histogram means the group's load is evenly spread.
+    """
+    histogram: Dict[int, List[int]] = {}
+    intervals = {}
+    monitors = list(monitors)
+    for monitor_id, interval in monitors:
+        intervals[monitor_id] = interval
+    for monitor_id, phase in assign_phases(monitors).items():
+        interval = intervals[monitor_id]
+        buckets = histogram.setdefault(interval, [0] * max(1, interval))
+        buckets[int(phase) % len(buckets)] += 1
+    return histogram
+
+
+@dataclass
+class _Entry:
+    interval: int
+    due_at: Optional[float]
+    version: int
+    last_checked_ts: Optional[float] = None
+    phase: Optional[float] = None
+    paused: bool = False
+    in_flight: bool = False
+
+
+class CheckScheduler:
+    """
+    Min-heap scheduler of monitor ids by next due time (epoch seconds).
+
+    Usage:
+        scheduler.schedule(monitor_id, interval, last_checked_ts)
+        due_ids = scheduler.pop_due()
+        ... run checks ...
+        scheduler.reschedule(monitor_id, checked_ts)
+    """
+
+    def __init__(self, spread_phases: bool = True, lag_samples: int = 5000):
+        self.spread_phases = spread_phases
+        self._heap: List[Tuple[float, int, int]] = []
+        self._entries: Dict[int, _Entry] = {}
+        self._versions = itertools.count()
+        self._lags: Deque[float] = deque(maxlen=lag_samples)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, monitor_id: int) -> bool:
+        return monitor_id in self._entries
+
+    def _compute_due(self, entry: _Entry, now: float) -> float:
+        """One interval after the last check, snapped to the phase grid if any."""
+        if entry.last_checked_ts is None:
+            return now  # First check runs immediately
+        due_at = entry.last_checked_ts + entry.interval
+        if entry.phase is None:
+            return due_at
+        # Never less than half an interval between two checks when re-phasing
+        return align_to_phase(
+            due_at, entry.interval, entry.phase,
+            not_before=entry.last_checked_ts + entry.interval / 2
+        )
+
+    def _push(self, monitor_id: int, entry: _Entry, due_at: float):
+        entry.version = next(self._versions)
+        entry.due_at = due_at
+        if entry.in_flight or entry.paused:
+            return  # re-pushed by reschedule()/resume()
+        heapq.heappush(self._heap, (due_at, entry.version, monitor_id))
+
+    def schedule(self, monitor_id: int, interval: int, last_checked_ts: Optional[float] = None, now: Optional[float] = None):
+        """Add (or re-add) a monitor, due one interval after its last check."""
+        now = time.time() if now is None else now
+        entry = _Entry(interval=interval, due_at=None, version=0, last_checked_ts=last_checked_ts)
+        self._entries[monitor_id] = entry
+        self._push(monitor_id, entry, self._compute_due(entry, now))
+
+    def reschedule(self, monitor_id: int, checked_ts: Optional[float] = None, retry_in: Optional[float] = None):
+        """
+        Put an in-flight monitor back on the heap after its check.
+
+        Due one interval after checked_ts, or retry_in seconds from now when
+        the check did not complete (e.g. cancelled at the cycle deadline).
+        A monitor paused while its check ran stays off the heap until resume().
+        """
+        entry = self._entries.get(monitor_id)
+        if entry is None:
+            return
+        entry.in_flight = False
+        if entry.paused:
+            if retry_in is None:
+                entry.last_checked_ts = checked_ts if checked_ts is not None else time.time()
+            return
+        now = time.time()
+        if retry_in is not None:
+            due_at = now + retry_in
+        else:
+            entry.last_checked_ts = checked_ts if checked_ts is not None else now
+            due_at = self._compute_due(entry, now)
+        self._push(monitor_id, entry, due_at)
+
+    def update_interval(self, monitor_id: int, interval: int):
+        """Change a monitor's interval, moving its pending due time accordingly."""
+        entry = self._entries.get(monitor_id)
+        if entry is None or entry.interval == interval:
+            return
+        entry.interval = interval
+        if entry.phase is not None:
+            entry.phase = monitor_phase(monitor_id, interval)
+        self._push(monitor_id, entry, self._compute_due(entry, time.time()))
+
+    def set_phase(self, monitor_id: int, phase: Optional[float]):
+        """Move a monitor onto a new phase offset, re-snapping its pending due time."""
+        entry = self._entries.get(monitor_id)
+        if entry is None or entry.phase == phase:
+            return
+        entry.phase = phase
+        if entry.last_checked_ts is not None:
+            self._push(monitor_id, entry, self._compute_due(entry, time.time()))
+
+    def rebalance_phases(self) -> int:
+        """Recompute phase offsets for all active monitors. Returns number moved."""
+        if not self.spread_phases:
+            return 0
+        phases = assign_phases(
+            (monitor_id, entry.interval)
+            for monitor_id, entry in self._entries.items()
+            if not entry.paused
+        )
+        moved = 0
+        for monitor_id, phase in phases.items():
+            if self._entries[monitor_id].phase != phase:
+                self.set_phase(monitor_id, phase)
+                moved += 1
+        return moved
+
+    def pause(self, monitor_id: int):
+        entry = self._entries.get(monitor_id)
+        if entry is not None and not entry.paused:
+            entry.paused = True
+            entry.version = next(self._versions)  # invalidates heap entry
+
+    def resume(self, monitor_id: int, last_checked_ts: Optional[float] = None, now: Optional[float] = None):
+        entry = self._entries.get(monitor_id)
+        if entry is None or not entry.paused:
+            return
+        now = time.time() if now is None else now
+        entry.paused = False
+        if last_checked_ts is not None:
+            entry.last_checked_ts = last_checked_ts
+        self._push(monitor_id, entry, max(now, self._compute_due(entry, now)))
+
+    def remove(self, monitor_id: int):
+        self._entries.pop(monitor_id, None)
+
+    def is_paused(self, monitor_id: int) -> bool:
+        entry = self._entries.get(monitor_id)
+        return entry is not None and entry.paused
+
+    def interval_of(self, monitor_id: int) -> Optional[int]:
+        entry = self._entries.get(monitor_id)
+        return entry.interval if entry else None
+
+    def _is_current(self, version: int, monitor_id: int) -> bool:
+        entry = self._entries.get(monitor_id)
+        return (
+            entry is not None
+            and not entry.paused
+            and not entry.in_flight
+            and entry.version == version
+        )
+
+    def next_due_at(self) -> Optional[float]:
+        """Due time of the next valid heap entry (drops stale entries on the way)."""
+        while self._heap:
+            due_at, version, monitor_id = self._heap[0]
+            if self._is_current(version, monitor_id):
+                return due_at
+            heapq.heappop(self._heap)
+        return None
+
+    def seconds_until_next(self, now: Optional[float] = None) -> Optional[float]:
+        next_due = self.next_due_at()
+        if next_due is None:
+            return None
+        now = time.time() if now is None else now
+        return max(0.0, next_due - now)
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[int]:
+        """Pop every monitor due at or before now; they stay in flight until rescheduled."""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and (limit is None or len(due) < limit):
+            due_at, version, monitor_id = self._heap[0]
+            if not self._is_current(version, monitor_id):
+                heapq.heappop(self._heap)
+                continue
+            if due_at > now:
+                break
+            heapq.heappop(self._heap)
+            self._entries[monitor_id].in_flight = True
+            self._lags.append(now - due_at)
+            due.append(monitor_id)
+        return due
+
+    def sync(self, rows: Iterable[Tuple[int, int, bool, Optional[float]]], now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Reconcile with the current monitor set without rebuilding the heap.
+
+        rows: (monitor_id, interval, is_active, last_checked_ts) tuples.
+        Only new, removed, paused/resumed and re-intervalled monitors are touched.
+        """
+        now = time.time() if now is None else now
+        changes = {"added": 0, "removed": 0, "paused": 0, "resumed": 0, "interval_changed": 0}
+        seen = set()
+
+        for monitor_id, interval, is_active, last_checked_ts in rows:
+            seen.add(monitor_id)
+            entry = self._entries.get(monitor_id)
+            if not is_active:
+                if entry is not None and not entry.paused:
+                    self.pause(monitor_id)
+                    changes["paused"] += 1
+                continue
+            if entry is None:
+                self.schedule(monitor_id, interval, last_checked_ts, now=now)
+                changes["added"] += 1
+                continue
+            if entry.interval != interval:
+                self.update_interval(monitor_id, interval)
+                changes["interval_changed"] += 1
+            if entry.paused:
+                self.resume(monitor_id, last_checked_ts, now=now)
+                changes["resumed"] += 1
+
+        for monitor_id in [m for m in self._entries if m not in seen]:
+            self.remove(monitor_id)
+            changes["removed"] += 1
+
+        if any(changes.values()):
+            changes["rephased"] = self.rebalance_phases()
+        return changes
+
+    def phase_load(self) -> Dict[str, float]:
+        """Peak vs mean checks per second across the scheduled phase offsets."""
+        histogram = phase_load_histogram(
+            (monitor_id, entry.interval)
+            for monitor_id, entry in self._entries.items()
+            if not entry.paused
+        )
+        if not histogram:
+            return {"peak_per_second": 0.0, "mean_per_second": 0.0}
+        # Each group fires len(buckets) / interval times a second; sum per second slot
+        longest = max(histogram)
+        per_second = [0.0] * longest
+        for interval, buckets in histogram.items():
+            for second in range(longest):
+                per_second[second] += buckets[second % interval]
+        return {
+            "peak_per_second": max(per_second),
+            "mean_per_second": round(sum(per_second) / longest, 2),
+        }
+
+    def lag_percentiles(self) -> Dict[str, float]:
+        """Scheduling lag percentiles in seconds over recent dispatches."""
+        if not self._lags:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "samples": 0}
+        ordered = sorted(self._lags)
+
+        def pct(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+        return {
+            "p50": pct(0.50),
+            "p95": pct(0.95),
+            "p99": pct(0.99),
+            "max": round(ordered[-1], 3),
+            "samples": len(ordered),
+        }
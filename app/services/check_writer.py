@@ -0,0 +1,193 @@
+"""
+Batched persistence of check results.
+
+Instead of two commits (and a refresh) per check, results are buffered and
+written together: one multi-row INSERT for the checks (SQLAlchemy's
+insertmanyvalues, which also returns the new ids) plus one executemany
+UPDATE of monitor last_status/last_checked_at, in a single transaction.
+
+- A flush happens once batch_size checks are buffered or flush_interval_ms
+  after the first buffered check, whichever comes first
+- Writes run on a dedicated thread (or on an AsyncSession when
+  async_session_factory is given), so the event loop keeps running checks
+  while the database works; one flush runs at a time
+- When max_pending checks are waiting (the database is falling behind),
+  submit() waits for the running flush instead of buffering more
+- submit() returns a future resolved once the check is committed, so
+  incident detection only runs on checks that are already visible
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models.monitor import Monitor
+from app.models.check import Check
+
+logger = logging.getLogger(__name__)
+
+
+class CheckResultWriter:
+    """
+    Buffer of checks flushed to the database in batches.
+
+    Usage:
+        writer = CheckResultWriter(SessionLocal, batch_size=200, flush_interval_ms=200)
+        durable = await writer.submit(check)
+        ...
+        await durable                                  # check is committed, check.id set
+        writer.apply_monitor_state(monitor, check)     # sync a loaded Monitor
+        await writer.aclose()                          # on shutdown
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[..., Session],
+        batch_size: int = 200,
+        flush_interval_ms: float = 200,
+        max_pending: int = 5000,
+        async_session_factory: Optional[Callable[..., AsyncSession]] = None
+    ):
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max(self.batch_size, max_pending)
+
+        self._buffer: List[Tuple[Check, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+        # Single thread: one flush at a time, and SQLite connections stay on their thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="check-writer")
+
+        self.rows_written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.backpressure_waits = 0
+        self.flush_time_total = 0.0
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def submit(self, check: Check) -> asyncio.Future:
+        """Buffer a check; the returned future resolves once it is committed."""
+        loop = asyncio.get_running_loop()
+        while len(self._buffer) >= self.max_pending:
+            # Database is behind: wait for it instead of growing the buffer
+            self.backpressure_waits += 1
+            await self.flush()
+
+        durable = loop.create_future()
+        self._buffer.append((check, durable))
+
+        if len(self._buffer) >= self.batch_size:
+            self._flush_soon()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, self._flush_soon)
+        return durable
+
+    def _flush_soon(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def flush(self):
+        """Write everything buffered so far."""
+        async with self._get_lock():
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+
+            started = time.monotonic()
+            checks = [check for check, _ in batch]
+            try:
+                if self.async_session_factory is not None:
+                    async with self.async_session_factory(expire_on_commit=False) as db:
+                        await db.run_sync(self._write_checks, checks)
+                else:
+                    await asyncio.get_running_loop().run_in_executor(self._executor, self._write, checks)
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Failed to write {len(batch)} checks: {e}", exc_info=True)
+                for _, durable in batch:
+                    if not durable.done():
+                        durable.set_exception(e)
+                return
+
+            self.flushes += 1
+            self.rows_written += len(batch)
+            self.flush_time_total += time.monotonic() - started
+            for check, durable in batch:
+                if not durable.done():
+                    durable.set_result(check)
+
+    def _write(self, checks: List[Check]):
+        """Write a batch on the writer thread."""
+        db = self.session_factory(expire_on_commit=False)
+        try:
+            self._write_checks(db, checks)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _write_checks(db: Session, checks: List[Check]):
+        """Insert checks and update monitor state in one transaction."""
+        try:
+            db.add_all(checks)
+            db.flush()
+
+            latest: Dict[int, Check] = {}
+            for check in checks:
+                current = latest.get(check.monitor_id)
+                if current is None or check.checked_at >= current.checked_at:
+                    latest[check.monitor_id] = check
+            db.execute(update(Monitor), [
+                {"id": monitor_id, "last_status": check.status, "last_checked_at": check.checked_at}
+                for monitor_id, check in latest.items()
+            ])
+
+            db.commit()
+            # Hand the checks back detached, with their loaded values (incl. ids)
+            db.expunge_all()
+        except Exception:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def apply_monitor_state(monitor: Monitor, check: Check):
+        """Reflect an already-written check on a Monitor loaded in another session."""
+        # Committed values: the caller's session must not write them again
+        set_committed_value(monitor, "last_status", check.status)
+        set_committed_value(monitor, "last_checked_at", check.checked_at)
+
+    async def aclose(self):
+        """Flush what is left and stop the writer thread."""
+        await self.flush()
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict:
+        return {
+            "buffered": len(self._buffer),
+            "rows_written": self.rows_written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "backpressure_waits": self.backpressure_waits,
+            "avg_batch": round(self.rows_written / self.flushes, 1) if self.flushes else 0.0,
+            "avg_flush_ms": round(self.flush_time_total / self.flushes * 1000, 2) if self.flushes else 0.0,
+        }
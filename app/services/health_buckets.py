@@ -0,0 +1,226 @@
+"""
+Incrementally maintained health score inputs for the check worker.
+
+calculate_health_score() counts a monitor's whole 30-day window on every
+check (43k rows for a 1-minute monitor). The worker instead keeps, per
+monitor, one bucket per UTC day with the counters the score needs:
+
+- checks, up checks, sum and count of up response times, new incidents
+- Updated in O(1) as checks are written and incidents opened; the score is
+  derived from the last `days` buckets (today included)
+- Seeded with one GROUP BY query per batch of monitors, and re-seeded by a
+  periodic reconciliation (reconcile()) that corrects drift from writes
+  the worker did not see (API checks, manual incidents, deletions)
+
+Counts are by calendar day, so the window is the last `days` UTC days
+rather than exactly days * 24h.
+"""
+import time
+from array import array
+from datetime import date, datetime
+from typing import Container, Dict, List, Optional
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+from app.models.check import Check
+from app.models.incident import Incident
+from app.services.intelligent_incident_service import health_score_from_stats
+
+
+def _as_date(value) -> date:
+    """func.date() gives a date on PostgreSQL and an ISO string on SQLite."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+class DailyHealthBuckets:
+    """Ring of per-day counters for one monitor, indexed by day ordinal."""
+
+    def __init__(self, days: int = 30):
+        self.days = max(1, days)
+        self._day = array("l", [0]) * self.days
+        self._total = array("l", [0]) * self.days
+        self._up = array("l", [0]) * self.days
+        self._rt_sum = array("d", [0.0]) * self.days
+        self._rt_count = array("l", [0]) * self.days
+        self._incidents = array("l", [0]) * self.days
+        # Rows already counted by the last seed; add_*() skips them
+        self.seeded_check_id = 0
+        self.seeded_incident_id = 0
+        self.seeded_at = 0.0  # monotonic
+
+    def _slot(self, day: int) -> Optional[int]:
+        """Index for day ordinal, recycling the slot of a day out of the window."""
+        i = day % self.days
+        if self._day[i] != day:
+            if self._day[i] > day:
+                return None  # older than the window
+            self._day[i] = day
+            self._total[i] = self._up[i] = self._rt_count[i] = self._incidents[i] = 0
+            self._rt_sum[i] = 0.0
+        return i
+
+    def add(self, day: int, total: int = 0, up: int = 0, rt_sum: float = 0.0,
+            rt_count: int = 0, incidents: int = 0):
+        i = self._slot(day)
+        if i is None:
+            return
+        self._total[i] += total
+        self._up[i] += up
+        self._rt_sum[i] += rt_sum
+        self._rt_count[i] += rt_count
+        self._incidents[i] += incidents
+
+    def add_check(self, check: Check):
+        if check.id is not None and check.id <= self.seeded_check_id:
+            return
+        has_rt = check.status == "up" and check.response_time is not None
+        self.add(
+            check.checked_at.toordinal(),
+            total=1,
+            up=1 if check.status == "up" else 0,
+            rt_sum=check.response_time if has_rt else 0.0,
+            rt_count=1 if has_rt else 0
+        )
+
+    def add_incident(self, incident: Incident):
+        if incident.id is not None and incident.id <= self.seeded_incident_id:
+            return
+        self.add((incident.started_at or datetime.utcnow()).toordinal(), incidents=1)
+
+    def totals(self, today: Optional[int] = None) -> Dict:
+        today = today or datetime.utcnow().toordinal()
+        first = today - self.days + 1
+        totals = {"total": 0, "up": 0, "rt_sum": 0.0, "rt_count": 0, "incidents": 0}
+        for i in range(self.days):
+            if first <= self._day[i] <= today:
+                totals["total"] += self._total[i]
+                totals["up"] += self._up[i]
+                totals["rt_sum"] += self._rt_sum[i]
+                totals["rt_count"] += self._rt_count[i]
+                totals["incidents"] += self._incidents[i]
+        return totals
+
+    def score(self, today: Optional[int] = None) -> Dict:
+        t = self.totals(today)
+        avg_response = t["rt_sum"] / t["rt_count"] if t["rt_count"] else None
+        return health_score_from_stats(t["total"], t["up"], t["incidents"], avg_response, self.days)
+
+
+class HealthScoreTracker:
+    """
+    DailyHealthBuckets per monitor with batched seeding and reconciliation.
+
+    Usage:
+        tracker = HealthScoreTracker(days=30, reconcile_seconds=6 * 3600)
+        buckets = tracker.get(db, monitor.id)     # seeded on first use
+        buckets.add_check(check)
+        monitor.health_score = buckets.score()["score"]
+        tracker.reconcile(db)                     # periodically
+    """
+
+    def __init__(self, days: int = 30, reconcile_seconds: float = 6 * 3600, reconcile_batch: int = 500):
+        self.days = max(1, days)
+        self.reconcile_seconds = reconcile_seconds
+        self.reconcile_batch = max(1, reconcile_batch)
+        self._buckets: Dict[int, DailyHealthBuckets] = {}
+        self.seeds = 0
+        self.reconciled = 0
+        self.drifted = 0
+
+    def __contains__(self, monitor_id: int) -> bool:
+        return monitor_id in self._buckets
+
+    def get(self, db: Session, monitor_id: int) -> DailyHealthBuckets:
+        buckets = self._buckets.get(monitor_id)
+        if buckets is None:
+            buckets = self.seed(db, [monitor_id])[monitor_id]
+        return buckets
+
+    def seed(self, db: Session, monitor_ids: List[int]) -> Dict[int, DailyHealthBuckets]:
+        """(Re)build the buckets of monitor_ids from the database with grouped queries."""
+        today = datetime.utcnow().toordinal()
+        since = datetime.combine(date.fromordinal(today - self.days + 1), datetime.min.time())
+        fresh = {monitor_id: DailyHealthBuckets(self.days) for monitor_id in monitor_ids}
+
+        # Rows up to these ids are counted here, later ones by add_*() (no double count)
+        max_check_id = db.query(func.max(Check.id)).scalar() or 0
+        max_incident_id = db.query(func.max(Incident.id)).scalar() or 0
+
+        is_up = Check.status == "up"
+        has_rt = and_(is_up, Check.response_time.isnot(None))
+        check_rows = db.query(
+            Check.monitor_id,
+            func.date(Check.checked_at),
+            func.count(Check.id),
+            func.sum(case((is_up, 1), else_=0)),
+            func.sum(case((has_rt, Check.response_time), else_=0)),
+            func.sum(case((has_rt, 1), else_=0))
+        ).filter(
+            Check.monitor_id.in_(monitor_ids),
+            Check.checked_at >= since,
+            Check.id <= max_check_id
+        ).group_by(Check.monitor_id, func.date(Check.checked_at)).all()
+        for monitor_id, day, total, up, rt_sum, rt_count in check_rows:
+            fresh[monitor_id].add(
+                _as_date(day).toordinal(), total=total, up=up or 0,
+                rt_sum=float(rt_sum or 0), rt_count=rt_count or 0
+            )
+
+        incident_rows = db.query(
+            Incident.monitor_id, func.date(Incident.started_at), func.count(Incident.id)
+        ).filter(
+            Incident.monitor_id.in_(monitor_ids),
+            Incident.started_at >= since,
+            Incident.id <= max_incident_id
+        ).group_by(Incident.monitor_id, func.date(Incident.started_at)).all()
+        for monitor_id, day, count in incident_rows:
+            fresh[monitor_id].add(_as_date(day).toordinal(), incidents=count)
+
+        now = time.monotonic()
+        for monitor_id, buckets in fresh.items():
+            buckets.seeded_check_id = max_check_id
+            buckets.seeded_incident_id = max_incident_id
+            buckets.seeded_at = now
+            self._buckets[monitor_id] = buckets
+        self.seeds += len(fresh)
+        return fresh
+
+    def reconcile(self, db: Session, now: Optional[float] = None) -> Dict[str, int]:
+        """Re-seed the monitors seeded longest ago (at most reconcile_batch per call)."""
+        now = time.monotonic() if now is None else now
+        stale = sorted(
+            (buckets.seeded_at, monitor_id) for monitor_id, buckets in self._buckets.items()
+            if now - buckets.seeded_at >= self.reconcile_seconds
+        )[:self.reconcile_batch]
+        monitor_ids = [monitor_id for _, monitor_id in stale]
+        if not monitor_ids:
+            return {"reconciled": 0, "drifted": 0}
+
+        before = {monitor_id: self._buckets[monitor_id].totals() for monitor_id in monitor_ids}
+        fresh = self.seed(db, monitor_ids)
+        drifted = sum(
+            1 for monitor_id, buckets in fresh.items()
+            if buckets.totals() != before[monitor_id]
+        )
+        self.reconciled += len(monitor_ids)
+        self.drifted += drifted
+        return {"reconciled": len(monitor_ids), "drifted": drifted}
+
+    def discard(self, monitor_id: int):
+        self._buckets.pop(monitor_id, None)
+
+    def retain(self, monitor_ids: Container[int]):
+        """Drop buckets of monitors not in monitor_ids (e.g. the scheduler)."""
+        for monitor_id in [m for m in self._buckets if m not in monitor_ids]:
+            del self._buckets[monitor_id]
+
+    def stats(self) -> Dict:
+        return {
+            "monitors": len(self._buckets),
+            "seeds": self.seeds,
+            "reconciled": self.reconciled,
+            "drifted": self.drifted,
+        }
@@ -0,0 +1,129 @@
+"""
+Shared HTTP client registry for monitor checks.
+
+One long-lived httpx.AsyncClient per (timeout, redirect policy), so
+connection pools, keep-alive connections and the loaded SSL context survive
+between checks and cycles instead of being rebuilt for every request.
+Connections are pooled per origin by httpcore, so repeated checks of the
+same host reuse the same keep-alive connection.
+
+Clients connect through PinnedIPTransport, so every connection goes to the
+IP that passed SSRF validation for its hostname.
+
+Clients are bound to the event loop that created them; if the registry is
+used from a different loop the stale clients are dropped and rebuilt.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import httpx
+from app.core.pinned_transport import PinnedIPTransport
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _ClientEntry:
+    client: httpx.AsyncClient
+    last_used: float
+    requests: int = 0
+
+
+class HTTPClientRegistry:
+    """
+    Registry of pooled AsyncClients keyed by timeout/redirect policy.
+
+    Usage:
+        registry = HTTPClientRegistry(headers=CHECK_HEADERS)
+        client = registry.get_client(timeout=30)
+        response = await client.get(url)
+        ...
+        await registry.evict_idle()   # periodically
+        await registry.aclose()       # on shutdown
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 50,
+        keepalive_expiry: float = 120,
+        idle_timeout: float = 600
+    ):
+        self.headers = headers or {}
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.idle_timeout = idle_timeout
+        self._clients: Dict[Tuple, _ClientEntry] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.created = 0
+        self.evicted = 0
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._clients:
+                # Connections belong to the previous loop and cannot be reused
+                logger.info(f"Event loop changed, dropping {len(self._clients)} pooled HTTP clients")
+                self._clients = {}
+            self._loop = loop
+
+    def get_client(
+        self,
+        timeout: float,
+        follow_redirects: bool = True,
+        max_redirects: int = 5
+    ) -> httpx.AsyncClient:
+        """Return the shared client for this timeout/redirect policy, creating it if needed."""
+        self._bind_loop()
+
+        key = (float(timeout), follow_redirects, max_redirects)
+        entry = self._clients.get(key)
+        if entry is None or entry.client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=timeout,
+                follow_redirects=follow_redirects,
+                max_redirects=max_redirects,
+                headers=self.headers,
+                transport=PinnedIPTransport(limits=self.limits)
+            )
+            entry = _ClientEntry(client=client, last_used=time.monotonic())
+            self._clients[key] = entry
+            self.created += 1
+
+        entry.last_used = time.monotonic()
+        entry.requests += 1
+        return entry.client
+
+    async def evict_idle(self) -> int:
+        """Close clients that have not been used within idle_timeout. Returns count closed."""
+        now = time.monotonic()
+        idle_keys = [
+            key for key, entry in self._clients.items()
+            if now - entry.last_used > self.idle_timeout
+        ]
+        for key in idle_keys:
+            entry = self._clients.pop(key)
+            await entry.client.aclose()
+        self.evicted += len(idle_keys)
+        return len(idle_keys)
+
+    async def aclose(self):
+        """Close every pooled client."""
+        clients = list(self._clients.values())
+        self._clients = {}
+        for entry in clients:
+            await entry.client.aclose()
+
+    def stats(self) -> Dict:
+        return {
+            "clients": len(self._clients),
+            "created": self.created,
+            "evicted": self.evicted,
+            "requests": sum(entry.requests for entry in self._clients.values()),
+        }
@@ -6,6 +6,7 @@ from app.models.monitor import Monitor
 from app.models.check import Check
 from app.models.incident import Incident, IncidentStatus
 from app.models.incident_role import IncidentRole, RoleType
+from app.services.check_history import MonitorHistory
 
 
 def _build_cause(check: Check) -> str:
@@ -29,15 +30,23 @@ def _build_cause(check: Check) -> str:
     return "Unknown Cause"
 
 
-def _count_consecutive_failures(db: Session, monitor_id: int, current_check: Check) -> int:
+def _count_consecutive_failures(
+    db: Session,
+    monitor_id: int,
+    current_check: Check,
+    history: Optional[MonitorHistory] = None
+) -> int:
     """Count consecutive DOWN checks including the current one."""
     count = 1  # Include current check
 
     # Get recent checks in descending order (most recent first)
-    recent_checks = db.query(Check).filter(
-        Check.monitor_id == monitor_id,
-        Check.id < current_check.id
-    ).order_by(Check.id.desc()).limit(20).all()
+    if history is not None:
+        recent_checks = history.recent(before_id=current_check.id, limit=20)
+    else:
+        recent_checks = db.query(Check).filter(
+            Check.monitor_id == monitor_id,
+            Check.id < current_check.id
+        ).order_by(Check.id.desc()).limit(20).all()
 
     for check in recent_checks:
         if check.status == "down":
@@ -48,18 +57,27 @@ def _count_consecutive_failures(db: Session, monitor_id: int, current_check: Che
     return count
 
 
-def detect_and_create_incident(db: Session, monitor: Monitor, current_check: Check):
+def detect_and_create_incident(
+    db: Session,
+    monitor: Monitor,
+    current_check: Check,
+    history: Optional[MonitorHistory] = None
+):
     """
     Detect status transitions and create/resolve incidents accordingly.
 
     Returns an Incident object only on state transitions (UP→DOWN or DOWN→UP).
     Implements deduplication to prevent multiple DOWN incidents.
+    Previous checks come from history when given (worker), else the database.
     """
     # Get the previous check
-    previous_checks = db.query(Check).filter(
-        Check.monitor_id == monitor.id,
-        Check.id < current_check.id
-    ).order_by(Check.id.desc()).limit(1).all()
+    if history is not None:
+        previous_checks = history.recent(before_id=current_check.id, limit=1)
+    else:
+        previous_checks = db.query(Check).filter(
+            Check.monitor_id == monitor.id,
+            Check.id < current_check.id
+        ).order_by(Check.id.desc()).limit(1).all()
 
     if not previous_checks:
         # First check ever - only create incident if it's DOWN
@@ -123,7 +141,7 @@ def detect_and_create_incident(db: Session, monitor: Monitor, current_check: Che
         ).first()
 
         if open_incident:
-            open_incident.failed_checks_count = _count_consecutive_failures(db, monitor.id, current_check)
+            open_incident.failed_checks_count = _count_consecutive_failures(db, monitor.id, current_check, history)
             db.commit()
 
         return None  # No notification on continuous DOWN state
@@ -4,20 +4,88 @@ Intelligent incident analysis service - "Why it went down"
 Provides advanced incident detection and analysis:
 - Smart cause detection (SSL, DNS, timeout, server overload, etc.)
 - Flapping detection (rapid UP/DOWN)
-- Progressive degradation detection (slowdown before crash)
+- Progressive degradation detection (slowdown before crash), from a
+  streaming per-monitor baseline (see latency_baseline)
 - Health score calculation (0-100)
 - Predictive patterns
+
+Detectors take an optional MonitorHistory (see check_history): the worker
+passes its in-memory recent checks instead of having each one query the
+checks table; without it (API) they query the database as before.
 """
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple, List
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
+from sqlalchemy import and_, case, func, desc
 from app.models.monitor import Monitor
 from app.models.check import Check
 from app.models.incident import Incident
+from app.services.check_history import MonitorHistory
+from app.services.latency_baseline import LatencyBaseline
+
+
+# Timeout cause by the phase that consumed the time (see Check.timings)
+TIMEOUT_PHASE_CAUSES = {
+    "resolve": (
+        "DNS Timeout - Resolver too slow to answer",
+        ["Check nameserver health and response times", "Consider a faster DNS provider"]
+    ),
+    "connect": (
+        "Connection Timeout - Server not reachable (TCP connect never completed)",
+        ["Check firewall / security group rules", "Verify the server and network are up"]
+    ),
+    "tls": (
+        "TLS Handshake Timeout - Server accepted the connection but TLS stalled",
+        ["Check TLS termination (load balancer, proxy)", "Verify certificate chain and cipher configuration"]
+    ),
+    "wait": (
+        "Request Timeout - Server accepted the request but never answered (TTFB)",
+        ["Application is too slow to produce a response", "Check backend workers, database and CPU"]
+    ),
+    "download": (
+        "Request Timeout - Response body too slow to download",
+        ["Check bandwidth and response size", "Look for slow streaming endpoints"]
+    ),
+}
+
+
+def slowest_phase(timings: Optional[Dict]) -> Optional[Tuple[str, float]]:
+    """(phase, ms) of the network phase that took longest in a check's timings."""
+    if not timings:
+        return None
+    phases = [(phase, timings[phase]) for phase in TIMEOUT_PHASE_CAUSES if timings.get(phase)]
+    if not phases:
+        return None
+    return max(phases, key=lambda item: item[1])
+
+
+def _average_phases(checks: List[Check]) -> Dict[str, float]:
+    totals, counts = {}, {}
+    for check in checks:
+        for phase, ms in (check.timings or {}).items():
+            if phase in TIMEOUT_PHASE_CAUSES:
+                totals[phase] = totals.get(phase, 0.0) + ms
+                counts[phase] = counts.get(phase, 0) + 1
+    return {phase: totals[phase] / counts[phase] for phase in totals}
+
+
+def most_degraded_phase(baseline_checks: List[Check], recent_checks: List[Check]) -> Optional[Tuple[str, float]]:
+    """(phase, added ms) whose average grew the most from baseline to recent checks."""
+    baseline = _average_phases(baseline_checks)
+    recent = _average_phases(recent_checks)
+    growth = [(phase, recent[phase] - baseline.get(phase, 0.0)) for phase in recent]
+    growth = [item for item in growth if item[1] > 0]
+    if not growth:
+        return None
+    return max(growth, key=lambda item: item[1])
 
 
-def analyze_why_it_went_down(db: Session, monitor: Monitor, current_check: Check) -> Dict:
+def analyze_why_it_went_down(
+    db: Session,
+    monitor: Monitor,
+    current_check: Check,
+    history: Optional[MonitorHistory] = None
+) -> Dict:
     """
     Advanced analysis to determine WHY a site went down.
 
@@ -36,6 +104,10 @@ def analyze_why_it_went_down(db: Session, monitor: Monitor, current_check: Check
         "recommendations": []
     }
 
+    # Phase breakdown tells a slow origin from a slow resolver or our own overhead
+    if current_check.timings:
+        result["details"]["timings"] = current_check.timings
+
     # 1. SSL Certificate expired
     if current_check.ssl_expires_at:
         if current_check.ssl_expires_at < datetime.utcnow():
@@ -66,11 +138,14 @@ def analyze_why_it_went_down(db: Session, monitor: Monitor, current_check: Check
     # 3. Timeout - check for progressive slowdown
     if current_check.error_message and "timeout" in current_check.error_message.lower():
         # Get recent checks to see if there was a slowdown pattern
-        recent_checks = db.query(Check).filter(
-            Check.monitor_id == monitor.id,
-            Check.id < current_check.id,
-            Check.status == "up"
-        ).order_by(Check.id.desc()).limit(10).all()
+        if history is not None:
+            recent_checks = history.recent(before_id=current_check.id, status="up", limit=10)
+        else:
+            recent_checks = db.query(Check).filter(
+                Check.monitor_id == monitor.id,
+                Check.id < current_check.id,
+                Check.status == "up"
+            ).order_by(Check.id.desc()).limit(10).all()
 
         if recent_checks and len(recent_checks) >= 3:
             avg_response_time = sum(c.response_time for c in recent_checks[:5] if c.response_time) / 5
@@ -84,6 +159,18 @@ def analyze_why_it_went_down(db: Session, monitor: Monitor, current_check: Check
                 result["recommendations"].append("Review recent traffic spike")
                 return result
 
+        slowest = slowest_phase(current_check.timings)
+        if slowest:
+            phase, phase_ms = slowest
+            cause, recommendations = TIMEOUT_PHASE_CAUSES[phase]
+            result["cause"] = cause
+            result["severity"] = "critical"
+            result["details"]["timeout"] = True
+            result["details"]["timeout_phase"] = phase
+            result["details"]["timeout_phase_ms"] = int(phase_ms)
+            result["recommendations"].extend(recommendations)
+            return result
+
         result["cause"] = "Request Timeout - Server too slow to respond"
         result["severity"] = "critical"
         result["details"]["timeout"] = True
@@ -147,7 +234,12 @@ def analyze_why_it_went_down(db: Session, monitor: Monitor, current_check: Check
     return result
 
 
-def detect_flapping(db: Session, monitor: Monitor, lookback_minutes: int = 30) -> Optional[Dict]:
+def detect_flapping(
+    db: Session,
+    monitor: Monitor,
+    lookback_minutes: int = 30,
+    history: Optional[MonitorHistory] = None
+) -> Optional[Dict]:
     """
     Detect if a site is "flapping" (going UP/DOWN rapidly).
 
@@ -156,10 +248,13 @@ def detect_flapping(db: Session, monitor: Monitor, lookback_minutes: int = 30) -
     since = datetime.utcnow() - timedelta(minutes=lookback_minutes)
 
     # Get recent checks
-    recent_checks = db.query(Check).filter(
-        Check.monitor_id == monitor.id,
-        Check.checked_at >= since
-    ).order_by(Check.checked_at.asc()).all()
+    if history is not None:
+        recent_checks = history.recent(since=since)[::-1]
+    else:
+        recent_checks = db.query(Check).filter(
+            Check.monitor_id == monitor.id,
+            Check.checked_at >= since
+        ).order_by(Check.checked_at.asc()).all()
 
     if len(recent_checks) < 6:
         return None
@@ -183,7 +278,12 @@ def detect_flapping(db: Session, monitor: Monitor, lookback_minutes: int = 30) -
     return None
 
 
-def detect_progressive_degradation(db: Session, monitor: Monitor, current_check: Check) -> Optional[Dict]:
+def detect_progressive_degradation(
+    db: Session,
+    monitor: Monitor,
+    current_check: Check,
+    history: Optional[MonitorHistory] = None
+) -> Optional[Dict]:
     """
     Detect if site is slowing down (may crash soon).
 
@@ -193,12 +293,17 @@ def detect_progressive_degradation(db: Session, monitor: Monitor, current_check:
         return None
 
     # Get baseline (last 50 successful checks)
-    baseline_checks = db.query(Check).filter(
-        Check.monitor_id == monitor.id,
-        Check.status == "up",
-        Check.response_time.isnot(None),
-        Check.id < current_check.id
-    ).order_by(Check.id.desc()).limit(50).all()
+    if history is not None:
+        baseline_checks = history.recent(
+            before_id=current_check.id, status="up", with_response_time=True, limit=50
+        )
+    else:
+        baseline_checks = db.query(Check).filter(
+            Check.monitor_id == monitor.id,
+            Check.status == "up",
+            Check.response_time.isnot(None),
+            Check.id < current_check.id
+        ).order_by(Check.id.desc()).limit(50).all()
 
     if len(baseline_checks) < 10:
         return None
@@ -213,7 +318,7 @@ def detect_progressive_degradation(db: Session, monitor: Monitor, current_check:
     # If recent avg is 2x+ higher than baseline
     if recent_avg > baseline_avg * 2 and recent_avg > 2000:  # > 2s
         increase_pct = int(((recent_avg - baseline_avg) / baseline_avg) * 100)
-        return {
+        degradation = {
             "degrading": True,
             "baseline_ms": int(baseline_avg),
             "current_ms": int(recent_avg),
@@ -221,27 +326,60 @@ def detect_progressive_degradation(db: Session, monitor: Monitor, current_check:
             "severity": "warning",
             "message": f"Site still UP but response time increased +{increase_pct}% (crash probable soon)"
         }
+        degraded = most_degraded_phase(baseline_checks, recent_checks)
+        if degraded:
+            degradation["degraded_phase"] = degraded[0]
+            degradation["message"] += f" - mostly in {degraded[0]} (+{int(degraded[1])}ms)"
+        return degradation
 
     return None
 
 
-def calculate_health_score(db: Session, monitor: Monitor, days: int = 30) -> Dict:
+def detect_latency_degradation(
+    monitor: Monitor,
+    current_check: Check,
+    history: Optional[MonitorHistory] = None
+) -> Optional[Dict]:
     """
-    Calculate health score 0-100 for a monitor.
+    Streaming degradation detector: updates monitor.latency_baseline with the
+    check in O(1) and flags a sustained slowdown relative to that baseline.
 
-    Factors:
-    - Uptime percentage (60%)
-    - Incident frequency (20%)
-    - Response time stability (20%)
+    Returns degradation info if detected. The caller commits the monitor.
     """
-    since = datetime.utcnow() - timedelta(days=days)
+    if current_check.status != "up" or current_check.response_time is None:
+        return None
 
-    # 1. Uptime percentage (60 points)
-    total_checks = db.query(func.count(Check.id)).filter(
-        Check.monitor_id == monitor.id,
-        Check.checked_at >= since
-    ).scalar() or 0
+    baseline = LatencyBaseline.from_state(monitor.latency_baseline)
+    degradation = baseline.update(
+        current_check.response_time, current_check.checked_at, monitor.interval or 600
+    )
+    monitor.latency_baseline = baseline.to_state()
+
+    if degradation and history is not None:
+        recent_checks = history.recent(status="up", with_response_time=True, limit=5)
+        baseline_checks = history.recent(
+            before_id=recent_checks[-1].id if recent_checks else None,
+            status="up", with_response_time=True, limit=50
+        )
+        degraded = most_degraded_phase(baseline_checks, recent_checks)
+        if degraded:
+            degradation["degraded_phase"] = degraded[0]
+            degradation["message"] += f" - mostly in {degraded[0]} (+{int(degraded[1])}ms)"
+    return degradation
+
+
+def health_score_from_stats(
+    total_checks: int,
+    up_checks: int,
+    incidents_count: int,
+    avg_response: Optional[float],
+    days: int = 30
+) -> Dict:
+    """
+    Health score 0-100 from window totals (shared by the query and bucket paths).
 
+    avg_response is the mean response time of up checks, None if there are none.
+    """
     if total_checks == 0:
         return {
             "score": 100,
@@ -251,21 +389,11 @@ def calculate_health_score(db: Session, monitor: Monitor, days: int = 30) -> Dic
             "grade": "A+"
         }
 
-    up_checks = db.query(func.count(Check.id)).filter(
-        Check.monitor_id == monitor.id,
-        Check.status == "up",
-        Check.checked_at >= since
-    ).scalar() or 0
-
+    # 1. Uptime percentage (60 points)
     uptime_pct = (up_checks / total_checks) * 100
     uptime_score = (uptime_pct / 100) * 60
 
     # 2. Incident frequency (20 points)
-    incidents_count = db.query(func.count(Incident.id)).filter(
-        Incident.monitor_id == monitor.id,
-        Incident.started_at >= since
-    ).scalar() or 0
-
     # Penalize based on incident count
     if incidents_count == 0:
         incident_score = 20
@@ -277,15 +405,7 @@ def calculate_health_score(db: Session, monitor: Monitor, days: int = 30) -> Dic
         incident_score = max(0, 20 - incidents_count)
 
     # 3. Response time stability (20 points)
-    recent_checks = db.query(Check).filter(
-        Check.monitor_id == monitor.id,
-        Check.status == "up",
-        Check.response_time.isnot(None),
-        Check.checked_at >= since
-    ).limit(100).all()
-
-    if recent_checks:
-        avg_response = sum(c.response_time for c in recent_checks) / len(recent_checks)
+    if avg_response is not None:
         # Fast sites (< 500ms) get full 20 points
         # Slow sites (> 5s) get 0 points
         if avg_response < 500:
@@ -314,18 +434,70 @@ def calculate_health_score(db: Session, monitor: Monitor, days: int = 30) -> Dic
     else:
         grade = "D"
 
-    avg_response_time = int(sum(c.response_time for c in recent_checks) / len(recent_checks)) if recent_checks else 0
-
     return {
         "score": total_score,
         "grade": grade,
         "uptime_pct": round(uptime_pct, 2),
         "incidents_count": incidents_count,
-        "avg_response_time": avg_response_time,
+        "avg_response_time": int(avg_response) if avg_response is not None else 0,
         "days_analyzed": days
     }
 
 
+def calculate_health_score(
+    db: Session,
+    monitor: Monitor,
+    days: int = 30,
+    history: Optional[MonitorHistory] = None
+) -> Dict:
+    """
+    Calculate health score 0-100 for a monitor.
+
+    Factors:
+    - Uptime percentage (60%)
+    - Incident frequency (20%)
+    - Response time stability (20%)
+
+    The worker keeps these totals incrementally instead (see health_buckets).
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+
+    total_checks, up_checks = db.query(
+        func.count(Check.id),
+        func.sum(case((Check.status == "up", 1), else_=0))
+    ).filter(
+        Check.monitor_id == monitor.id,
+        Check.checked_at >= since
+    ).one()
+    if not total_checks:
+        return health_score_from_stats(0, 0, 0, None, days)
+
+    incidents_count = db.query(func.count(Incident.id)).filter(
+        Incident.monitor_id == monitor.id,
+        Incident.started_at >= since
+    ).scalar() or 0
+
+    if history is not None:
+        recent_checks = history.recent(status="up", with_response_time=True, since=since, limit=100)
+    else:
+        recent_checks = db.query(Check).filter(
+            Check.monitor_id == monitor.id,
+            Check.status == "up",
+            Check.response_time.isnot(None),
+            Check.checked_at >= since
+        ).limit(100).all()
+    avg_response = (
+        sum(c.response_time for c in recent_checks) / len(recent_checks)
+        if recent_checks else None
+    )
+
+    return health_score_from_stats(total_checks, up_checks or 0, incidents_count, avg_response, days)
+
+
+# EXTRACT(dow) numbering, on both PostgreSQL and SQLite
+WEEKDAY_NAMES = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+
+
 def detect_patterns(db: Session, monitor: Monitor) -> Dict:
     """
     Detect patterns in incidents (for "Site DNA").
@@ -334,13 +506,28 @@ def detect_patterns(db: Session, monitor: Monitor) -> Dict:
         - High-risk hours
         - Day of week patterns
         - Stability trend
+
+    Counted in the database (one GROUP BY hour/weekday query), so the cost
+    does not depend on how many incidents the monitor has.
     """
-    # Get all incidents
-    incidents = db.query(Incident).filter(
-        Incident.monitor_id == monitor.id
-    ).all()
+    now = datetime.utcnow()
+    recent_since = now - timedelta(days=30)
+    previous_since = now - timedelta(days=60)
+
+    hour = func.extract("hour", Incident.started_at)
+    dow = func.extract("dow", Incident.started_at)
+    rows = db.query(
+        hour,
+        dow,
+        func.count(Incident.id),
+        func.sum(case((Incident.started_at >= recent_since, 1), else_=0)),
+        func.sum(case((and_(Incident.started_at >= previous_since, Incident.started_at < recent_since), 1), else_=0))
+    ).filter(
+        Incident.monitor_id == monitor.id,
+        Incident.started_at.isnot(None)
+    ).group_by(hour, dow).all()
 
-    if not incidents:
+    if not rows:
         return {
             "high_risk_hours": [],
             "high_risk_days": [],
@@ -351,32 +538,30 @@ def detect_patterns(db: Session, monitor: Monitor) -> Dict:
     # Analyze hours
     hour_incidents = {}
     day_incidents = {}
+    total_incidents = recent_count = previous_count = 0
 
-    for incident in incidents:
-        hour = incident.started_at.hour
-        day = incident.started_at.strftime("%A")
-
-        hour_incidents[hour] = hour_incidents.get(hour, 0) + 1
-        day_incidents[day] = day_incidents.get(day, 0) + 1
+    for h, d, count, recent, previous in rows:
+        h, day = int(h), WEEKDAY_NAMES[int(d)]
+        hour_incidents[h] = hour_incidents.get(h, 0) + count
+        day_incidents[day] = day_incidents.get(day, 0) + count
+        total_incidents += count
+        recent_count += recent or 0
+        previous_count += previous or 0
 
     # Find high-risk hours (top 3)
-    sorted_hours = sorted(hour_incidents.items(), key=lambda x: x[1], reverse=True)
-    high_risk_hours = [f"{h:02d}:00-{h:02d}:59" for h, _ in sorted_hours[:3]] if sorted_hours else []
+    sorted_hours = sorted(hour_incidents.items(), key=lambda x: (-x[1], x[0]))
+    high_risk_hours = [f"{h:02d}:00-{h:02d}:59" for h, _ in sorted_hours[:3]]
 
     # Find high-risk days
-    sorted_days = sorted(day_incidents.items(), key=lambda x: x[1], reverse=True)
-    high_risk_days = [day for day, _ in sorted_days[:2]] if sorted_days else []
+    sorted_days = sorted(day_incidents.items(), key=lambda x: (-x[1], WEEKDAY_NAMES.index(x[0])))
+    high_risk_days = [day for day, _ in sorted_days[:2]]
 
     # Stability trend (recent 30 days vs previous 30 days)
-    now = datetime.utcnow()
-    recent_incidents = [i for i in incidents if i.started_at >= now - timedelta(days=30)]
-    previous_incidents = [i for i in incidents if now - timedelta(days=60) <= i.started_at < now - timedelta(days=30)]
-
-    if len(previous_incidents) == 0:
+    if previous_count == 0:
         stability_trend = "stable"
-    elif len(recent_incidents) > len(previous_incidents):
+    elif recent_count > previous_count:
         stability_trend = "degrading"
-    elif len(recent_incidents) < len(previous_incidents):
+    elif recent_count < previous_count:
         stability_trend = "improving"
     else:
         stability_trend = "stable"
@@ -384,7 +569,7 @@ def detect_patterns(db: Session, monitor: Monitor) -> Dict:
     return {
         "high_risk_hours": high_risk_hours,
         "high_risk_days": high_risk_days,
-        "total_incidents": len(incidents),
+        "total_incidents": total_incidents,
         "stability_trend": stability_trend
     }
 
@@ -0,0 +1,150 @@
+"""
+Streaming response-time baseline per monitor (constant time and memory).
+
+detect_progressive_degradation() re-reads 50 checks and compares averages
+against fixed thresholds (2x and > 2s), which misses a 150ms API becoming
+a 900ms API and over-alerts on sites that are slow at the same hour every
+day. LatencyBaseline instead keeps a small Holt-Winters style state:
+
+- Works on log(1 + response time), so changes are relative to the
+  monitor's own latency (a 2x slowdown looks the same at 100ms and 3s)
+- level: EWMA of the deseasonalized log latency
+- season: 24 hour-of-day (UTC) additive offsets, so a nightly backup window
+  becomes part of the baseline instead of an alert
+- var: EWMV of the one-step prediction error, for a per-monitor z-score
+- resid: fast EWMA of the prediction error; degradation is a sustained
+  shift (a few slow checks in a row), not a single slow response
+
+Updates are robust to outliers, so a slowdown keeps being flagged for
+hours instead of becoming the new normal within a few checks: the level
+sees the prediction error clipped to one standard deviation (a lasting
+change is still absorbed over time) and the variance ignores points beyond
+Z_THRESHOLD. Hour offsets see a wider clip: a pattern that repeats every
+day stops alerting after a few days, while a slowdown spanning several
+hours lands in offsets that have not learned it. Smoothing rates are per
+unit of time, so a 1-minute and a 10-minute monitor adapt equally fast.
+Only successful checks with a response time feed the state.
+
+The state is a small dict (about 30 numbers) stored in
+Monitor.latency_baseline, so it survives worker restarts and shard moves.
+"""
+import math
+from datetime import datetime
+from typing import Dict, List, Optional
+
+STATE_VERSION = 1
+
+LEVEL_WINDOW_SECONDS = 3 * 3600  # level and variance smoothing
+SEASON_WINDOW_SECONDS = 3600  # hour-of-day offset smoothing (per day of that hour)
+BETA = 0.3  # fast residual (~3 checks)
+SEASON_CLIP = 5.0  # hour offsets see the error clipped to this many std
+
+WARMUP_CHECKS = 30  # no verdict before this many samples
+Z_THRESHOLD = 3.0  # sustained shift, in baseline standard deviations
+MIN_STD = 0.05  # log scale (~5%): floor for very stable monitors
+MIN_INCREASE_MS = 200  # ignore shifts smaller than this in absolute terms
+
+
+class LatencyBaseline:
+    """
+    Holt-Winters style baseline of one monitor's response time.
+
+    Usage:
+        baseline = LatencyBaseline.from_state(monitor.latency_baseline)
+        degradation = baseline.update(check.response_time, check.checked_at, monitor.interval)
+        monitor.latency_baseline = baseline.to_state()
+    """
+
+    def __init__(self):
+        self.level = 0.0
+        self.var = MIN_STD ** 2
+        self.season: List[float] = [0.0] * 24
+        self.resid = 0.0
+        self.count = 0
+
+    @classmethod
+    def from_state(cls, state: Optional[Dict]) -> "LatencyBaseline":
+        """Restore a baseline; a missing or unknown state starts a new one."""
+        baseline = cls()
+        if not state or state.get("v") != STATE_VERSION:
+            return baseline
+        baseline.level = float(state["level"])
+        baseline.var = float(state["var"])
+        baseline.season = [float(offset) for offset in state["season"]]
+        baseline.resid = float(state["resid"])
+        baseline.count = int(state["n"])
+        return baseline
+
+    def to_state(self) -> Dict:
+        return {
+            "v": STATE_VERSION,
+            "level": round(self.level, 6),
+            "var": round(self.var, 8),
+            "season": [round(offset, 6) for offset in self.season],
+            "resid": round(self.resid, 6),
+            "n": self.count,
+        }
+
+    @property
+    def warm(self) -> bool:
+        return self.count >= WARMUP_CHECKS
+
+    @property
+    def std(self) -> float:
+        return max(math.sqrt(self.var), MIN_STD)
+
+    def expected_ms(self, hour: int) -> float:
+        return math.expm1(self.level + self.season[hour])
+
+    def update(self, response_time: float, checked_at: Optional[datetime] = None,
+               interval_seconds: int = 600) -> Optional[Dict]:
+        """
+        Add a successful check's response time (ms); returns degradation
+        info if the recent response times are well above the baseline.
+        """
+        hour = (checked_at or datetime.utcnow()).hour
+        x = math.log1p(max(response_time, 0.0))
+
+        if self.count == 0:
+            self.level = x
+            self.count = 1
+            return None
+
+        expected = self.level + self.season[hour]
+        error = x - expected
+        std = self.std
+        self.resid += BETA * (error - self.resid)
+
+        alpha = min(1.0, max(interval_seconds, 1) / LEVEL_WINDOW_SECONDS)
+        gamma = min(1.0, max(interval_seconds, 1) / SEASON_WINDOW_SECONDS)
+        if self.warm:
+            level_error = max(-std, min(std, error))
+            season_error = max(-SEASON_CLIP * std, min(SEASON_CLIP * std, error))
+        else:
+            # Warm-up: plain running mean and variance of the first checks
+            alpha = max(alpha, 1.0 / (self.count + 1))
+            level_error = season_error = error
+        self.level += alpha * level_error
+        self.season[hour] += gamma * (season_error - alpha * level_error)
+        if abs(error) <= Z_THRESHOLD * std or not self.warm:
+            self.var = (1 - alpha) * (self.var + alpha * error * error)
+        self.count += 1
+
+        if not self.warm:
+            return None
+        baseline_ms = math.expm1(expected)
+        recent_ms = math.expm1(expected + self.resid)
+        z = self.resid / std
+        if z < Z_THRESHOLD or recent_ms - baseline_ms < MIN_INCREASE_MS:
+            return None
+
+        increase_pct = int((recent_ms - baseline_ms) / max(baseline_ms, 1.0) * 100)
+        return {
+            "degrading": True,
+            "baseline_ms": int(baseline_ms),
+            "current_ms": int(recent_ms),
+            "increase_pct": increase_pct,
+            "z_score": round(z, 1),
+            "severity": "warning",
+            "message": f"Site still UP but response time increased +{increase_pct}% over its usual {int(baseline_ms)}ms for this hour"
+        }
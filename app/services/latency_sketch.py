@@ -0,0 +1,163 @@
+"""
+Mergeable response-time percentile sketches (DDSketch).
+
+Means hide tail latency, and exact percentiles over raw checks need every
+row of the window. A DDSketch keeps counts in logarithmic buckets instead:
+
+- Every quantile is within RELATIVE_ACCURACY (1%) of the true value
+- Two sketches merge by adding bucket counts, so minute / hour / day
+  sketches combine into any window exactly as if built from all checks
+- An hour of checks takes a few dozen buckets, stored as ~100-300 bytes
+  of varints
+
+Each check rollup row carries the sketch of its bucket (see check_rollups);
+readers merge the rows covering a window.
+"""
+import math
+import struct
+from typing import Dict, Optional, Tuple
+
+RELATIVE_ACCURACY = 0.01
+MAX_BUCKETS = 2048  # lowest buckets are collapsed beyond this
+MIN_VALUE = 0.01  # ms; smaller values are counted as zero
+
+FORMAT_VERSION = 1
+
+PERCENTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class DDSketch:
+    """
+    Quantile sketch with relative accuracy guarantees.
+
+    Usage:
+        sketch = DDSketch()
+        sketch.add(212.5)
+        sketch.merge(DDSketch.from_bytes(row.sketch))
+        sketch.quantile(0.99)
+    """
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        if value <= MIN_VALUE:
+            self.zero_count += count
+        else:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + count
+            if len(self.bins) > MAX_BUCKETS:
+                self._collapse()
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self):
+        """Fold the lowest buckets into one (keeps accuracy for the high quantiles)."""
+        keys = sorted(self.bins)
+        excess = keys[:len(keys) - MAX_BUCKETS + 1]
+        folded = sum(self.bins.pop(key) for key in excess)
+        target = keys[len(excess)]
+        self.bins[target] += folded
+
+    def merge(self, other: "DDSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > MAX_BUCKETS:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return max(self.min, 0.0)
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return min(max(self._value(key), self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        """count, mean and PERCENTILES (ms, rounded), None values when empty."""
+        result = {"count": self.count, "mean": round(self.sum / self.count, 2) if self.count else None}
+        for name, q in PERCENTILES:
+            value = self.quantile(q)
+            result[name] = round(value, 2) if value is not None else None
+        return result
+
+    def to_bytes(self) -> bytes:
+        out = bytearray(struct.pack("<Bfddd", FORMAT_VERSION, self.relative_accuracy, self.sum,
+                                    self.min if self.count else 0.0, self.max if self.count else 0.0))
+        _write_varint(out, self.zero_count)
+        _write_varint(out, len(self.bins))
+        previous = 0
+        for key in sorted(self.bins):
+            delta = key - previous
+            _write_varint(out, (delta << 1) ^ (delta >> 63))  # zigzag: keys can be negative
+            _write_varint(out, self.bins[key])
+            previous = key
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DDSketch":
+        version, accuracy, total, low, high = struct.unpack_from("<Bfddd", data)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unknown sketch format {version}")
+        # float32 round trip: snap back to the accuracy it was written with
+        sketch = cls(round(accuracy, 6))
+        pos = struct.calcsize("<Bfddd")
+        sketch.zero_count, pos = _read_varint(data, pos)
+        buckets, pos = _read_varint(data, pos)
+        key = 0
+        for _ in range(buckets):
+            zigzag, pos = _read_varint(data, pos)
+            key += (zigzag >> 1) ^ -(zigzag & 1)
+            count, pos = _read_varint(data, pos)
+            sketch.bins[key] = count
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        sketch.sum = total
+        if sketch.count:
+            sketch.min, sketch.max = low, high
+        return sketch
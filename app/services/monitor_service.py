@@ -1,183 +1,266 @@
 import httpx
-import socket
-import ssl
 import json
-import subprocess
+import time
 from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple, Union
 from urllib.parse import urlparse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.monitor import Monitor
 from app.models.check import Check
-from app.core.security_ssrf import validate_url_before_check
+from app.core.security_ssrf import validate_url_for_check
+from app.core.pinned_transport import PinnedIPTransport
+from app.core.database_async import run_db
+from app.services.check_rollups import record_rollups
+from app.services.tls_cert_cache import cert_expiry_cache, cert_expiry_from_response
 
 
-def get_ip_address(hostname: str) -> str:
-    """Get IP address using multiple methods."""
-    # Try with getent first (works well in containers)
-    try:
-        result = subprocess.run(
-            ['getent', 'hosts', hostname],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.returncode == 0 and result.stdout:
-            ip = result.stdout.split()[0]
-            if ip:
-                return ip
-    except Exception:
-        pass
-
-    # Try with socket
-    try:
-        return socket.gethostbyname(hostname)
-    except Exception:
-        pass
+# Realistic browser headers to avoid bot detection
+CHECK_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0'
+}
 
-    # Try with nslookup as fallback
-    try:
-        result = subprocess.run(
-            ['nslookup', hostname],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if result.returncode == 0 and result.stdout:
-            for line in result.stdout.split('\n'):
-                if 'Address:' in line and '#' not in line:
-                    parts = line.split(':')
-                    if len(parts) > 1:
-                        ip = parts[1].strip()
-                        if ip and not ip.startswith('127.'):
-                            return ip
-    except Exception:
-        pass
-
-    return None
-
-
-async def perform_check(db: Session, monitor: Monitor) -> Check:
-    """Perform an HTTP check on a monitor and record the result."""
+# Security: Limit redirects to prevent redirect loops
+CHECK_MAX_REDIRECTS = 5
+
+
+class ResponseTooLarge(Exception):
+    """Raised when a check response exceeds the body size cap."""
+
+
+class PhaseTimer:
+    """
+    Per-phase durations of a check, in milliseconds.
+
+    Network phases come from httpcore trace events (summed over redirects);
+    "resolve" is our cached DNS lookup + SSRF validation. "overhead" is what
+    is left of the total: client pool waits, redirects handling, our own code.
+    """
+
+    # httpcore trace event prefix -> phase
+    TRACE_PHASES = {
+        "connection.connect_tcp": "connect",
+        "connection.start_tls": "tls",
+        "http11.send_request_headers": "send",
+        "http11.send_request_body": "send",
+        "http11.receive_response_headers": "wait",
+        "http11.receive_response_body": "download",
+        "http2.send_request_headers": "send",
+        "http2.send_request_body": "send",
+        "http2.receive_response_headers": "wait",
+        "http2.receive_response_body": "download",
+    }
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self._started: Dict[str, float] = {}
+
+    def add(self, phase: str, elapsed_ms: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + elapsed_ms
+
+    async def trace(self, event_name: str, info: dict):
+        prefix, _, stage = event_name.rpartition(".")
+        phase = self.TRACE_PHASES.get(prefix)
+        if phase is None:
+            return
+        if stage == "started":
+            self._started[prefix] = time.perf_counter()
+        elif stage in ("complete", "failed") and prefix in self._started:
+            self.add(phase, (time.perf_counter() - self._started.pop(prefix)) * 1000)
+
+    def summary(self, total_ms: float) -> Dict[str, float]:
+        """Compact {phase: ms} dict for Check.timings (phases that did not happen are omitted)."""
+        timings = {phase: round(ms, 1) for phase, ms in self.phases.items()}
+        network = sum(self.phases.get(p, 0.0) for p in ("resolve", "connect", "tls", "send", "wait"))
+        if "wait" in self.phases:
+            timings["ttfb"] = round(network, 1)
+        timings["total"] = round(total_ms, 1)
+        timings["overhead"] = round(max(0.0, total_ms - network - self.phases.get("download", 0.0)), 1)
+        return timings
+
+
+async def read_capped_body(response: httpx.Response, max_bytes: int) -> Tuple[int, int]:
+    """
+    Drain a streamed response body without keeping it, aborting past max_bytes.
+
+    Counts raw (on-the-wire) bytes, so compressed bodies are never inflated.
+
+    Returns:
+        (bytes_read, peak_buffer_bytes) - peak is the largest chunk held at once
+    """
+    content_length = response.headers.get('content-length')
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise ResponseTooLarge(f"Response too large (>{max_bytes} bytes)")
+
+    bytes_read = 0
+    peak_buffer = 0
+    async for chunk in response.aiter_raw():
+        bytes_read += len(chunk)
+        peak_buffer = max(peak_buffer, len(chunk))
+        if bytes_read > max_bytes:
+            raise ResponseTooLarge(f"Response too large (>{max_bytes} bytes)")
+    return bytes_read, peak_buffer
+
+
+async def probe_monitor(monitor: Monitor, client: Optional[httpx.AsyncClient] = None) -> Check:
+    """
+    Perform the HTTP check for a monitor without touching the database.
+
+    Returns an unsaved Check; use record_check() to persist it. Monitor
+    attributes are read before the first await so concurrent probes never
+    trigger a lazy refresh mid-flight.
+
+    Pass a shared client (see http_client_pool) to reuse pooled connections;
+    without one a short-lived client is created for this check only.
+
+    The body is streamed and discarded with a hard cap (CHECK_MAX_BODY_BYTES);
+    monitors with read_body=False stop right after the response headers.
+    """
+    monitor_id = monitor.id
+    url = monitor.url
+    timeout = monitor.timeout
+    read_body = monitor.read_body is not False
     start_time = datetime.utcnow()
+    started = time.perf_counter()
+    ip_address = None
+    timer = PhaseTimer()
+
+    def elapsed_ms() -> float:
+        return (time.perf_counter() - started) * 1000
 
     try:
-        # SSRF Protection: Validate URL before making request
-        validate_url_before_check(monitor.url)
-
-        # Realistic browser headers to avoid bot detection
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Cache-Control': 'max-age=0'
-        }
-
-        # Security: Strict limits on redirects and response size
-        limits = httpx.Limits(max_connections=10, max_keepalive_connections=5)
-        async with httpx.AsyncClient(
-            timeout=monitor.timeout,
-            follow_redirects=True,
-            max_redirects=5,  # Limit redirects to prevent redirect loops
-            headers=headers,
-            limits=limits
-        ) as client:
-            response = await client.get(monitor.url)
-
-            # Security: Limit response size (max 5MB to prevent memory exhaustion)
-            max_response_size = 5 * 1024 * 1024  # 5MB
-            if len(response.content) > max_response_size:
-                raise Exception(f"Response too large (>{max_response_size} bytes)")
-            end_time = datetime.utcnow()
-            response_time = (end_time - start_time).total_seconds() * 1000
-
-            # Extract metadata
-            ip_address = None
-            ssl_expires_at = None
-
-            # Get IP address
+        hostname = urlparse(url).hostname
+
+        # SSRF Protection: validate (cached per hostname, resolved off the event loop);
+        # the connection is pinned to this IP by PinnedIPTransport
+        ip_address = await validate_url_for_check(url)
+        timer.add("resolve", elapsed_ms())
+
+        async def fetch(http_client: httpx.AsyncClient):
+            async with http_client.stream("GET", url, extensions={"trace": timer.trace}) as streamed:
+                cert_expiry = cert_expiry_from_response(streamed)
+                body_stats = (None, None)
+                if read_body:
+                    body_stats = await read_capped_body(streamed, settings.CHECK_MAX_BODY_BYTES)
+                return streamed, cert_expiry, body_stats
+
+        if client is None:
+            async with httpx.AsyncClient(
+                timeout=timeout,
+                follow_redirects=True,
+                max_redirects=CHECK_MAX_REDIRECTS,
+                headers=CHECK_HEADERS,
+                transport=PinnedIPTransport(limits=httpx.Limits(max_connections=10, max_keepalive_connections=5))
+            ) as one_off_client:
+                response, connection_cert_expiry, (bytes_read, peak_buffer_bytes) = await fetch(one_off_client)
+        else:
+            response, connection_cert_expiry, (bytes_read, peak_buffer_bytes) = await fetch(client)
+
+        end_time = datetime.utcnow()
+        response_time = (end_time - start_time).total_seconds() * 1000
+        total_ms = elapsed_ms()
+
+        # Extract metadata
+        ssl_expires_at = None
+
+        # Get SSL certificate expiry for HTTPS: reuse the check's own connection when
+        # it ended on the monitored host, otherwise fall back to the per-host cache
+        if url.startswith('https://'):
             try:
-                parsed_url = urlparse(monitor.url)
-                hostname = parsed_url.hostname
-                if hostname:
-                    ip_address = get_ip_address(hostname)
+                parsed_url = urlparse(url)
+                port = parsed_url.port or 443
+                final_url = response.url
+                if final_url.scheme == 'https' and final_url.host == hostname and (final_url.port or 443) == port:
+                    ssl_expires_at = connection_cert_expiry
+
+                if ssl_expires_at:
+                    cert_expiry_cache.set(hostname, port, ssl_expires_at)
+                else:
+                    ssl_expires_at = await cert_expiry_cache.fetch(hostname, port)
             except Exception as e:
-                print(f"Error getting IP for {monitor.url}: {e}")
-
-            # Get SSL certificate expiry for HTTPS
-            if monitor.url.startswith('https://'):
-                try:
-                    parsed_url = urlparse(monitor.url)
-                    hostname = parsed_url.hostname
-                    port = parsed_url.port or 443
-
-                    context = ssl.create_default_context()
-                    with socket.create_connection((hostname, port), timeout=5) as sock:
-                        with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                            cert = ssock.getpeercert()
-                            if cert:
-                                # Parse expiry date
-                                expiry_str = cert.get('notAfter')
-                                if expiry_str:
-                                    ssl_expires_at = datetime.strptime(expiry_str, '%b %d %H:%M:%S %Y %Z')
-                except Exception as e:
-                    print(f"Error getting SSL info for {monitor.url}: {e}")
-
-            # Extract headers
-            headers_dict = {}
-            for key in ['server', 'content-type', 'x-powered-by', 'cache-control', 'content-length']:
-                if key in response.headers:
-                    headers_dict[key] = response.headers[key]
-
-            # Determine status: consider anti-bot codes as "up" since server is responding
-            # Only real server errors (5xx) or no response should be "down"
-            # 400: Bad Request (strict anti-bot like Facebook)
-            # 401: Unauthorized (login required)
-            # 403: Forbidden (CloudFlare, bot detection)
-            # 429: Too Many Requests (rate limiting)
-            acceptable_error_codes = [400, 401, 403, 429]
-            is_up = (response.status_code < 400) or (response.status_code in acceptable_error_codes)
-
-            check = Check(
-                monitor_id=monitor.id,
-                status="up" if is_up else "down",
-                status_code=response.status_code,
-                response_time=response_time,
-                checked_at=datetime.utcnow(),
-                ip_address=ip_address,
-                server=response.headers.get('server'),
-                content_type=response.headers.get('content-type'),
-                ssl_expires_at=ssl_expires_at,
-                response_headers=json.dumps(headers_dict) if headers_dict else None
-            )
+                print(f"Error getting SSL info for {url}: {e}")
+
+        # Extract headers
+        headers_dict = {}
+        for key in ['server', 'content-type', 'x-powered-by', 'cache-control', 'content-length']:
+            if key in response.headers:
+                headers_dict[key] = response.headers[key]
+
+        # Determine status: consider anti-bot codes as "up" since server is responding
+        # Only real server errors (5xx) or no response should be "down"
+        # 400: Bad Request (strict anti-bot like Facebook)
+        # 401: Unauthorized (login required)
+        # 403: Forbidden (CloudFlare, bot detection)
+        # 429: Too Many Requests (rate limiting)
+        acceptable_error_codes = [400, 401, 403, 429]
+        is_up = (response.status_code < 400) or (response.status_code in acceptable_error_codes)
+
+        check = Check(
+            monitor_id=monitor_id,
+            status="up" if is_up else "down",
+            status_code=response.status_code,
+            response_time=response_time,
+            checked_at=datetime.utcnow(),
+            ip_address=ip_address,
+            server=response.headers.get('server'),
+            content_type=response.headers.get('content-type'),
+            ssl_expires_at=ssl_expires_at,
+            tls_handshake_time=timer.phases.get("tls"),  # None when a pooled connection was reused
+            timings=timer.summary(total_ms),
+            bytes_read=bytes_read,
+            peak_buffer_bytes=peak_buffer_bytes,
+            response_headers=json.dumps(headers_dict) if headers_dict else None
+        )
     except httpx.TimeoutException:
         check = Check(
-            monitor_id=monitor.id,
+            monitor_id=monitor_id,
             status="down",
             error_message="Request timeout",
-            checked_at=datetime.utcnow()
+            checked_at=datetime.utcnow(),
+            timings=timer.summary(elapsed_ms())
         )
     except Exception as e:
         check = Check(
-            monitor_id=monitor.id,
+            monitor_id=monitor_id,
             status="down",
             error_message=str(e)[:500],
-            checked_at=datetime.utcnow()
+            checked_at=datetime.utcnow(),
+            timings=timer.summary(elapsed_ms())
         )
 
+    return check
+
+
+def record_check(db: Session, monitor: Monitor, check: Check) -> Check:
+    """
+    Persist a check and update the monitor's last status in one commit.
+
+    The worker batches writes through check_writer instead; this is for
+    one-off checks.
+    """
     db.add(check)
-    db.commit()
-    db.refresh(check)
 
     # Update monitor's last status
     monitor.last_status = check.status
     monitor.last_checked_at = check.checked_at
     db.commit()
+    record_rollups(db, [check])
 
     return check
+
+
+async def perform_check(db: Union[Session, AsyncSession], monitor: Monitor) -> Check:
+    """Perform an HTTP check on a monitor and record the result (sync or async session)."""
+    check = await probe_monitor(monitor)
+    return await run_db(db, record_check, monitor, check)
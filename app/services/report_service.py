@@ -15,7 +15,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.models.monitor import Monitor
 from app.models.incident import Incident
-from app.models.check import Check
+from app.services.check_rollups import latency_percentiles, rollup_totals
 
 
 def generate_monthly_report(db: Session, monitor: Monitor, month: int = None, year: int = None) -> Dict:
@@ -61,32 +61,19 @@ def generate_monthly_report(db: Session, monitor: Monitor, month: int = None, ye
 
     # === CURRENT MONTH STATS ===
 
-    # Total checks
-    total_checks = db.query(func.count(Check.id)).filter(
-        Check.monitor_id == monitor.id,
-        Check.checked_at >= report_start,
-        Check.checked_at < report_end
-    ).scalar() or 0
-
-    # UP checks
-    up_checks = db.query(func.count(Check.id)).filter(
-        Check.monitor_id == monitor.id,
-        Check.status == "up",
-        Check.checked_at >= report_start,
-        Check.checked_at < report_end
-    ).scalar() or 0
+    # Checks and response times (minute/hour/day rollups)
+    totals = rollup_totals(db, [monitor.id], report_start, report_end)[monitor.id]
+    total_checks = totals["total"]
+    up_checks = totals["up"]
 
     # Uptime percentage
     uptime_pct = (up_checks / total_checks * 100) if total_checks > 0 else 100
 
     # Average response time
-    avg_response = db.query(func.avg(Check.response_time)).filter(
-        Check.monitor_id == monitor.id,
-        Check.status == "up",
-        Check.response_time.isnot(None),
-        Check.checked_at >= report_start,
-        Check.checked_at < report_end
-    ).scalar() or 0
+    avg_response = totals["rt_sum"] / totals["rt_count"] if totals["rt_count"] else 0
+
+    # Response time percentiles (merged rollup sketches)
+    latency = latency_percentiles(db, monitor.id, report_start, report_end)
 
     # Incidents
     incidents = db.query(Incident).filter(
@@ -105,18 +92,9 @@ def generate_monthly_report(db: Session, monitor: Monitor, month: int = None, ye
 
     # === PREVIOUS MONTH FOR COMPARISON ===
 
-    prev_total_checks = db.query(func.count(Check.id)).filter(
-        Check.monitor_id == monitor.id,
-        Check.checked_at >= prev_start,
-        Check.checked_at < prev_end
-    ).scalar() or 0
-
-    prev_up_checks = db.query(func.count(Check.id)).filter(
-        Check.monitor_id == monitor.id,
-        Check.status == "up",
-        Check.checked_at >= prev_start,
-        Check.checked_at < prev_end
-    ).scalar() or 0
+    prev_totals = rollup_totals(db, [monitor.id], prev_start, prev_end)[monitor.id]
+    prev_total_checks = prev_totals["total"]
+    prev_up_checks = prev_totals["up"]
 
     prev_uptime_pct = (prev_up_checks / prev_total_checks * 100) if prev_total_checks > 0 else 100
 
@@ -177,6 +155,9 @@ def generate_monthly_report(db: Session, monitor: Monitor, month: int = None, ye
         "metrics": {
             "uptime_pct": round(uptime_pct, 2),
             "avg_response_time_ms": int(avg_response),
+            "p50_response_time_ms": int(latency["p50"] or 0),
+            "p95_response_time_ms": int(latency["p95"] or 0),
+            "p99_response_time_ms": int(latency["p99"] or 0),
             "total_checks": total_checks,
             "incidents_count": len(incidents),
             "total_downtime_minutes": total_downtime_minutes,
@@ -374,6 +355,7 @@ def generate_html_report(report_data: Dict) -> str:
                 <div class="metric">
                     <div class="metric-label">Avg Response Time</div>
                     <div class="metric-value">{report_data['metrics']['avg_response_time_ms']}ms</div>
+                    <div style="font-size: 12px; color: #666; margin-top: 5px;">p95 {report_data['metrics'].get('p95_response_time_ms', 0)}ms · p99 {report_data['metrics'].get('p99_response_time_ms', 0)}ms</div>
                 </div>
                 <div class="metric">
                     <div class="metric-label">Total Incidents</div>
@@ -456,7 +438,7 @@ def generate_client_ready_summary(report_data: Dict) -> str:
 Period: {report_data['report_period']['month']}
 
 ✅ Uptime: {report_data['metrics']['uptime_pct']}%
-⚡ Avg Response Time: {report_data['metrics']['avg_response_time_ms']}ms
+⚡ Avg Response Time: {report_data['metrics']['avg_response_time_ms']}ms (p95 {report_data['metrics'].get('p95_response_time_ms', 0)}ms)
 ⚠️ Total Incidents: {report_data['metrics']['incidents_count']}
 ⏱️ Total Downtime: {report_data['metrics']['total_downtime_minutes']} minutes
 
@@ -0,0 +1,189 @@
+"""
+Lease-based monitor ownership for running several check workers.
+
+Monitors are split into a fixed number of shards (monitor_id % shard_count).
+Every worker heartbeats a row in worker_nodes and holds time-limited leases
+on the shards it owns in shard_leases:
+
+- The preferred owner of each shard is picked by rendezvous hashing over the
+  live workers, so adding or removing a worker only moves its share of shards
+- Leases are claimed with a conditional UPDATE, so a shard can only be held
+  by one worker at a time, whatever the database backend
+- Leases are renewed on every heartbeat; a dead worker's leases expire after
+  lease_seconds and its shards are claimed by the remaining workers
+- A worker that cannot renew (e.g. lost its database) stops treating its
+  shards as owned once the lease it last wrote has expired
+"""
+import logging
+import os
+import socket
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.worker_lease import WorkerNode, ShardLease
+
+logger = logging.getLogger(__name__)
+
+# Worker rows without a heartbeat for this many lease periods are deleted
+DEAD_WORKER_PRUNE_LEASES = 10
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def pool_worker_id(worker_id: Optional[str], index: int, count: int) -> Optional[str]:
+    """
+    Lease id of pool process index of count: every process must hold leases of
+    its own, so a configured id gets the process index appended. None (the
+    default id) already differs per process.
+    """
+    if worker_id and count > 1:
+        return f"{worker_id}:{index}"
+    return worker_id
+
+
+def preferred_owner(shard_id: int, workers: Iterable[str]) -> Optional[str]:
+    """Rendezvous (highest random weight) hash: the worker that should own shard_id."""
+    best, best_score = None, -1
+    for worker_id in workers:
+        score = zlib.crc32(f"{worker_id}/{shard_id}".encode())
+        if score > best_score or (score == best_score and worker_id < best):
+            best, best_score = worker_id, score
+    return best
+
+
+class ShardLeaseManager:
+    """
+    Shard leases held by this worker.
+
+    Usage:
+        leases = ShardLeaseManager(shard_count=64, lease_seconds=30)
+        leases.heartbeat(db)            # every few seconds
+        if leases.owns(monitor.id): ...
+        leases.release_all(db)          # on shutdown
+    """
+
+    def __init__(self, shard_count: int = 64, lease_seconds: float = 30, worker_id: Optional[str] = None):
+        self.shard_count = max(1, shard_count)
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or default_worker_id()
+        self.owned: FrozenSet[int] = frozenset()
+        self.live_workers = 0
+        self._valid_until = 0.0  # monotonic; owned shards are trusted until then
+
+    def shard_of(self, monitor_id: int) -> int:
+        return monitor_id % self.shard_count
+
+    def holds(self, shard_id: int) -> bool:
+        return time.monotonic() < self._valid_until and shard_id in self.owned
+
+    def owns(self, monitor_id: int) -> bool:
+        return self.holds(self.shard_of(monitor_id))
+
+    def is_leader(self) -> bool:
+        """Holder of shard 0 also runs the cluster-wide jobs (escalations)."""
+        return self.holds(0)
+
+    def _ensure_shards(self, db: Session):
+        existing = {shard_id for (shard_id,) in db.query(ShardLease.shard_id).all()}
+        missing = [s for s in range(self.shard_count) if s not in existing]
+        if not missing:
+            return
+        db.add_all(ShardLease(shard_id=s) for s in missing)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()  # another worker created them first
+
+    def _touch_node(self, db: Session, now: datetime):
+        node = db.query(WorkerNode).filter(WorkerNode.worker_id == self.worker_id).first()
+        if node is None:
+            db.add(WorkerNode(worker_id=self.worker_id, started_at=now, heartbeat_at=now))
+        else:
+            node.heartbeat_at = now
+        db.commit()
+
+    def heartbeat(self, db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Renew, release and claim leases. Returns a summary of what changed."""
+        started = time.monotonic()
+        now = now or datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+
+        self._ensure_shards(db)
+        self._touch_node(db, now)
+
+        live = [
+            worker_id for (worker_id,) in db.query(WorkerNode.worker_id).filter(
+                WorkerNode.heartbeat_at >= now - timedelta(seconds=self.lease_seconds)
+            ).all()
+        ]
+        if self.worker_id not in live:
+            live.append(self.worker_id)
+        desired = {
+            s for s in range(self.shard_count)
+            if preferred_owner(s, live) == self.worker_id
+        }
+
+        # Renew what we keep, hand back what now belongs to someone else
+        db.query(ShardLease).filter(
+            ShardLease.owner == self.worker_id,
+            ShardLease.shard_id.in_(desired)
+        ).update({ShardLease.expires_at: expires_at}, synchronize_session=False)
+        released = db.query(ShardLease).filter(
+            ShardLease.owner == self.worker_id,
+            ShardLease.shard_id.notin_(desired)
+        ).update({ShardLease.owner: None, ShardLease.expires_at: None}, synchronize_session=False)
+
+        # Claim free or expired shards; the WHERE clause makes each claim atomic
+        claimed = 0
+        for shard_id in sorted(desired - set(self.owned)):
+            claimed += db.query(ShardLease).filter(
+                ShardLease.shard_id == shard_id,
+                or_(
+                    ShardLease.owner == None,
+                    ShardLease.owner == self.worker_id,
+                    ShardLease.expires_at < now
+                )
+            ).update({
+                ShardLease.owner: self.worker_id,
+                ShardLease.expires_at: expires_at,
+                ShardLease.acquired_at: now
+            }, synchronize_session=False)
+
+        db.query(WorkerNode).filter(
+            WorkerNode.heartbeat_at < now - timedelta(seconds=self.lease_seconds * DEAD_WORKER_PRUNE_LEASES)
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        owned: Set[int] = {
+            shard_id for (shard_id,) in db.query(ShardLease.shard_id).filter(
+                ShardLease.owner == self.worker_id,
+                ShardLease.expires_at > now
+            ).all()
+        }
+        self.owned = frozenset(owned)
+        self.live_workers = len(live)
+        self._valid_until = started + self.lease_seconds
+
+        return {
+            "owned": len(owned),
+            "claimed": claimed,
+            "released": released,
+            "waiting": len(desired - owned),
+            "live_workers": len(live),
+        }
+
+    def release_all(self, db: Session):
+        """Give up every lease immediately so other workers take over without waiting."""
+        db.query(ShardLease).filter(ShardLease.owner == self.worker_id).update(
+            {ShardLease.owner: None, ShardLease.expires_at: None}, synchronize_session=False
+        )
+        db.query(WorkerNode).filter(WorkerNode.worker_id == self.worker_id).delete(synchronize_session=False)
+        db.commit()
+        self.owned = frozenset()
+        self._valid_until = 0.0
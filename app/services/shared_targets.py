@@ -0,0 +1,189 @@
+"""
+Politeness and de-duplication for monitors that share a target.
+
+Many monitors point at the same origin (an agency watching dozens of paths
+on one customer site) or even at the same URL (popular endpoints watched
+by many users). Two mechanisms keep that from multiplying requests:
+
+- HostLimiter caps in-flight requests per hostname, so a burst of due
+  monitors on one origin is spread out instead of hitting it all at once
+- ProbeCoalescer gives identical checks (same URL and probe options) that
+  come due within a short window a single HTTP request; every monitor gets
+  its own copy of the resulting Check
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+from urllib.parse import urlparse
+from sqlalchemy import inspect
+from app.models.monitor import Monitor
+from app.models.check import Check
+
+
+def host_key(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+
+def probe_key(monitor: Monitor) -> Hashable:
+    """Monitors with the same key would send exactly the same request."""
+    return (monitor.url, monitor.timeout, monitor.read_body is not False)
+
+
+def clone_check(check: Check, monitor_id: int) -> Check:
+    """Unsaved copy of a probe result, attributed to another monitor."""
+    values = {
+        attr.key: getattr(check, attr.key)
+        for attr in inspect(Check).column_attrs
+        if attr.key not in ("id", "monitor_id")
+    }
+    if values.get("timings") is not None:
+        values["timings"] = dict(values["timings"])
+    return Check(monitor_id=monitor_id, **values)
+
+
+class HostLimiter:
+    """
+    Per-hostname cap on concurrent requests (0 = unlimited).
+
+    Usage:
+        limiter = HostLimiter(max_per_host=4)
+        async with limiter.slot(monitor):
+            ...
+    """
+
+    def __init__(self, max_per_host: int = 0):
+        self.max_per_host = max(0, max_per_host)
+        # host -> [semaphore, tasks using or waiting for it]; dropped when unused
+        self._hosts: Dict[str, List] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.waits = 0
+
+    @asynccontextmanager
+    async def slot(self, monitor: Monitor) -> AsyncIterator[None]:
+        if not self.max_per_host:
+            yield
+            return
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._hosts = {}
+            self._loop = loop
+
+        host = host_key(monitor.url)
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = self._hosts[host] = [asyncio.Semaphore(self.max_per_host), 0]
+        entry[1] += 1
+        try:
+            if entry[0].locked():
+                self.waits += 1
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and self._hosts.get(host) is entry:
+                del self._hosts[host]
+
+    def stats(self) -> Dict:
+        return {
+            "max_per_host": self.max_per_host,
+            "active_hosts": len(self._hosts),
+            "waits": self.waits,
+        }
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    started: float
+    waiters: int = 0
+    handed_out: bool = False
+
+
+class ProbeCoalescer:
+    """
+    Single-flight probes: one request per probe key per window (0 = disabled).
+
+    A probe started less than window_seconds ago (running or finished) is
+    reused by any monitor with the same key. Only successful probes are
+    reused once finished: a probe that raised is dropped, so the next monitor
+    probes again instead of getting the same exception. The shared probe is
+    cancelled only once every monitor waiting for it has been cancelled.
+
+    Usage:
+        coalescer = ProbeCoalescer(window_seconds=5)
+        check = await coalescer.run(monitor, probe)
+    """
+
+    def __init__(self, window_seconds: float = 0):
+        self.window_seconds = max(0.0, window_seconds)
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.probes = 0
+        self.coalesced = 0
+
+    def prune(self):
+        """Forget finished probes older than the window."""
+        if self._loop is None:
+            return
+        now = self._loop.time()
+        expired = [
+            key for key, flight in self._flights.items()
+            if flight.task.done() and (
+                flight.task.cancelled() or flight.task.exception() is not None
+                or now - flight.started > self.window_seconds
+            )
+        ]
+        for key in expired:
+            del self._flights[key]
+
+    def _reusable(self, flight: Optional[_Flight], now: float) -> bool:
+        if flight is None or flight.task.cancelled():
+            return False
+        if not flight.task.done():
+            return True
+        return flight.task.exception() is None and now - flight.started <= self.window_seconds
+
+    async def run(self, monitor: Monitor, probe: Callable[[Monitor], Awaitable[Check]]) -> Check:
+        if not self.window_seconds:
+            return await probe(monitor)
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._flights = {}
+            self._loop = loop
+
+        monitor_id = monitor.id
+        key = probe_key(monitor)
+        now = loop.time()
+        flight = self._flights.get(key)
+        if self._reusable(flight, now):
+            self.coalesced += 1
+        else:
+            flight = self._flights[key] = _Flight(task=asyncio.create_task(probe(monitor)), started=now)
+            self.probes += 1
+
+        flight.waiters += 1
+        try:
+            check = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+        # The first taker gets the probe's own Check, everyone else a copy
+        if not flight.handed_out and check.monitor_id == monitor_id:
+            flight.handed_out = True
+            return check
+        return clone_check(check, monitor_id)
+
+    def stats(self) -> Dict:
+        return {
+            "window_seconds": self.window_seconds,
+            "tracked": len(self._flights),
+            "probes": self.probes,
+            "coalesced": self.coalesced,
+        }
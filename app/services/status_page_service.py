@@ -1,12 +1,14 @@
 """
 Status page service - calculates uptime statistics and incident history.
+
+Uptime and response times come from the check rollups (see check_rollups),
+not from counting raw checks.
 """
 from datetime import datetime, timedelta
+from typing import Dict
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from app.models.monitor import Monitor
-from app.models.check import Check
 from app.models.incident import Incident
+from app.services.check_rollups import latency_percentiles, rollup_series, rollup_totals
 
 
 def calculate_uptime_percentage(db: Session, monitor_id: int, days: int = 7) -> float:
@@ -22,24 +24,12 @@ def calculate_uptime_percentage(db: Session, monitor_id: int, days: int = 7) ->
         Uptime percentage (0-100)
     """
     since = datetime.utcnow() - timedelta(days=days)
+    totals = rollup_totals(db, [monitor_id], since)[monitor_id]
 
-    # Get all checks in the period
-    total_checks = db.query(Check).filter(
-        Check.monitor_id == monitor_id,
-        Check.checked_at >= since
-    ).count()
-
-    if total_checks == 0:
+    if totals["total"] == 0:
         return 100.0
 
-    # Count successful checks
-    successful_checks = db.query(Check).filter(
-        Check.monitor_id == monitor_id,
-        Check.checked_at >= since,
-        Check.status == "up"
-    ).count()
-
-    uptime = (successful_checks / total_checks) * 100
+    uptime = (totals["up"] / totals["total"]) * 100
     return round(uptime, 2)
 
 
@@ -56,15 +46,27 @@ def get_average_response_time(db: Session, monitor_id: int, days: int = 7) -> fl
         Average response time in milliseconds
     """
     since = datetime.utcnow() - timedelta(days=days)
+    totals = rollup_totals(db, [monitor_id], since)[monitor_id]
+
+    if not totals["rt_count"]:
+        return 0.0
+    return round(totals["rt_sum"] / totals["rt_count"], 2)
 
-    avg_response_time = db.query(func.avg(Check.response_time)).filter(
-        Check.monitor_id == monitor_id,
-        Check.checked_at >= since,
-        Check.status == "up",
-        Check.response_time.isnot(None)
-    ).scalar()
 
-    return round(avg_response_time, 2) if avg_response_time else 0.0
+def get_response_time_percentiles(db: Session, monitor_id: int, days: int = 7) -> Dict:
+    """
+    Response time percentiles for successful checks, from the rollup sketches.
+
+    Args:
+        db: Database session
+        monitor_id: Monitor ID
+        days: Number of days to calculate (default: 7)
+
+    Returns:
+        {"count", "mean", "p50", "p95", "p99"} in milliseconds (None if no data)
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    return latency_percentiles(db, monitor_id, since)
 
 
 def get_recent_incidents(db: Session, monitor_id: int, limit: int = 10):
@@ -110,36 +112,20 @@ def get_daily_uptime(db: Session, monitor_id: int, days: int = 90):
     Returns:
         List of {date, uptime_percentage} dictionaries
     """
+    today = datetime.utcnow().date()
+    first_day = datetime.combine(today - timedelta(days=days - 1), datetime.min.time())
+
     result = []
-    for i in range(days):
-        date = datetime.utcnow().date() - timedelta(days=i)
-        start_of_day = datetime.combine(date, datetime.min.time())
-        end_of_day = datetime.combine(date, datetime.max.time())
-
-        # Count total checks for the day
-        total = db.query(Check).filter(
-            Check.monitor_id == monitor_id,
-            Check.checked_at >= start_of_day,
-            Check.checked_at <= end_of_day
-        ).count()
-
-        if total == 0:
+    for row in rollup_series(db, monitor_id, "day", first_day):
+        if row.total == 0:
             continue
 
-        # Count successful checks
-        successful = db.query(Check).filter(
-            Check.monitor_id == monitor_id,
-            Check.checked_at >= start_of_day,
-            Check.checked_at <= end_of_day,
-            Check.status == "up"
-        ).count()
-
-        uptime = (successful / total) * 100
+        uptime = (row.up / row.total) * 100
 
         result.append({
-            "date": date.isoformat(),
+            "date": row.bucket_start.date().isoformat(),
             "uptime_percentage": round(uptime, 2),
-            "total_checks": total
+            "total_checks": row.total
         })
 
-    return list(reversed(result))  # Oldest first
+    return result  # Oldest first
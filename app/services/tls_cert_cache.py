@@ -0,0 +1,98 @@
+"""
+TLS certificate expiry lookup for HTTPS checks.
+
+The certificate is read from the connection httpx already opened for the
+check. When that is not possible (redirect to another host, connection
+already closed) the expiry is served from a per host:port cache, refreshed
+by a one-off handshake in a worker thread every few hours. The handshake
+connects to the IP validated by validate_hostname_async() (the same SSRF
+checks and DNS pinning as the check itself), with the hostname only used
+for SNI and certificate verification.
+"""
+import asyncio
+import socket
+import ssl
+import time
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.core.security_ssrf import validate_hostname_async
+
+# Failed lookups are retried sooner than successful ones are refreshed
+FAILED_LOOKUP_RETRY_SECONDS = 600
+
+
+def parse_cert_expiry(cert: Optional[Dict]) -> Optional[datetime]:
+    """Parse notAfter from an ssl.getpeercert() dict."""
+    if not cert:
+        return None
+    expiry_str = cert.get('notAfter')
+    if not expiry_str:
+        return None
+    return datetime.strptime(expiry_str, '%b %d %H:%M:%S %Y %Z')
+
+
+def cert_expiry_from_response(response: httpx.Response) -> Optional[datetime]:
+    """Read the peer certificate expiry from the connection that served response."""
+    try:
+        network_stream = response.extensions.get("network_stream")
+        if network_stream is None:
+            return None
+        ssl_object = network_stream.get_extra_info("ssl_object")
+        if ssl_object is None:
+            return None
+        return parse_cert_expiry(ssl_object.getpeercert())
+    except Exception:
+        return None
+
+
+def _handshake_cert_expiry(hostname: str, ip: str, port: int, timeout: float) -> Optional[datetime]:
+    """Blocking TLS handshake with ip, returning hostname's certificate expiry (run in a thread)."""
+    context = ssl.create_default_context()
+    with socket.create_connection((ip, port), timeout=timeout) as sock:
+        with context.wrap_socket(sock, server_hostname=hostname) as ssock:
+            return parse_cert_expiry(ssock.getpeercert())
+
+
+class CertExpiryCache:
+    """host:port -> certificate expiry, refreshed every refresh_seconds."""
+
+    def __init__(self, refresh_seconds: float = 6 * 3600):
+        self.refresh_seconds = refresh_seconds
+        # (hostname, port) -> (fetched_at, expiry or None)
+        self._cache: Dict[Tuple[str, int], Tuple[float, Optional[datetime]]] = {}
+        self._lock = Lock()
+
+    def set(self, hostname: str, port: int, expiry: Optional[datetime]):
+        with self._lock:
+            self._cache[(hostname.lower(), port)] = (time.monotonic(), expiry)
+
+    def get(self, hostname: str, port: int) -> Tuple[bool, Optional[datetime]]:
+        """Return (is_fresh, expiry) for host:port."""
+        with self._lock:
+            entry = self._cache.get((hostname.lower(), port))
+        if entry is None:
+            return False, None
+        fetched_at, expiry = entry
+        max_age = self.refresh_seconds if expiry else FAILED_LOOKUP_RETRY_SECONDS
+        return time.monotonic() - fetched_at < max_age, expiry
+
+    async def fetch(self, hostname: str, port: int, timeout: float = 5) -> Optional[datetime]:
+        """Return cached expiry, doing a handshake off the event loop when stale."""
+        is_fresh, expiry = self.get(hostname, port)
+        if is_fresh:
+            return expiry
+        try:
+            # Connect to the validated IP, not a fresh resolution of hostname (DNS rebinding)
+            ip, _ = await validate_hostname_async(hostname)
+            expiry = await asyncio.to_thread(_handshake_cert_expiry, hostname, ip, port, timeout) if ip else None
+        except Exception:
+            expiry = None
+        self.set(hostname, port, expiry)
+        return expiry
+
+
+# Global cache instance
+cert_expiry_cache = CertExpiryCache(refresh_seconds=settings.TLS_CERT_REFRESH_SECONDS)
@@ -0,0 +1,159 @@
+"""
+Multi-process check worker pool.
+
+One Python process saturates a single core on TLS, SQLAlchemy object
+creation and the intelligence calculations, however many checks are in
+flight. The pool starts K child processes (spawned, so each one builds its
+own event loop, HTTP clients and database pool) and:
+
+- Tells every child its (index, count) so it checks only its partition
+- Restarts children that die
+- Aggregates the cycle stats children report over a queue and logs
+  pool-wide throughput periodically
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from dataclasses import dataclass, field
+from queue import Empty
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default time children get to stop cleanly before being killed; callers pass
+# their child's worst-case shutdown (see worker.WORKER_SHUTDOWN_SECONDS)
+CHILD_SHUTDOWN_SECONDS = 60
+
+
+@dataclass
+class PoolStats:
+    """Cycle stats aggregated over all children since the last report."""
+    cycles: int = 0
+    scheduled: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    per_child: Dict[int, int] = field(default_factory=dict)  # index -> completed checks
+    started: float = field(default_factory=time.monotonic)
+
+    def add(self, index: int, cycle: Dict):
+        self.cycles += 1
+        self.scheduled += cycle.get("scheduled", 0)
+        self.completed += cycle.get("completed", 0)
+        self.failed += cycle.get("failed", 0)
+        self.cancelled += cycle.get("cancelled", 0)
+        self.per_child[index] = self.per_child.get(index, 0) + cycle.get("completed", 0)
+
+    def as_dict(self) -> Dict:
+        elapsed = time.monotonic() - self.started
+        return {
+            "cycles": self.cycles,
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "checks_per_second": round(self.completed / elapsed, 2) if elapsed > 0 else 0.0,
+            "per_child": dict(sorted(self.per_child.items())),
+        }
+
+
+class WorkerPool:
+    """
+    Supervisor for K worker processes.
+
+    target(index, count, stats_queue) runs in each child; it should put
+    (index, cycle_stats_dict) tuples on stats_queue after each cycle.
+
+    Usage:
+        WorkerPool(run_worker_process, processes=4).run()
+    """
+
+    def __init__(
+        self,
+        target: Callable,
+        processes: int,
+        report_seconds: float = 60,
+        shutdown_seconds: float = CHILD_SHUTDOWN_SECONDS
+    ):
+        self.target = target
+        self.processes = max(1, processes)
+        self.report_seconds = report_seconds
+        self.shutdown_seconds = shutdown_seconds
+        self._ctx = multiprocessing.get_context("spawn")
+        self.stats_queue = self._ctx.Queue()
+        self._children: List[Optional[multiprocessing.Process]] = [None] * self.processes
+        self._stopping = False
+        self.restarts = 0
+
+    def _start_child(self, index: int):
+        process = self._ctx.Process(
+            target=self.target,
+            args=(index, self.processes, self.stats_queue),
+            name=f"check-worker-{index}",
+            daemon=False
+        )
+        process.start()
+        self._children[index] = process
+        logger.info(f"Started check worker {index}/{self.processes} (pid {process.pid})")
+
+    def _supervise(self):
+        for index, process in enumerate(self._children):
+            if process is not None and not process.is_alive():
+                logger.error(f"Check worker {index} exited with code {process.exitcode}, restarting")
+                self.restarts += 1
+                self._start_child(index)
+
+    def _drain(self, stats: PoolStats, timeout: float):
+        """Collect reported cycle stats, blocking up to timeout for the first one."""
+        try:
+            index, cycle = self.stats_queue.get(timeout=timeout)
+        except Empty:
+            return
+        stats.add(index, cycle)
+        while True:
+            try:
+                index, cycle = self.stats_queue.get_nowait()
+            except Empty:
+                return
+            stats.add(index, cycle)
+
+    def _handle_sigterm(self, signum, frame):
+        raise SystemExit(0)
+
+    def stop(self):
+        """Ask children to stop (SIGINT, like Ctrl+C), then kill stragglers."""
+        self._stopping = True
+        children = [p for p in self._children if p is not None and p.is_alive()]
+        for process in children:
+            try:
+                os.kill(process.pid, signal.SIGINT)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.shutdown_seconds
+        for process in children:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Check worker pid {process.pid} did not stop, killing")
+                process.kill()
+                process.join()
+
+    def run(self):
+        """Start all children and supervise them until interrupted."""
+        signal.signal(signal.SIGTERM, self._handle_sigterm)
+        for index in range(self.processes):
+            self._start_child(index)
+
+        stats = PoolStats()
+        try:
+            while not self._stopping:
+                self._drain(stats, timeout=1.0)
+                self._supervise()
+                if time.monotonic() - stats.started >= self.report_seconds:
+                    logger.info(f"Worker pool ({self.processes} processes, {self.restarts} restarts): {stats.as_dict()}")
+                    stats = PoolStats()
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            self.stop()
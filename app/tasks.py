@@ -815,7 +815,7 @@ async def send_monthly_reports(ctx):
     Run on 1st of each month via cron.
     """
     from app.services.email_lifecycle_service import get_monthly_report_email
-    from app.models.check import Check
+    from app.services.check_rollups import rollup_totals
     from datetime import datetime, timedelta
 
     db = get_db()
@@ -843,27 +843,22 @@ async def send_monthly_reports(ctx):
             best_monitor = None
             best_uptime = 0
 
+            totals = rollup_totals(db, [monitor.id for monitor in monitors], last_month_start, last_month_end)
             for monitor in monitors:
-                checks = db.query(Check).filter(
-                    Check.monitor_id == monitor.id,
-                    Check.checked_at >= last_month_start,
-                    Check.checked_at < last_month_end
-                ).all()
-
-                if checks:
-                    monitor_up = len([c for c in checks if c.status == "up"])
-                    monitor_uptime = (monitor_up / len(checks)) * 100 if checks else 0
-                    total_checks += len(checks)
+                monitor_totals = totals[monitor.id]
+
+                if monitor_totals["total"]:
+                    monitor_up = monitor_totals["up"]
+                    monitor_uptime = (monitor_up / monitor_totals["total"]) * 100
+                    total_checks += monitor_totals["total"]
                     up_checks += monitor_up
 
                     if monitor_uptime > best_uptime:
                         best_uptime = monitor_uptime
                         best_monitor = monitor.name
 
-                    for check in checks:
-                        if check.response_time:
-                            total_response_time += check.response_time
-                            response_time_count += 1
+                    total_response_time += monitor_totals["rt_sum"]
+                    response_time_count += monitor_totals["rt_count"]
 
             if total_checks == 0:
                 continue
@@ -903,6 +898,7 @@ async def send_upgrade_nudges(ctx):
     Run daily via cron.
     """
     from app.services.email_lifecycle_service import get_upgrade_nudge_email
+    from app.services.check_rollups import rollup_totals
     from datetime import datetime, timedelta
 
     db = get_db()
@@ -937,15 +933,14 @@ async def send_upgrade_nudges(ctx):
                 ).count()
 
                 # Calculate avg uptime
-                checks = db.query(Check).join(Monitor).filter(
-                    Monitor.user_id == user.id,
-                    Check.checked_at >= datetime.utcnow() - timedelta(days=30)
-                ).all()
+                monitor_ids = [m.id for m in db.query(Monitor.id).filter(Monitor.user_id == user.id).all()]
+                totals = rollup_totals(db, monitor_ids, datetime.utcnow() - timedelta(days=30)).values()
+                total_checks = sum(t["total"] for t in totals)
 
                 avg_uptime = 99.0
-                if checks:
-                    up_count = len([c for c in checks if c.status == "up"])
-                    avg_uptime = round((up_count / len(checks)) * 100, 1)
+                if total_checks:
+                    up_count = sum(t["up"] for t in totals)
+                    avg_uptime = round((up_count / total_checks) * 100, 1)
 
                 usage_data = {
                     "monitors_count": monitors_count,
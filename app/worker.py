@@ -1,29 +1,63 @@
 """
 Monitor check worker - schedules and executes monitor health checks.
 
-This worker runs on a schedule (every 30 seconds by default) and:
-1. Performs HTTP checks on all active monitors
-2. Detects status transitions (UP→DOWN, DOWN→UP)
-3. Enqueues notification tasks to ARQ for delivery
+Runs as a single long-lived asyncio daemon: the check, escalation and
+maintenance loops are tasks on one event loop, so pooled HTTP connections,
+the DNS cache and DB connections are shared for the life of the process.
+SIGTERM/SIGINT stop the loops, let in-flight checks finish (bounded) and
+close pooled clients before exiting.
+
+The check loop wakes whenever a monitor comes due (see check_scheduler),
+performs HTTP checks on the due monitors concurrently (see check_engine),
+writes them (see check_writer) and emits each recorded check to the
+analysis stages, which run with their own consumers (see analysis_pipeline):
+1. intelligence: flapping, degradation, health score, Site DNA
+2. incidents: status transitions (UP→DOWN, DOWN→UP), root cause, loss
+3. notifications: enqueue notification tasks to ARQ for delivery
+
+With WORKER_SHARDING_ENABLED, several workers can run side by side: each one
+only checks the monitor shards it holds a lease on (see shard_leases).
+With WORKER_PROCESSES > 1, the worker runs that many child processes, each
+with its own event loop and DB pool, and aggregates their stats (see
+worker_pool).
 """
 import asyncio
+import os
+import signal
 import time
+from collections import deque
 import logging
-from apscheduler.schedulers.blocking import BlockingScheduler
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session, selectinload
 from app.core.database import SessionLocal
+from app.core.database_async import worker_session, run_db, get_async_sessionmaker, dispose_async_engine
 from app.models.monitor import Monitor
 from app.models.incident import Incident
 from app.models.check import Check
-from app.services.monitor_service import perform_check
+from app.core.config import settings
+from app.core.dns_resolver import dns_resolver
+from app.services.monitor_service import probe_monitor, CHECK_HEADERS, CHECK_MAX_REDIRECTS
+from app.services.analysis_pipeline import CheckEvent, IncidentEvent, PipelineStage
+from app.services.check_engine import CheckEngine
+from app.services.check_compaction import CheckCompactor, in_off_peak
+from app.services.check_history import CheckHistoryCache
+from app.services.check_partitions import ensure_partitions, drop_expired_partitions
+from app.services.health_buckets import HealthScoreTracker
+from app.services.latency_baseline import LatencyBaseline
+from app.services.check_rollups import RollupAccumulator
+from app.services.check_scheduler import CheckScheduler
+from app.services.check_writer import CheckResultWriter
+from app.services.http_client_pool import HTTPClientRegistry
+from app.services.shard_leases import ShardLeaseManager, pool_worker_id
+from app.services.worker_pool import WorkerPool
 from app.services.incident_service import detect_and_create_incident
 from app.services.escalation_service import check_escalation, reset_escalation_flags
 from app.services.intelligent_incident_service import (
     analyze_why_it_went_down,
     detect_flapping,
     detect_progressive_degradation,
-    calculate_health_score,
+    detect_latency_degradation,
     detect_patterns,
     calculate_time_and_money_lost
 )
@@ -36,146 +70,547 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Checks that did not complete (deadline, crash) are retried after at most this
+SCHEDULER_RETRY_SECONDS = 30
+
+ESCALATION_INTERVAL_SECONDS = 120
+MAINTENANCE_INTERVAL_SECONDS = 60
+PARTITION_MAINTENANCE_SECONDS = 3600
+COMPACTION_POLL_SECONDS = 300
+
+# On shutdown, in-flight checks get this long to finish before being cancelled
+SHUTDOWN_GRACE_SECONDS = 10
+
+# A crashed daemon loop is restarted after this delay
+LOOP_RESTART_SECONDS = 5
+
+# Next-due-time queue of active monitors (see check_scheduler)
+check_scheduler = CheckScheduler(spread_phases=settings.SCHEDULER_SPREAD_PHASES)
+
+# Shared across cycles so last_stats stays available for sizing
+check_engine = CheckEngine(
+    max_concurrency=settings.CHECK_MAX_CONCURRENCY,
+    cycle_deadline_seconds=settings.CHECK_CYCLE_DEADLINE_SECONDS,
+    max_per_host=settings.CHECK_MAX_PER_HOST,
+    coalesce_window_seconds=settings.CHECK_COALESCE_WINDOW_SECONDS
+)
+
+# Recent checks per monitor for the intelligence steps (see check_history)
+check_history = CheckHistoryCache(capacity=settings.CHECK_HISTORY_SIZE)
+
+# Daily counters behind the 30-day health score (see health_buckets)
+health_tracker = HealthScoreTracker(
+    days=30,
+    reconcile_seconds=settings.HEALTH_RECONCILE_SECONDS,
+    reconcile_batch=settings.HEALTH_RECONCILE_BATCH
+)
+
+# Minute/hour/day check rollups, written once a minute (see check_rollups)
+check_rollups = RollupAccumulator()
+
+# Pooled HTTP clients owned by this worker process, reused across cycles
+http_clients = HTTPClientRegistry(
+    headers=CHECK_HEADERS,
+    max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    idle_timeout=settings.HTTP_CLIENT_IDLE_SECONDS
+)
+
+# Batched INSERTs of check rows, shared by all concurrent check batches
+check_writer = CheckResultWriter(
+    SessionLocal,
+    batch_size=settings.CHECK_WRITE_BATCH_SIZE,
+    flush_interval_ms=settings.CHECK_WRITE_FLUSH_MS,
+    max_pending=settings.CHECK_WRITE_MAX_PENDING,
+    async_session_factory=get_async_sessionmaker() if settings.DATABASE_ASYNC else None
+)
+
+# (index, count) of this process in a multi-process pool; (0, 1) when alone
+worker_partition = (0, 1)
+
+
+def build_shard_leases(index: int = 0, count: int = 1) -> Optional[ShardLeaseManager]:
+    """Lease manager of pool process index of count (None unless sharding is enabled)."""
+    if not settings.WORKER_SHARDING_ENABLED:
+        return None
+    return ShardLeaseManager(
+        shard_count=settings.WORKER_SHARD_COUNT,
+        lease_seconds=settings.WORKER_LEASE_SECONDS,
+        worker_id=pool_worker_id(settings.WORKER_ID or None, index, count)
+    )
+
+
+# Monitor shards this worker owns (None = single worker, owns everything);
+# rebuilt per pool process in run_worker_process
+shard_leases = build_shard_leases()
+
+# Cycle stats are reported to the pool parent through this queue, if any
+_stats_queue = None
+
+# In-flight check batches, awaited on shutdown
+_check_batches = set()
+
+# Last monitor id whose Site DNA was refreshed (see refresh_site_dna)
+_dna_cursor = 0
+
 
 def get_db() -> Session:
     """Get database session."""
     return SessionLocal()
 
 
-async def check_monitors():
-    """Check all active monitors and handle incidents."""
-    db = get_db()
+def analyze_check(db: Session, monitor: Monitor, check: Check):
+    """Intelligence steps for a recorded check (the caller commits)."""
+    logger.info(f"Checked monitor: {monitor.name} ({monitor.url})")
+    logger.info(f"  Status: {check.status}, Response time: {check.response_time}ms")
+
+    # Recent checks come from memory (one query the first time a monitor is seen)
+    history = check_history.get(db, monitor.id)
+    history.add_check(check)
+    health = health_tracker.get(db, monitor.id)
+    health.add_check(check)
+
+    # === INTELLIGENT ANALYSIS ===
+
+    # 1. Detect flapping
+    flapping_info = detect_flapping(db, monitor, history=history)
+    if flapping_info:
+        monitor.is_flapping = True
+        logger.warning(f"  ⚠️  FLAPPING: {flapping_info['message']}")
+    else:
+        monitor.is_flapping = False
+
+    # 2. Detect progressive degradation (slowdown before crash): streaming
+    # baseline, with the fixed-threshold window check until it has warmed up
+    degradation_info = detect_latency_degradation(monitor, check, history=history)
+    if degradation_info is None and not LatencyBaseline.from_state(monitor.latency_baseline).warm:
+        degradation_info = detect_progressive_degradation(db, monitor, check, history=history)
+    if degradation_info:
+        monitor.is_degrading = True
+        logger.warning(f"  ⚠️  DEGRADING: {degradation_info['message']}")
+    else:
+        monitor.is_degrading = False
+
+    # 3. Update health score (every check, from the daily counters)
+    health_data = health.score()
+    monitor.health_score = health_data['score']
+    monitor.health_grade = health_data['grade']
+    logger.info(f"  Health: {health_data['score']}/100 ({health_data['grade']})")
+
+    # 4. Site DNA: computed once here, then on new incidents and by run_maintenance()
+    if monitor.site_dna is None:
+        update_site_dna(db, monitor)
+
+
+def detect_check_incident(db: Session, monitor: Monitor, check: Check) -> Optional[Incident]:
+    """Incident detection and enrichment for an analyzed check (returns a new incident, if any)."""
+    history = check_history.get(db, monitor.id)
+    incident = detect_and_create_incident(db, monitor, check, history=history)
+
+    # Enrich the incident on UP→DOWN or DOWN→UP transitions
+    if incident:
+        logger.info(f"  🚨 Incident detected: {incident.incident_type}")
+
+        # Perform intelligent analysis if incident is DOWN
+        if incident.incident_type == "down":
+            health_tracker.get(db, monitor.id).add_incident(incident)
+            update_site_dna(db, monitor)
+            analysis = analyze_why_it_went_down(db, monitor, check, history=history)
+            incident.intelligent_cause = analysis['cause']
+            incident.severity = analysis['severity']
+            incident.analysis_data = analysis.get('details', {})
+            incident.recommendations = analysis.get('recommendations', [])
+
+            logger.info(f"  💡 Analysis: {analysis['cause']}")
+            logger.info(f"  🎯 Severity: {analysis['severity']}")
+
+        # Calculate time and money lost
+        loss = calculate_time_and_money_lost(
+            incident,
+            monitor.estimated_revenue_per_hour
+        )
+        incident.minutes_lost = loss['minutes_lost']
+        incident.money_lost = int(loss['money_lost_eur'])
+
+        db.commit()
+
+    return incident
+
+
+def update_site_dna(db: Session, monitor: Monitor):
+    """Recompute the incident patterns of a monitor (the caller commits)."""
+    patterns = detect_patterns(db, monitor)
+    monitor.site_dna = patterns
+    logger.info(f"  Site DNA updated: {patterns['stability_trend']}")
+
+
+def refresh_site_dna(db: Session) -> int:
+    """
+    Recompute Site DNA for the next DNA_REFRESH_BATCH owned monitors.
+
+    Walks monitors round-robin by id, so every monitor's stability trend
+    (whose 30-day windows move with time) is refreshed regularly without
+    recounting anything per check. Returns the number refreshed.
+    """
+    global _dna_cursor
+    scan = settings.DNA_REFRESH_BATCH * 10
+    ids = [
+        monitor_id for (monitor_id,) in db.query(Monitor.id).filter(
+            Monitor.id > _dna_cursor,
+            Monitor.is_active == True
+        ).order_by(Monitor.id).limit(scan).all()
+    ]
+    owned = [monitor_id for monitor_id in ids if owns_monitor(monitor_id)][:settings.DNA_REFRESH_BATCH]
+    if len(ids) < scan and len(owned) < settings.DNA_REFRESH_BATCH:
+        _dna_cursor = 0  # reached the end: start over next time
+    else:
+        _dna_cursor = owned[-1] if len(owned) == settings.DNA_REFRESH_BATCH else ids[-1]
+
+    for monitor in load_monitors(db, owned) if owned else []:
+        monitor.site_dna = detect_patterns(db, monitor)
+    db.commit()
+    return len(owned)
+
+
+def analyze_checks(db: Session, events: List[CheckEvent]) -> List[CheckEvent]:
+    """Intelligence stage: analyze a batch of checks with one monitor load and one commit."""
+    monitors = {monitor.id: monitor for monitor in load_monitors(db, list({e.monitor_id for e in events}))}
+    analyzed = []
+    for event in events:
+        monitor = monitors.get(event.monitor_id)
+        if monitor is None:
+            continue  # deleted since the check
+        try:
+            analyze_check(db, monitor, event.check)
+            analyzed.append(event)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"  Error analyzing check for monitor {event.monitor_id}: {e}", exc_info=True)
+    db.commit()
+    return analyzed
+
+
+def detect_incidents(db: Session, events: List[CheckEvent]) -> List[IncidentEvent]:
+    """Incident stage: detect and enrich incidents for a batch of analyzed checks."""
+    monitors = {monitor.id: monitor for monitor in load_monitors(db, list({e.monitor_id for e in events}))}
+    incidents = []
+    for event in events:
+        monitor = monitors.get(event.monitor_id)
+        if monitor is None:
+            continue
+        try:
+            incident = detect_check_incident(db, monitor, event.check)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"  Error detecting incident for monitor {event.monitor_id}: {e}", exc_info=True)
+            continue
+        if incident:
+            incidents.append(IncidentEvent(monitor.id, incident.id, incident.incident_type))
+    return incidents
+
+
+def load_notification_targets(db: Session, events: List[IncidentEvent]) -> List[Tuple[Incident, Monitor]]:
+    """Incidents to notify with their monitor and owner loaded (AsyncSession cannot lazy-load later)."""
+    incidents = db.query(Incident).filter(Incident.id.in_([event.incident_id for event in events])).all()
+    monitor_ids = list({i.monitor_id for i in incidents})
+    monitors = {monitor.id: monitor for monitor in load_monitors(db, monitor_ids, with_owner=True)}
+    targets = []
+    for incident in sorted(incidents, key=lambda i: i.id):
+        monitor = monitors.get(incident.monitor_id)
+        if monitor is not None:
+            targets.append((incident, monitor))
+    return targets
+
+
+async def run_intelligence_stage(events: List[CheckEvent]):
+    async with worker_session() as db:
+        analyzed = await run_db(db, analyze_checks, events)
+    for event in analyzed:
+        await incident_stage.put(event)
+
+
+async def run_incident_stage(events: List[CheckEvent]):
+    async with worker_session() as db:
+        incidents = await run_db(db, detect_incidents, events)
+    for event in incidents:
+        await notification_stage.put(event)
+
+
+async def run_notification_stage(events: List[IncidentEvent]):
+    """Enqueue notifications for new incidents (UP→DOWN or DOWN→UP transitions)."""
+    async with worker_session() as db:
+        targets = await run_db(db, load_notification_targets, events)
+        for incident, monitor in targets:
+            try:
+                # Enqueue notification to ARQ (async task queue)
+                await enqueue_notification(incident, monitor.owner, monitor)
+                logger.info(f"  📧 Notification enqueued to ARQ")
 
-    try:
-        monitors = db.query(Monitor).filter(Monitor.is_active == True).all()
-        logger.info(f"Checking {len(monitors)} monitors...")
+                # Reset escalation flags if this is a recovery
+                if incident.incident_type == "recovery":
+                    await run_db(db, reset_escalation_flags, monitor.id)
 
-        for monitor in monitors:
-            current_time = time.time()
+            except Exception as e:
+                logger.error(f"  Failed to enqueue notification: {e}", exc_info=True)
 
-            # Check if enough time has passed since last check
-            if monitor.last_checked_at:
-                elapsed = current_time - monitor.last_checked_at.timestamp()
-                if elapsed < monitor.interval:
-                    continue
 
-            logger.info(f"Checking monitor: {monitor.name} ({monitor.url})")
+# Post-check stages: the check loop only probes, persists and emits to the
+# first one (see analysis_pipeline); each stage feeds the next
+intelligence_stage = PipelineStage(
+    "intelligence", run_intelligence_stage,
+    concurrency=settings.ANALYSIS_INTELLIGENCE_CONCURRENCY,
+    max_backlog=settings.ANALYSIS_MAX_BACKLOG,
+    batch_size=settings.ANALYSIS_BATCH_SIZE
+)
+incident_stage = PipelineStage(
+    "incidents", run_incident_stage,
+    concurrency=settings.ANALYSIS_INCIDENT_CONCURRENCY,
+    max_backlog=settings.ANALYSIS_MAX_BACKLOG,
+    batch_size=settings.ANALYSIS_BATCH_SIZE
+)
+notification_stage = PipelineStage(
+    "notifications", run_notification_stage,
+    concurrency=settings.ANALYSIS_NOTIFICATION_CONCURRENCY,
+    max_backlog=settings.ANALYSIS_MAX_BACKLOG,
+    batch_size=settings.ANALYSIS_BATCH_SIZE
+)
+ANALYSIS_STAGES = (intelligence_stage, incident_stage, notification_stage)
+
+# Worst case of shutdown(): the in-flight grace plus one drain per analysis
+# stage, and a margin for the writer and rollup flushes and the lease release.
+# The pool waits this long for a child before killing it
+WORKER_SHUTDOWN_SECONDS = SHUTDOWN_GRACE_SECONDS * (1 + len(ANALYSIS_STAGES)) + 20
+
+
+def _utc_ts(dt: Optional[datetime]) -> Optional[float]:
+    """Epoch seconds for a naive UTC datetime (as stored by the models)."""
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+def owns_monitor(monitor_id: int) -> bool:
+    """Whether this worker is responsible for checking monitor_id."""
+    if shard_leases is not None:
+        # Every pool process is a lease participant of its own (see build_shard_leases)
+        return shard_leases.owns(monitor_id)
+    index, count = worker_partition
+    return monitor_id % count == index
+
+
+def sync_check_scheduler(db: Session) -> Dict[str, int]:
+    """Reconcile the scheduler with the owned monitors (narrow column query)."""
+    rows = db.query(
+        Monitor.id, Monitor.interval, Monitor.is_active, Monitor.last_checked_at
+    ).all()
+    changes = check_scheduler.sync(
+        (monitor_id, interval, bool(is_active), _utc_ts(last_checked_at))
+        for monitor_id, interval, is_active, last_checked_at in rows
+        if owns_monitor(monitor_id)
+    )
+    # Monitors that left this worker may get checks elsewhere: re-seed if they return
+    check_history.retain(check_scheduler)
+    health_tracker.retain(check_scheduler)
+    return changes
+
+
+def load_monitors(db: Session, monitor_ids: List[int], with_owner: bool = False) -> List[Monitor]:
+    """Monitors by id; with_owner loads their owners in the same round trip (for notifications)."""
+    query = db.query(Monitor).filter(Monitor.id.in_(monitor_ids))
+    if with_owner:
+        query = query.options(selectinload(Monitor.owner))
+    return query.all()
 
-            try:
-                # Perform the HTTP check
-                check = await perform_check(db, monitor)
-                logger.info(f"  Status: {check.status}, Response time: {check.response_time}ms")
-
-                # === INTELLIGENT ANALYSIS ===
-
-                # 1. Detect flapping
-                flapping_info = detect_flapping(db, monitor)
-                if flapping_info:
-                    monitor.is_flapping = True
-                    logger.warning(f"  ⚠️  FLAPPING: {flapping_info['message']}")
-                else:
-                    monitor.is_flapping = False
-
-                # 2. Detect progressive degradation (slowdown before crash)
-                degradation_info = detect_progressive_degradation(db, monitor, check)
-                if degradation_info:
-                    monitor.is_degrading = True
-                    logger.warning(f"  ⚠️  DEGRADING: {degradation_info['message']}")
-                else:
-                    monitor.is_degrading = False
-
-                # 3. Update health score (every check)
-                health_data = calculate_health_score(db, monitor, days=30)
-                monitor.health_score = health_data['score']
-                monitor.health_grade = health_data['grade']
-                logger.info(f"  Health: {health_data['score']}/100 ({health_data['grade']})")
-
-                # 4. Update site DNA patterns (less frequently - every 10 checks)
-                if monitor.last_checked_at:
-                    checks_count = db.query(func.count(Check.id)).filter(
-                        Check.monitor_id == monitor.id
-                    ).scalar()
-                    if checks_count % 10 == 0:
-                        patterns = detect_patterns(db, monitor)
-                        monitor.site_dna = patterns
-                        logger.info(f"  Site DNA updated: {patterns['stability_trend']}")
-
-                db.commit()
-
-                # === INCIDENT DETECTION ===
-                incident = detect_and_create_incident(db, monitor, check)
-
-                # Enqueue notifications if incident detected (UP→DOWN or DOWN→UP transition)
-                if incident:
-                    logger.info(f"  🚨 Incident detected: {incident.incident_type}")
-
-                    # Perform intelligent analysis if incident is DOWN
-                    if incident.incident_type == "down":
-                        analysis = analyze_why_it_went_down(db, monitor, check)
-                        incident.intelligent_cause = analysis['cause']
-                        incident.severity = analysis['severity']
-                        incident.analysis_data = analysis.get('details', {})
-                        incident.recommendations = analysis.get('recommendations', [])
-
-                        logger.info(f"  💡 Analysis: {analysis['cause']}")
-                        logger.info(f"  🎯 Severity: {analysis['severity']}")
-
-                    # Calculate time and money lost
-                    loss = calculate_time_and_money_lost(
-                        incident,
-                        monitor.estimated_revenue_per_hour
-                    )
-                    incident.minutes_lost = loss['minutes_lost']
-                    incident.money_lost = int(loss['money_lost_eur'])
 
-                    db.commit()
+def renew_shard_leases(db: Session) -> bool:
+    """Heartbeat shard leases. Returns True when the owned shard set changed."""
+    previous = shard_leases.owned
+    try:
+        changes = shard_leases.heartbeat(db)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Shard lease heartbeat failed: {e}", exc_info=True)
+        return False
+    if shard_leases.owned != previous:
+        logger.info(f"Shard leases ({shard_leases.worker_id}): {changes}")
+        return True
+    return False
 
-                    try:
-                        # Enqueue notification to ARQ (async task queue)
-                        await enqueue_notification(incident, monitor.owner, monitor)
-                        logger.info(f"  📧 Notification enqueued to ARQ")
 
-                        # Reset escalation flags if this is a recovery
-                        if incident.incident_type == "recovery":
-                            reset_escalation_flags(db, monitor.id)
+async def check_monitors(monitor_ids: List[int]):
+    """Check the given due monitors concurrently and emit the recorded checks for analysis."""
+    async with worker_session() as db:
+        await _check_monitors(db, monitor_ids)
 
-                    except Exception as e:
-                        logger.error(f"  Failed to enqueue notification: {e}", exc_info=True)
 
-            except Exception as e:
-                logger.error(f"  Error checking monitor {monitor.name}: {e}", exc_info=True)
+async def _check_monitors(db, monitor_ids: List[int]):
+    completed = set()
+    intervals = {}
+
+    try:
+        monitors = await run_db(db, load_monitors, monitor_ids)
+
+        # Rows are authoritative: apply deletions, pauses and interval changes
+        found = {monitor.id for monitor in monitors}
+        for monitor_id in set(monitor_ids) - found:
+            check_scheduler.remove(monitor_id)
+            check_history.discard(monitor_id)
+            health_tracker.discard(monitor_id)
+
+        due_monitors = []
+        for monitor in monitors:
+            if not owns_monitor(monitor.id):
+                # Shard lease lost or handed over since the monitor was scheduled
+                check_scheduler.remove(monitor.id)
+                check_history.discard(monitor.id)
+                health_tracker.discard(monitor.id)
+                continue
+            if not monitor.is_active:
+                check_scheduler.pause(monitor.id)
+                check_scheduler.reschedule(monitor.id)
+                continue
+            check_scheduler.update_interval(monitor.id, monitor.interval)
+            intervals[monitor.id] = monitor.interval
+            due_monitors.append(monitor)
+
+        logger.info(f"Checking {len(due_monitors)} due monitors...")
+
+        # (monitor, check, durable) in result order; processed once written
+        written = deque()
+
+        async def process_written(wait: bool):
+            while written and (wait or written[0][2].done()):
+                monitor, check, durable = written.popleft()
+                try:
+                    await durable
+                except Exception:
+                    continue  # write failed (logged by the writer), retried below
+                check_writer.apply_monitor_state(monitor, check)
+                completed.add(check.monitor_id)
+                check_scheduler.reschedule(check.monitor_id, _utc_ts(check.checked_at))
+                check_rollups.add_check(check)
+                await intelligence_stage.put(CheckEvent(check.monitor_id, check))
+
+        async def on_result(monitor: Monitor, check: Check):
+            written.append((monitor, check, await check_writer.submit(check)))
+            await process_written(wait=False)
+
+        async def probe(monitor: Monitor) -> Check:
+            client = http_clients.get_client(monitor.timeout, max_redirects=CHECK_MAX_REDIRECTS)
+            return await probe_monitor(monitor, client=client)
+
+        stats = await check_engine.run_cycle(due_monitors, probe, on_result)
+        await process_written(wait=True)
+        logger.info(
+            f"Cycle done: {stats.completed}/{stats.scheduled} checks in {stats.duration_seconds:.2f}s "
+            f"({stats.checks_per_second:.1f} checks/sec, {stats.failed} failed, {stats.cancelled} cancelled)"
+        )
+        if _stats_queue is not None:
+            _stats_queue.put_nowait((worker_partition[0], stats.as_dict()))
 
     except Exception as e:
         logger.error(f"Worker error: {e}", exc_info=True)
 
     finally:
-        db.close()
+        # Anything dispatched but not recorded (cancelled, crashed) is retried soon
+        for monitor_id in intervals:
+            if monitor_id not in completed:
+                check_scheduler.reschedule(monitor_id, retry_in=min(intervals[monitor_id], SCHEDULER_RETRY_SECONDS))
+
+
+async def run_check_scheduler():
+    """
+    Dispatch checks exactly when monitors come due.
+
+    Sleeps until the next due time (or the next periodic sync), then runs the
+    due batch in the background so later monitors are not held up by it.
+    """
+    async with worker_session() as db:
+        if shard_leases is not None:
+            await run_db(db, renew_shard_leases)
+        changes = await run_db(db, sync_check_scheduler)
+    logger.info(f"Scheduler loaded {len(check_scheduler)} monitors ({changes})")
+
+    last_sync = time.monotonic()
+    last_heartbeat = time.monotonic()
+
+    while True:
+        if shard_leases is not None and time.monotonic() - last_heartbeat >= settings.WORKER_HEARTBEAT_SECONDS:
+            async with worker_session() as db:
+                if await run_db(db, renew_shard_leases):
+                    last_sync = float("-inf")  # pick up / drop monitors of moved shards now
+            last_heartbeat = time.monotonic()
+
+        due_ids = check_scheduler.pop_due()
+        if due_ids:
+            batch = asyncio.create_task(check_monitors(due_ids))
+            _check_batches.add(batch)
+            batch.add_done_callback(_check_batches.discard)
+
+        if time.monotonic() - last_sync >= settings.SCHEDULER_SYNC_SECONDS:
+            try:
+                async with worker_session() as db:
+                    changes = await run_db(db, sync_check_scheduler)
+                if any(changes.values()):
+                    logger.info(f"Scheduler sync: {changes}")
+            except Exception as e:
+                logger.error(f"Scheduler sync error: {e}", exc_info=True)
+            last_sync = time.monotonic()
+
+        # Wake exactly when the next monitor is due (bounded by the sync period)
+        until_sync = settings.SCHEDULER_SYNC_SECONDS - (time.monotonic() - last_sync)
+        if shard_leases is not None:
+            until_sync = min(until_sync, settings.WORKER_HEARTBEAT_SECONDS - (time.monotonic() - last_heartbeat))
+        until_due = check_scheduler.seconds_until_next()
+        sleep_for = until_sync if until_due is None else min(until_due, until_sync)
+        await asyncio.sleep(max(0.0, sleep_for))
+
+
+def load_open_incidents(db: Session) -> List[Incident]:
+    """All open (unresolved) DOWN incidents."""
+    return db.query(Incident).filter(
+        Incident.resolved_at == None,
+        Incident.incident_type == "down"
+    ).all()
+
+
+def evaluate_escalation(db: Session, incident: Incident):
+    """Return (monitor, channels) if the incident should be escalated now, else None."""
+    # Owner loaded now: the escalation notification reads it after this returns,
+    # where an AsyncSession cannot lazy-load
+    monitor = db.query(Monitor).options(selectinload(Monitor.owner)).filter(
+        Monitor.id == incident.monitor_id
+    ).first()
+    if not monitor:
+        return None
+
+    should_escalate, escalation_channels = check_escalation(db, incident, monitor)
+    if not should_escalate:
+        return None
+    return monitor, escalation_channels
 
 
 async def check_escalations():
     """Check all open incidents for escalation."""
-    db = get_db()
+    if shard_leases is not None and not shard_leases.is_leader():
+        return  # Only one sharded worker escalates
+    if shard_leases is None and worker_partition[0] != 0:
+        return  # Only the first pool process escalates
 
     try:
-        # Get all open (unresolved) DOWN incidents
-        open_incidents = db.query(Incident).filter(
-            Incident.resolved_at == None,
-            Incident.incident_type == "down"
-        ).all()
+        async with worker_session() as db:
+            open_incidents = await run_db(db, load_open_incidents)
 
-        logger.info(f"Checking {len(open_incidents)} open incidents for escalation...")
+            logger.info(f"Checking {len(open_incidents)} open incidents for escalation...")
 
-        for incident in open_incidents:
-            try:
-                # Get the monitor
-                monitor = db.query(Monitor).filter(Monitor.id == incident.monitor_id).first()
-                if not monitor:
-                    continue
-
-                # Check if escalation is needed
-                should_escalate, escalation_channels = check_escalation(db, incident, monitor)
+            for incident in open_incidents:
+                try:
+                    escalation = await run_db(db, evaluate_escalation, incident)
+                    if escalation is None:
+                        continue
+                    monitor, escalation_channels = escalation
 
-                if should_escalate:
                     logger.info(
                         f"Escalating incident {incident.id} for monitor {monitor.name} "
                         f"on channels: {escalation_channels}"
@@ -189,56 +624,235 @@ async def check_escalations():
                         channels=escalation_channels
                     )
 
-            except Exception as e:
-                logger.error(f"Error checking escalation for incident {incident.id}: {e}", exc_info=True)
+                except Exception as e:
+                    logger.error(f"Error checking escalation for incident {incident.id}: {e}", exc_info=True)
 
     except Exception as e:
         logger.error(f"Escalation check error: {e}", exc_info=True)
 
+
+async def run_escalations():
+    """Check open incidents for escalation every ESCALATION_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(ESCALATION_INTERVAL_SECONDS)
+        await check_escalations()
+
+
+async def reconcile_health_scores():
+    """Re-seed the oldest health counters from the database to correct drift."""
+    try:
+        async with worker_session() as db:
+            result = await run_db(db, health_tracker.reconcile)
+        if result["reconciled"]:
+            logger.info(f"Health counters reconciled: {result}")
+    except Exception as e:
+        logger.error(f"Health counter reconciliation failed: {e}", exc_info=True)
+
+
+async def flush_check_rollups():
+    """Merge this minute's checks into their minute, hour and day rollups."""
+    try:
+        async with worker_session() as db:
+            await run_db(db, check_rollups.flush)
+    except Exception as e:
+        logger.error(f"Check rollup flush failed: {e}", exc_info=True)
+
+
+async def refresh_site_dna_batch():
+    try:
+        async with worker_session() as db:
+            await run_db(db, refresh_site_dna)
+    except Exception as e:
+        logger.error(f"Site DNA refresh failed: {e}", exc_info=True)
+
+
+def maintain_check_partitions(db: Session) -> Dict:
+    return {
+        "created": ensure_partitions(db, settings.CHECK_PARTITION_MONTHS_AHEAD),
+        "dropped": drop_expired_partitions(db, settings.CHECK_PARTITION_RETENTION_DAYS),
+    }
+
+
+async def manage_check_partitions():
+    """Create the coming months' check partitions and drop expired ones."""
+    if shard_leases is not None and not shard_leases.is_leader():
+        return  # Only one sharded worker manages partitions
+    if shard_leases is None and worker_partition[0] != 0:
+        return  # Only the first pool process manages partitions
+
+    try:
+        async with worker_session() as db:
+            await run_db(db, maintain_check_partitions)
+    except Exception as e:
+        logger.error(f"Check partition maintenance failed: {e}", exc_info=True)
+
+
+def run_compaction_step(compactor: CheckCompactor) -> bool:
+    """One compaction batch in a session of its own (runs in a thread, off the event loop)."""
+    db = SessionLocal()
+    try:
+        return compactor.step(db)
     finally:
         db.close()
 
 
-def run_check_job():
-    """Wrapper to run async check in sync scheduler."""
-    asyncio.run(check_monitors())
+async def compact_checks():
+    """Compact raw checks past retention, one throttled batch at a time, until off-peak ends."""
+    if shard_leases is not None and not shard_leases.is_leader():
+        return  # Only one sharded worker compacts
+    if shard_leases is None and worker_partition[0] != 0:
+        return  # Only the first pool process compacts
 
+    compactor = CheckCompactor(
+        batch_size=settings.CHECK_COMPACTION_BATCH_SIZE,
+        minute_rollup_days=settings.CHECK_ROLLUP_MINUTE_RETENTION_DAYS
+    )
+    try:
+        while in_off_peak(settings.CHECK_COMPACTION_HOURS, datetime.utcnow()):
+            if shard_leases is not None and not shard_leases.is_leader():
+                break
+            # Selects, deletes and commits of a batch would otherwise stall check dispatch
+            if not await asyncio.to_thread(run_compaction_step, compactor):
+                break
+            await asyncio.sleep(settings.CHECK_COMPACTION_PAUSE_MS / 1000)
+    except Exception as e:
+        logger.error(f"Check compaction failed: {e}", exc_info=True)
+    if compactor.rows_deleted or compactor.minute_rollups_deleted:
+        logger.info(f"Check compaction: {compactor.stats()}")
+
+
+async def run_compaction():
+    """Compact raw checks during the off-peak hours (CHECK_COMPACTION_HOURS)."""
+    while True:
+        await asyncio.sleep(COMPACTION_POLL_SECONDS)
+        if settings.CHECK_COMPACTION_ENABLED and in_off_peak(settings.CHECK_COMPACTION_HOURS, datetime.utcnow()):
+            await compact_checks()
+
+
+async def run_maintenance():
+    """
+    Close idle pooled clients, write check rollups, refresh health counters
+    and Site DNA, log worker health once a minute; manage check partitions hourly.
+    """
+    next_partition_run = 0.0
+    while True:
+        await asyncio.sleep(MAINTENANCE_INTERVAL_SECONDS)
+        evicted = await http_clients.evict_idle()
+        await flush_check_rollups()
+        await reconcile_health_scores()
+        await refresh_site_dna_batch()
+        if time.monotonic() >= next_partition_run:
+            await manage_check_partitions()
+            next_partition_run = time.monotonic() + PARTITION_MAINTENANCE_SECONDS
+        logger.info(f"Scheduling lag (s): {check_scheduler.lag_percentiles()}")
+        logger.info(f"Phase load (checks/s): {check_scheduler.phase_load()}")
+        logger.info(f"HTTP clients: {http_clients.stats()} ({evicted} idle closed)")
+        logger.info(f"DNS cache: {dns_resolver.stats()}")
+        logger.info(f"Check writer: {check_writer.stats()}")
+        logger.info(f"Check history: {check_history.stats()}")
+        logger.info(f"Health counters: {health_tracker.stats()}")
+        logger.info(f"Check rollups: {check_rollups.stats()}")
+        logger.info(f"Analysis stages: { {stage.name: stage.stats() for stage in ANALYSIS_STAGES} }")
+        logger.info(f"Shared targets: hosts {check_engine.host_limiter.stats()}, coalescing {check_engine.coalescer.stats()}")
+        if check_engine.last_stats:
+            logger.info(f"Last cycle: {check_engine.last_stats.as_dict()}")
+
+
+async def _run_forever(name: str, loop_factory):
+    """Run a daemon loop, restarting it if it crashes."""
+    while True:
+        try:
+            await loop_factory()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.critical(f"{name} loop crashed, restarting in {LOOP_RESTART_SECONDS}s: {e}", exc_info=True)
+            await asyncio.sleep(LOOP_RESTART_SECONDS)
+
+
+async def shutdown():
+    """Let in-flight checks finish (bounded), then release shared resources."""
+    if _check_batches:
+        logger.info(f"Waiting up to {SHUTDOWN_GRACE_SECONDS}s for {len(_check_batches)} in-flight check batches...")
+        _, pending = await asyncio.wait(set(_check_batches), timeout=SHUTDOWN_GRACE_SECONDS)
+        for batch in pending:
+            batch.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    await check_writer.aclose()
+    for stage in ANALYSIS_STAGES:
+        await stage.aclose(timeout=SHUTDOWN_GRACE_SECONDS)
+    await flush_check_rollups()
+    await http_clients.aclose()
+    await dispose_async_engine()
+
+    if shard_leases is not None:
+        db = get_db()
+        try:
+            shard_leases.release_all(db)
+        except Exception as e:
+            logger.error(f"Failed to release shard leases: {e}", exc_info=True)
+        finally:
+            db.close()
+
+
+async def run_daemon():
+    """Run the check, escalation and maintenance loops until SIGTERM/SIGINT."""
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    tasks = [
+        asyncio.create_task(_run_forever("Check scheduler", run_check_scheduler), name="check-scheduler"),
+        asyncio.create_task(_run_forever("Escalation", run_escalations), name="escalations"),
+        asyncio.create_task(_run_forever("Maintenance", run_maintenance), name="maintenance"),
+        asyncio.create_task(_run_forever("Compaction", run_compaction), name="compaction"),
+    ]
+    logger.info("Worker started. Checking monitors when due, escalations every 2 minutes.")
 
-def run_escalation_job():
-    """Wrapper to run async escalation check in sync scheduler."""
-    asyncio.run(check_escalations())
+    try:
+        await stop.wait()
+        logger.info("Shutdown requested, stopping worker loops...")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await shutdown()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(sig)
 
 
 def run_worker():
-    """Start the worker scheduler."""
+    """Start the worker daemon (blocks until SIGTERM/SIGINT)."""
     logger.info("Starting Uptime Monitor Worker...")
+    asyncio.run(run_daemon())
+    logger.info("Worker stopped.")
 
-    scheduler = BlockingScheduler()
 
-    # Run checks every 30 seconds
-    scheduler.add_job(
-        run_check_job,
-        'interval',
-        seconds=30,
-        id='check_monitors',
-        max_instances=1
-    )
+def run_worker_process(index: int, count: int, stats_queue):
+    """Entry point of one pool child: check partition index of count."""
+    global worker_partition, shard_leases, _stats_queue
+    worker_partition = (index, count)
+    shard_leases = build_shard_leases(index, count)
+    _stats_queue = stats_queue
+    logger.info(f"Check worker process {index}/{count} (pid {os.getpid()})")
+    run_worker()
 
-    # Check for escalations every 2 minutes
-    scheduler.add_job(
-        run_escalation_job,
-        'interval',
-        minutes=2,
-        id='check_escalations',
-        max_instances=1
-    )
 
-    try:
-        logger.info("Worker started. Checking monitors every 30 seconds, escalations every 2 minutes.")
-        scheduler.start()
-    except (KeyboardInterrupt, SystemExit):
-        logger.info("Worker stopped.")
+def main():
+    if settings.WORKER_PROCESSES > 1:
+        logger.info(f"Starting worker pool with {settings.WORKER_PROCESSES} processes...")
+        WorkerPool(
+            run_worker_process,
+            processes=settings.WORKER_PROCESSES,
+            shutdown_seconds=WORKER_SHUTDOWN_SECONDS
+        ).run()
+        logger.info("Worker pool stopped.")
+    else:
+        run_worker()
 
 
 if __name__ == '__main__':
-    run_worker()
+    main()
@@ -0,0 +1,51 @@
+"""Add check_rollups table (minute/hour/day check counts and response-time sketches)"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def upgrade():
+    """Create check_rollups table; drop latency_sketches, which its hour rows replace."""
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_name='check_rollups'
+        """))
+
+        if not result.fetchone():
+            print("Creating check_rollups table...")
+            conn.execute(text("""
+                CREATE TABLE check_rollups (
+                    monitor_id INTEGER NOT NULL REFERENCES monitors(id),
+                    granularity VARCHAR NOT NULL,
+                    bucket_start TIMESTAMP NOT NULL,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    up INTEGER NOT NULL DEFAULT 0,
+                    rt_count INTEGER NOT NULL DEFAULT 0,
+                    rt_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+                    rt_min DOUBLE PRECISION,
+                    rt_max DOUBLE PRECISION,
+                    sketch BYTEA,
+                    PRIMARY KEY (monitor_id, granularity, bucket_start)
+                )
+            """))
+            conn.execute(text("""
+                CREATE INDEX ix_check_rollups_granularity_bucket_start ON check_rollups(granularity, bucket_start);
+            """))
+            conn.commit()
+            print("check_rollups table created successfully!")
+            print("Run scripts/backfill_check_rollups.py to roll up existing checks.")
+        else:
+            print("check_rollups table already exists, skipping.")
+
+        # Response-time sketches now live in the rollups (rebuilt by the backfill)
+        conn.execute(text("DROP TABLE IF EXISTS latency_sketches"))
+        conn.commit()
+
+
+if __name__ == "__main__":
+    upgrade()
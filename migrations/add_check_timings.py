@@ -0,0 +1,29 @@
+"""Add per-phase timings to checks"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def upgrade():
+    """Add timings JSON column to checks table."""
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name='checks' AND column_name='timings'
+        """))
+
+        if not result.fetchone():
+            print("Adding timings column to checks table...")
+            conn.execute(text("ALTER TABLE checks ADD COLUMN timings JSON"))
+            conn.commit()
+            print("Migration completed successfully!")
+        else:
+            print("timings column already exists, skipping.")
+
+
+if __name__ == "__main__":
+    upgrade()
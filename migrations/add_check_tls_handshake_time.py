@@ -0,0 +1,29 @@
+"""Add tls_handshake_time column to checks table"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def upgrade():
+    """Add tls_handshake_time column to checks table."""
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name='checks' AND column_name='tls_handshake_time'
+        """))
+
+        if not result.fetchone():
+            print("Adding tls_handshake_time column to checks table...")
+            conn.execute(text("ALTER TABLE checks ADD COLUMN tls_handshake_time DOUBLE PRECISION"))
+            conn.commit()
+            print("Migration completed successfully!")
+        else:
+            print("Column already exists, skipping migration.")
+
+
+if __name__ == "__main__":
+    upgrade()
@@ -0,0 +1,40 @@
+"""Add latency_sketches table for hourly response-time percentile sketches"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def upgrade():
+    """Create latency_sketches table."""
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_name='latency_sketches'
+        """))
+
+        if not result.fetchone():
+            print("Creating latency_sketches table...")
+            conn.execute(text("""
+                CREATE TABLE latency_sketches (
+                    monitor_id INTEGER NOT NULL REFERENCES monitors(id),
+                    hour_start TIMESTAMP NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    sketch BYTEA NOT NULL,
+                    PRIMARY KEY (monitor_id, hour_start)
+                )
+            """))
+            conn.execute(text("""
+                CREATE INDEX ix_latency_sketches_hour_start ON latency_sketches(hour_start);
+            """))
+            conn.commit()
+            print("latency_sketches table created successfully!")
+        else:
+            print("latency_sketches table already exists, skipping.")
+
+
+if __name__ == "__main__":
+    upgrade()
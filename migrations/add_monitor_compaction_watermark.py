@@ -0,0 +1,29 @@
+"""Add raw check compaction watermark to monitors"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def upgrade():
+    """Add checks_compacted_until column to monitors table."""
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name='monitors' AND column_name='checks_compacted_until'
+        """))
+
+        if not result.fetchone():
+            print("Adding checks_compacted_until column to monitors table...")
+            conn.execute(text("ALTER TABLE monitors ADD COLUMN checks_compacted_until TIMESTAMP"))
+            conn.commit()
+            print("Migration completed successfully!")
+        else:
+            print("checks_compacted_until column already exists, skipping.")
+
+
+if __name__ == "__main__":
+    upgrade()
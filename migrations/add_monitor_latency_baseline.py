@@ -0,0 +1,29 @@
+"""Add streaming latency baseline state to monitors"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def upgrade():
+    """Add latency_baseline JSON column to monitors table."""
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name='monitors' AND column_name='latency_baseline'
+        """))
+
+        if not result.fetchone():
+            print("Adding latency_baseline column to monitors table...")
+            conn.execute(text("ALTER TABLE monitors ADD COLUMN latency_baseline JSON"))
+            conn.commit()
+            print("Migration completed successfully!")
+        else:
+            print("latency_baseline column already exists, skipping.")
+
+
+if __name__ == "__main__":
+    upgrade()
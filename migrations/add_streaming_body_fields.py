@@ -0,0 +1,47 @@
+"""Add streamed body stats to checks and read_body option to monitors"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def upgrade():
+    """Add bytes_read/peak_buffer_bytes to checks and read_body to monitors."""
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name='checks' AND column_name='bytes_read'
+        """))
+
+        if not result.fetchone():
+            print("Adding body stats columns to checks table...")
+            conn.execute(text("""
+                ALTER TABLE checks
+                ADD COLUMN bytes_read INTEGER,
+                ADD COLUMN peak_buffer_bytes INTEGER
+            """))
+            conn.commit()
+        else:
+            print("Check body stats columns already exist, skipping.")
+
+        result = conn.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name='monitors' AND column_name='read_body'
+        """))
+
+        if not result.fetchone():
+            print("Adding read_body column to monitors table...")
+            conn.execute(text("ALTER TABLE monitors ADD COLUMN read_body BOOLEAN DEFAULT TRUE"))
+            conn.commit()
+        else:
+            print("read_body column already exists, skipping.")
+
+        print("Migration completed successfully!")
+
+
+if __name__ == "__main__":
+    upgrade()
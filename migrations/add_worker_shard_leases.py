@@ -0,0 +1,62 @@
+"""Add worker_nodes and shard_leases tables for sharded check workers"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import engine
+
+
+def upgrade():
+    """Create worker_nodes and shard_leases tables."""
+    with engine.connect() as conn:
+        result = conn.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_name='worker_nodes'
+        """))
+
+        if not result.fetchone():
+            print("Creating worker_nodes table...")
+            conn.execute(text("""
+                CREATE TABLE worker_nodes (
+                    worker_id VARCHAR PRIMARY KEY,
+                    started_at TIMESTAMP,
+                    heartbeat_at TIMESTAMP
+                )
+            """))
+            conn.execute(text("""
+                CREATE INDEX ix_worker_nodes_heartbeat_at ON worker_nodes(heartbeat_at);
+            """))
+            conn.commit()
+            print("worker_nodes table created successfully!")
+        else:
+            print("worker_nodes table already exists, skipping.")
+
+        result = conn.execute(text("""
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_name='shard_leases'
+        """))
+
+        if not result.fetchone():
+            print("Creating shard_leases table...")
+            conn.execute(text("""
+                CREATE TABLE shard_leases (
+                    shard_id INTEGER PRIMARY KEY,
+                    owner VARCHAR,
+                    expires_at TIMESTAMP,
+                    acquired_at TIMESTAMP
+                )
+            """))
+            conn.execute(text("""
+                CREATE INDEX ix_shard_leases_owner ON shard_leases(owner);
+            """))
+            conn.commit()
+            print("shard_leases table created successfully!")
+        else:
+            print("shard_leases table already exists, skipping.")
+
+
+if __name__ == "__main__":
+    upgrade()
@@ -12,7 +12,15 @@ from migrations import (
     add_onboarding_fields,
     add_show_powered_by_field,
     add_onboarding_indexes,
-    add_tracking_events
+    add_tracking_events,
+    add_check_tls_handshake_time,
+    add_streaming_body_fields,
+    add_worker_shard_leases,
+    add_check_timings,
+    add_monitor_latency_baseline,
+    add_latency_sketches,
+    add_check_rollups,
+    add_monitor_compaction_watermark
 )
 
 from sqlalchemy import text
@@ -69,6 +77,30 @@ def main():
     print("\n9. Adding tracking_events table...")
     add_tracking_events.run_migration()
 
+    print("\n10. Adding tls_handshake_time to checks...")
+    add_check_tls_handshake_time.upgrade()
+
+    print("\n11. Adding streamed body stats and read_body option...")
+    add_streaming_body_fields.upgrade()
+
+    print("\n12. Adding worker_nodes and shard_leases...")
+    add_worker_shard_leases.upgrade()
+
+    print("\n13. Adding per-phase timings to checks...")
+    add_check_timings.upgrade()
+
+    print("\n14. Adding latency_baseline to monitors...")
+    add_monitor_latency_baseline.upgrade()
+
+    print("\n15. Adding latency_sketches...")
+    add_latency_sketches.upgrade()
+
+    print("\n16. Adding check_rollups...")
+    add_check_rollups.upgrade()
+
+    print("\n17. Adding checks_compacted_until to monitors...")
+    add_monitor_compaction_watermark.upgrade()
+
     print("\n=== All migrations completed! ===")
 
 
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Rebuild the minute/hour/day check rollups from raw checks.
+
+Usage:
+    python scripts/backfill_check_rollups.py
+    python scripts/backfill_check_rollups.py --days 90
+    python scripts/backfill_check_rollups.py --monitor 12 --monitor 34
+
+Run once after adding the check_rollups table (migrations/add_check_rollups.py),
+then once more the next day: the current day is left to the worker, so
+the day of the migration is only complete after the second run. Each
+monitor chunk and day is replaced in one transaction; safe to re-run.
+Days whose checks were compacted keep their rollups (see backfill_rollups).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from datetime import datetime, timedelta
+from app.core.database import SessionLocal
+from app.services.check_rollups import backfill_rollups
+
+
+def run_backfill(monitor_ids=None, days: int = None):
+    """Print the backfill statistics."""
+    db = SessionLocal()
+
+    try:
+        since = datetime.utcnow() - timedelta(days=days) if days else None
+        stats = backfill_rollups(db, monitor_ids=monitor_ids, since=since)
+        print("=" * 60)
+        print(f"Monitors: {stats['monitors']}  days: {stats['days']}")
+        print("=" * 60)
+        for key, value in stats.items():
+            if key not in ("monitors", "days"):
+                print(f"  {key:<16} {value}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild check rollups from raw checks")
+    parser.add_argument("--monitor", type=int, action="append", help="Only this monitor id (repeatable)")
+    parser.add_argument("--days", type=int, help="Only the last N days (default: all history)")
+    args = parser.parse_args()
+
+    run_backfill(args.monitor, args.days)
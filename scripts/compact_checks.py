@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Compact raw checks past their plan's retention into the check rollups.
+
+Usage:
+    python scripts/compact_checks.py
+    python scripts/compact_checks.py --batch-size 10000 --pause-ms 100
+    python scripts/compact_checks.py --max-minutes 30
+
+The worker does the same during CHECK_COMPACTION_HOURS
+(app/services/check_compaction.py); this runs it now, e.g. for the first
+compaction of a large history. Run scripts/backfill_check_rollups.py first
+if the rollups are not backfilled yet (compaction rebuilds missing day
+rollups itself, but one day at a time). Safe to interrupt and re-run.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.check_compaction import CheckCompactor
+
+
+def run_compaction(batch_size: int, pause_ms: int, max_minutes: int = None):
+    """Print the compaction statistics."""
+    db = SessionLocal()
+    compactor = CheckCompactor(batch_size=batch_size, minute_rollup_days=settings.CHECK_ROLLUP_MINUTE_RETENTION_DAYS)
+    deadline = time.monotonic() + max_minutes * 60 if max_minutes else None
+
+    try:
+        while compactor.step(db):
+            if deadline and time.monotonic() >= deadline:
+                print("Time limit reached, stopping (re-run to continue)")
+                break
+            time.sleep(pause_ms / 1000)
+    finally:
+        db.close()
+
+    stats = compactor.stats()
+    print("=" * 60)
+    print(f"Checks deleted: {stats['rows_deleted']}  monitor-days: {stats['monitor_days']}")
+    print("=" * 60)
+    for key, value in stats.items():
+        if key not in ("rows_deleted", "monitor_days"):
+            print(f"  {key:<24} {value}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact raw checks past retention into rollups")
+    parser.add_argument("--batch-size", type=int, default=settings.CHECK_COMPACTION_BATCH_SIZE,
+                        help="Checks deleted per batch")
+    parser.add_argument("--pause-ms", type=int, default=settings.CHECK_COMPACTION_PAUSE_MS,
+                        help="Pause between batches")
+    parser.add_argument("--max-minutes", type=int, help="Stop after this many minutes (default: until done)")
+    args = parser.parse_args()
+
+    run_compaction(args.batch_size, args.pause_ms, args.max_minutes)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+List, create and expire the monthly partitions of the checks table.
+
+Usage:
+    python scripts/manage_check_partitions.py
+    python scripts/manage_check_partitions.py --ahead 6
+    python scripts/manage_check_partitions.py --drop-older-than 400 --dry-run
+
+The worker does the same every hour with CHECK_PARTITION_MONTHS_AHEAD and
+CHECK_PARTITION_RETENTION_DAYS (app/services/check_partitions.py). The
+checks table must have been partitioned first (alembic upgrade head).
+--drop-older-than is raised to the longest plan raw_check_retention_days,
+and nothing newer than the oldest uncompacted check is dropped.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.check_partitions import (
+    is_partitioned, list_partitions, ensure_partitions, drop_expired_partitions
+)
+
+
+def run_partitions(ahead: int, drop_older_than: int, dry_run: bool = False):
+    """Print the partitions and what was created or dropped."""
+    db = SessionLocal()
+
+    try:
+        if not is_partitioned(db):
+            print("checks is not partitioned (run: alembic upgrade head on PostgreSQL)")
+            return
+
+        created = [] if dry_run else ensure_partitions(db, ahead)
+        dropped = drop_expired_partitions(db, drop_older_than, dry_run=dry_run)
+
+        print("=" * 60)
+        print(f"Created: {created or '-'}")
+        print(f"{'Would drop' if dry_run else 'Dropped'}: {dropped or '-'}")
+        print("=" * 60)
+        for partition in list_partitions(db):
+            print(f"  {partition.name:<20} {partition.lower or 'MINVALUE'} -> {partition.upper or 'MAXVALUE'}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the monthly partitions of the checks table")
+    parser.add_argument("--ahead", type=int, default=settings.CHECK_PARTITION_MONTHS_AHEAD,
+                        help="Months of partitions to keep created ahead")
+    parser.add_argument("--drop-older-than", type=int, default=settings.CHECK_PARTITION_RETENTION_DAYS,
+                        help="Drop partitions entirely older than this many days (0 = keep all)")
+    parser.add_argument("--dry-run", action="store_true", help="Only show what would be dropped")
+    args = parser.parse_args()
+
+    run_partitions(args.ahead, args.drop_older_than, args.dry_run)
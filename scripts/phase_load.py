@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Show how monitor checks are spread across their interval.
+
+Usage:
+    python scripts/phase_load.py
+    python scripts/phase_load.py --interval 60
+
+Prints, for each interval, the number of checks starting in each second of
+the interval (using the same phase assignment as the worker). A flat
+distribution means no thundering-herd bursts.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from app.core.database import SessionLocal
+from app.models.monitor import Monitor
+from app.services.check_scheduler import phase_load_histogram
+
+
+def show_phase_load(interval_filter: int = None):
+    """Print load per second-of-interval for active monitors."""
+    db = SessionLocal()
+
+    try:
+        rows = db.query(Monitor.id, Monitor.interval).filter(Monitor.is_active == True).all()
+        histogram = phase_load_histogram((monitor_id, interval) for monitor_id, interval in rows)
+
+        if not histogram:
+            print("No active monitors")
+            return
+
+        for interval in sorted(histogram):
+            if interval_filter and interval != interval_filter:
+                continue
+            buckets = histogram[interval]
+            total = sum(buckets)
+            peak = max(buckets)
+            print("=" * 60)
+            print(f"Interval {interval}s: {total} monitors, peak {peak}/s, mean {total / len(buckets):.2f}/s")
+            print("=" * 60)
+            for second, count in enumerate(buckets):
+                if count:
+                    print(f"  +{second:>4}s  {count:>4}  {'#' * min(count, 50)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show check load per second of interval")
+    parser.add_argument("--interval", type=int, help="Only show this interval (seconds)")
+    args = parser.parse_args()
+
+    show_phase_load(args.interval)
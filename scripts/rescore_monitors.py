@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Recompute flapping, degradation and health score for all active monitors.
+
+Usage:
+    python scripts/rescore_monitors.py
+    python scripts/rescore_monitors.py --dry-run
+    python scripts/rescore_monitors.py --monitor 12 --monitor 34
+
+Runs the vectorized batch pass (app/services/batch_intelligence.py): a few
+bulk queries, one NumPy pass over every monitor, and one bulk UPDATE of the
+monitors whose values changed.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.batch_intelligence import rescore_monitors
+
+
+def run_rescore(monitor_ids=None, dry_run: bool = False):
+    """Print the batch pass statistics."""
+    db = SessionLocal()
+
+    try:
+        stats = rescore_monitors(
+            db,
+            monitor_ids=monitor_ids,
+            window=settings.CHECK_HISTORY_SIZE,
+            write=not dry_run
+        )
+        print("=" * 60)
+        print(f"Monitors: {stats['monitors']}  changed: {stats['changed']}" + (" (dry run)" if dry_run else ""))
+        print("=" * 60)
+        for key, value in stats.items():
+            if key not in ("monitors", "changed"):
+                print(f"  {key:<16} {value}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score all monitors in one vectorized pass")
+    parser.add_argument("--monitor", type=int, action="append", help="Only this monitor id (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Compute without writing")
+    args = parser.parse_args()
+
+    run_rescore(args.monitor, args.dry_run)
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import uuid
+from types import SimpleNamespace
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_pipeline_stages_keep_monitor_order_batch_and_apply_backpressure():
+    _set_test_env(f"sqlite:///test_pipeline_{uuid.uuid4().hex}.db")
+    from app.services.analysis_pipeline import CheckEvent, PipelineStage
+
+    async def scenario():
+        seen = {}
+        batch_sizes = []
+
+        async def analyze(events):
+            batch_sizes.append(len(events))
+            await asyncio.sleep(0.001)
+            for event in events:
+                if event.check.seq < 0:
+                    raise RuntimeError("bad check")
+                await incidents.put(event)
+
+        async def detect(events):
+            for event in events:
+                seen.setdefault(event.monitor_id, []).append(event.check.seq)
+
+        incidents = PipelineStage("incidents", detect, concurrency=3)
+        intelligence = PipelineStage("intelligence", analyze, concurrency=2, max_backlog=20, batch_size=5)
+
+        for seq in range(50):
+            for monitor_id in range(4):
+                await intelligence.put(CheckEvent(monitor_id, SimpleNamespace(seq=seq)))
+        await intelligence.put(CheckEvent(1, SimpleNamespace(seq=-1)))
+
+        await intelligence.aclose()
+        await incidents.aclose()
+        return seen, batch_sizes, intelligence.stats(), incidents.stats()
+
+    seen, batch_sizes, intelligence_stats, incident_stats = asyncio.run(scenario())
+
+    # Every monitor's checks reach the last stage, in order
+    assert seen == {monitor_id: list(range(50)) for monitor_id in range(4)}
+    assert max(batch_sizes) == 5
+    assert intelligence_stats["processed"] == 200
+    assert intelligence_stats["failed"] == 1
+    assert intelligence_stats["backpressure_waits"] > 0
+    assert intelligence_stats["backlog"] == 0
+    assert incident_stats["processed"] == 200
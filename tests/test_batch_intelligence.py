@@ -0,0 +1,95 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_batch_rescore_matches_per_monitor_detectors():
+    db_url = f"sqlite:///test_batch_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    import app.models  # noqa: F401 (register all tables)
+    from app.models.user import User
+    from app.models.monitor import Monitor
+    from app.models.check import Check
+    from app.models.incident import Incident
+    from app.services.batch_intelligence import rescore_monitors
+    from app.services.intelligent_incident_service import (
+        calculate_health_score,
+        detect_flapping,
+        detect_progressive_degradation,
+    )
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    user = User(email="batch@example.com", hashed_password="test", plan="FREE")
+    db.add(user)
+    db.commit()
+    flapping = Monitor(user_id=user.id, name="flapping", url="https://a.example.com")
+    degrading = Monitor(user_id=user.id, name="degrading", url="https://b.example.com")
+    steady = Monitor(user_id=user.id, name="steady", url="https://c.example.com")
+    quiet = Monitor(user_id=user.id, name="quiet", url="https://d.example.com")
+    monitors = [flapping, degrading, steady, quiet]
+    db.add_all(monitors)
+    db.commit()
+
+    now = datetime.utcnow()
+    rows = []
+    for i in range(8):
+        rows.append(Check(monitor_id=flapping.id, status=["up", "down", "timeout"][i % 3],
+                          response_time=200.0 if i % 3 == 0 else None,
+                          checked_at=now - timedelta(minutes=20 - i)))
+    for i in range(60):
+        slow = i >= 54
+        rows.append(Check(monitor_id=degrading.id, status="up", response_time=3000.0 if slow else 300.0,
+                          checked_at=now - timedelta(minutes=60 - i)))
+    for i in range(40):
+        rows.append(Check(monitor_id=steady.id, status="up" if i % 10 else "down",
+                          response_time=150.0 + i if i % 10 else None,
+                          checked_at=now - timedelta(hours=40 - i)))
+    db.add_all(rows)
+    db.add(Incident(monitor_id=steady.id, incident_type="down", started_at=now - timedelta(days=3)))
+    db.commit()
+
+    stats = rescore_monitors(db, window=128)
+    assert stats["monitors"] == 4
+    assert stats["flapping"] == 1
+    assert stats["degrading"] == 1
+
+    for monitor in monitors:
+        db.refresh(monitor)
+        current = db.query(Check).filter(Check.monitor_id == monitor.id).order_by(Check.id.desc()).first()
+        expected_degrading = current is not None and detect_progressive_degradation(db, monitor, current) is not None
+        expected_health = calculate_health_score(db, monitor)
+
+        assert monitor.is_flapping == (detect_flapping(db, monitor) is not None)
+        assert monitor.is_degrading == expected_degrading
+        assert monitor.health_score == expected_health["score"]
+        assert monitor.health_grade == expected_health["grade"]
+
+    # Nothing changed since, so a second pass writes nothing
+    assert rescore_monitors(db, window=128)["changed"] == 0
+
+    db.close()
+    engine.dispose()
+    os.remove(db_url.replace("sqlite:///", ""))
@@ -0,0 +1,174 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_compaction_keeps_failures_transitions_and_rollups():
+    db_url = f"sqlite:///test_compaction_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    import app.models  # noqa: F401 (register all tables)
+    from app.models.user import User
+    from app.models.monitor import Monitor
+    from app.models.check import Check
+    from app.models.check_rollup import CheckRollup
+    from app.services.check_compaction import CheckCompactor, in_off_peak, raw_check_retention_days
+    from app.services.check_rollups import backfill_rollups, rollup_totals
+
+    assert raw_check_retention_days("FREE") == 31
+    assert raw_check_retention_days("AGENCY") == 400
+    assert in_off_peak("2-6", datetime(2026, 10, 17, 2)) and not in_off_peak("2-6", datetime(2026, 10, 17, 6))
+    assert in_off_peak("22-3", datetime(2026, 10, 17, 23)) and in_off_peak("22-3", datetime(2026, 10, 17, 1))
+    assert not in_off_peak("22-3", datetime(2026, 10, 17, 12))
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    free = User(email="free@example.com", hashed_password="test", plan="FREE")
+    agency = User(email="agency@example.com", hashed_password="test", plan="AGENCY")
+    db.add_all([free, agency])
+    db.commit()
+    monitor = Monitor(user_id=free.id, name="free", url="https://free.example.com")
+    kept = Monitor(user_id=agency.id, name="agency", url="https://agency.example.com")
+    db.add_all([monitor, kept])
+    db.commit()
+
+    # Three old days (past FREE retention) and one recent day, every 10 minutes
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    old_days = [today - timedelta(days=40 + i) for i in range(3)]
+    recent = today - timedelta(days=2)
+    pattern = ["up"] * 50 + ["down", "timeout", "up", "up", "error"] + ["up"] * 89
+    for m in (monitor, kept):
+        for day in old_days + [recent]:
+            for i, status in enumerate(pattern):
+                db.add(Check(monitor_id=m.id, status=status,
+                             response_time=100.0 + i if status == "up" else None,
+                             checked_at=day + timedelta(minutes=10 * i)))
+    db.commit()
+
+    # Rollups of the oldest day missing: compaction rebuilds them first
+    backfill_rollups(db, since=old_days[1])
+    raw_before = {m.id: db.query(Check).filter(Check.monitor_id == m.id).count() for m in (monitor, kept)}
+    totals_before = rollup_totals(db, [monitor.id], old_days[-1], today)
+
+    compactor = CheckCompactor(batch_size=40, minute_rollup_days=14)
+    steps = 0
+    while compactor.step(db):
+        steps += 1
+        assert steps < 100
+    stats = compactor.stats()
+
+    # Per old day kept: anchor, down, timeout, recovery up, error, recovery up
+    per_day = len(pattern)
+    assert stats["rows_deleted"] == 3 * (per_day - 6)
+    assert stats["rollups_rebuilt"] == 1 and stats["monitor_days"] == 3
+    for day in old_days:
+        left = db.query(Check).filter(
+            Check.monitor_id == monitor.id, Check.checked_at >= day, Check.checked_at < day + timedelta(days=1)
+        ).order_by(Check.checked_at).all()
+        assert [c.status for c in left] == ["up", "down", "timeout", "up", "error", "up"]
+        assert left[0].checked_at == day
+    assert db.query(Check).filter(Check.monitor_id == monitor.id).count() == raw_before[monitor.id] - stats["rows_deleted"]
+    assert db.query(Check).filter(Check.monitor_id == kept.id).count() == raw_before[kept.id]
+
+    # Uptime and response times still read the same from the rollups
+    totals_after = rollup_totals(db, [monitor.id], old_days[-1], today)
+    assert totals_after[monitor.id]["total"] == totals_before[monitor.id]["total"] + per_day
+    assert totals_after[monitor.id]["up"] == totals_before[monitor.id]["up"] + pattern.count("up")
+
+    # Old minute rollups are gone, hour and day rollups stay
+    assert db.query(CheckRollup).filter(
+        CheckRollup.granularity == "minute", CheckRollup.bucket_start < today - timedelta(days=14)
+    ).count() == 0
+    assert db.query(CheckRollup).filter(
+        CheckRollup.monitor_id == monitor.id, CheckRollup.granularity == "day"
+    ).count() == 4
+
+    db.refresh(monitor)
+    db.refresh(kept)
+    assert monitor.checks_compacted_until == today - timedelta(days=31)
+    assert kept.checks_compacted_until == today - timedelta(days=400)  # nothing that old: watermark only
+
+    # Nothing left to do on a second run
+    again = CheckCompactor(batch_size=40)
+    while again.step(db):
+        pass
+    assert again.stats()["rows_deleted"] == 0 and again.stats()["rollups_rebuilt"] == 0
+    db.close()
+
+
+def test_backfill_after_compaction_keeps_rollups():
+    db_url = f"sqlite:///test_compaction_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    import app.models  # noqa: F401 (register all tables)
+    from app.models.user import User
+    from app.models.monitor import Monitor
+    from app.models.check import Check
+    from app.services.check_compaction import CheckCompactor
+    from app.services.check_rollups import backfill_rollups, rollup_totals
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    user = User(email="free@example.com", hashed_password="test", plan="FREE")
+    db.add(user)
+    db.commit()
+    monitor = Monitor(user_id=user.id, name="free", url="https://free.example.com")
+    db.add(monitor)
+    db.commit()
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    days = [today - timedelta(days=40 + i) for i in range(2)] + [today - timedelta(days=2)]
+    pattern = ["up"] * 60 + ["down"] + ["up"] * 83
+    for day in days:
+        for i, status in enumerate(pattern):
+            db.add(Check(monitor_id=monitor.id, status=status,
+                         response_time=100.0 + i if status == "up" else None,
+                         checked_at=day + timedelta(minutes=10 * i)))
+    db.commit()
+    backfill_rollups(db)
+
+    compactor = CheckCompactor(batch_size=1000)
+    while compactor.step(db):
+        pass
+    assert compactor.stats()["rows_deleted"] > 0
+    totals = rollup_totals(db, [monitor.id], days[1], today)
+    assert totals[monitor.id]["total"] == 3 * len(pattern)
+
+    # Every day before the watermark (31 days ago) is skipped, the recent one is rebuilt
+    stats = backfill_rollups(db)
+    assert stats["skipped"] == 10
+    assert rollup_totals(db, [monitor.id], days[1], today) == totals
+
+    # A day compacted before its watermark moved (interrupted run) is kept as well
+    monitor.checks_compacted_until = None
+    db.commit()
+    stats = backfill_rollups(db)
+    assert stats["skipped"] == 2
+    assert rollup_totals(db, [monitor.id], days[1], today) == totals
+    db.close()
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import uuid
+from types import SimpleNamespace
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_check_engine_bounds_concurrency_and_cancels_stragglers():
+    _set_test_env(f"sqlite:///test_engine_{uuid.uuid4().hex}.db")
+
+    from app.services.check_engine import CheckEngine
+
+    in_flight = 0
+    max_seen = 0
+    results = []
+
+    async def probe(monitor):
+        nonlocal in_flight, max_seen
+        in_flight += 1
+        max_seen = max(max_seen, in_flight)
+        try:
+            await asyncio.sleep(monitor.delay)
+            return SimpleNamespace(status="up")
+        finally:
+            in_flight -= 1
+
+    async def on_result(monitor, check):
+        results.append(monitor.id)
+
+    monitors = [SimpleNamespace(id=i, delay=0.01) for i in range(10)]
+    monitors.append(SimpleNamespace(id=99, delay=10))
+
+    engine = CheckEngine(max_concurrency=3, cycle_deadline_seconds=0.5)
+    stats = asyncio.run(engine.run_cycle(monitors, probe, on_result))
+
+    assert max_seen <= 3
+    assert sorted(results) == list(range(10))
+    assert stats.completed == 10
+    assert stats.cancelled == 1
+    assert stats.checks_per_second > 0
+
+
+def test_check_engine_caps_per_host_and_coalesces_identical_probes():
+    _set_test_env(f"sqlite:///test_engine_{uuid.uuid4().hex}.db")
+
+    from app.models.check import Check
+    from app.services.check_engine import CheckEngine
+
+    in_flight = {}
+    max_seen = {}
+    requests = []
+    results = {}
+
+    async def probe(monitor):
+        host = monitor.url.split("/")[2]
+        in_flight[host] = in_flight.get(host, 0) + 1
+        max_seen[host] = max(max_seen.get(host, 0), in_flight[host])
+        requests.append(monitor.url)
+        try:
+            await asyncio.sleep(0.02)
+            return Check(monitor_id=monitor.id, status="up", response_time=20, timings={"wait": 20.0})
+        finally:
+            in_flight[host] -= 1
+
+    async def on_result(monitor, check):
+        results[monitor.id] = check
+
+    def monitor(id, url):
+        return SimpleNamespace(id=id, url=url, timeout=30, read_body=True)
+
+    # 6 distinct paths on one host, plus 5 monitors of the same popular URL
+    monitors = [monitor(i, f"https://agency.example/page{i}") for i in range(6)]
+    monitors += [monitor(10 + i, "https://popular.example/") for i in range(5)]
+
+    engine = CheckEngine(max_concurrency=50, cycle_deadline_seconds=5, max_per_host=2, coalesce_window_seconds=5)
+    stats = asyncio.run(engine.run_cycle(monitors, probe, on_result))
+
+    assert stats.completed == 11
+    assert max_seen["agency.example"] <= 2
+    assert requests.count("https://popular.example/") == 1
+    assert sorted(results) == [0, 1, 2, 3, 4, 5, 10, 11, 12, 13, 14]
+    shared = [results[10 + i] for i in range(5)]
+    assert len({id(check) for check in shared}) == 5
+    assert [check.monitor_id for check in shared] == [10, 11, 12, 13, 14]
+    assert all(check.status == "up" and check.timings == {"wait": 20.0} for check in shared)
+    assert engine.coalescer.coalesced == 4
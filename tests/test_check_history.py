@@ -0,0 +1,94 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_history_matches_database_queries_for_detectors():
+    db_url = f"sqlite:///test_history_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    import app.models  # noqa: F401 (register all tables)
+    from app.models.user import User
+    from app.models.monitor import Monitor
+    from app.models.check import Check
+    from app.services.check_history import CheckHistoryCache
+    from app.services.incident_service import _count_consecutive_failures
+    from app.services.intelligent_incident_service import (
+        detect_flapping,
+        detect_progressive_degradation,
+        calculate_health_score,
+    )
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    user = User(email="history@example.com", hashed_password="test", plan="FREE")
+    db.add(user)
+    db.commit()
+    monitor = Monitor(user_id=user.id, name="m", url="https://example.com")
+    db.add(monitor)
+    db.commit()
+
+    # 40 fast up checks, then a slowdown, flapping and a run of failures
+    start = datetime.utcnow() - timedelta(minutes=59)
+    statuses = ["up"] * 40 + ["up"] * 6 + ["down", "up", "timeout", "up", "down", "down", "down"]
+    for i, status in enumerate(statuses):
+        response_time = (100.0 if i < 40 else 4000.0) if status == "up" else None
+        timings = {"connect": 5.0, "wait": response_time - 10} if response_time else None
+        db.add(Check(
+            monitor_id=monitor.id, status=status, response_time=response_time,
+            checked_at=start + timedelta(minutes=i), timings=timings
+        ))
+    db.commit()
+    checks = db.query(Check).order_by(Check.id).all()
+
+    histories = CheckHistoryCache(capacity=32)
+    history = histories.get(db, monitor.id)
+    assert len(history) == 32
+    assert history.add_check(checks[-1]) is False  # already seeded
+    assert [r.id for r in history.recent(limit=3)] == [c.id for c in checks[-3:][::-1]]
+
+    current = checks[-1]
+    assert _count_consecutive_failures(db, monitor.id, current, history) == \
+        _count_consecutive_failures(db, monitor.id, current) == 3
+    assert detect_flapping(db, monitor, history=history) == detect_flapping(db, monitor)
+
+    slow = checks[45]
+    from_db = detect_progressive_degradation(db, monitor, slow)
+    from_history = CheckHistoryCache(capacity=64).get(db, monitor.id)
+    assert from_db and from_db["degraded_phase"] == "wait"
+    assert detect_progressive_degradation(db, monitor, slow, history=from_history) == from_db
+
+    assert calculate_health_score(db, monitor, history=from_history) == calculate_health_score(db, monitor)
+
+    # Ring buffer keeps only the newest entries
+    next_check = Check(id=current.id + 1, monitor_id=monitor.id, status="up", response_time=90.0,
+                       checked_at=datetime.utcnow(), timings=None)
+    assert history.add_check(next_check) is True
+    assert len(history) == 32
+    newest = history.recent(limit=1)[0]
+    assert (newest.id, newest.status, newest.response_time, newest.timings) == (next_check.id, "up", 90.0, None)
+
+    histories.retain({})
+    assert monitor.id not in histories
+    db.close()
@@ -0,0 +1,83 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_partition_planning_and_expiry():
+    db_url = f"sqlite:///test_partitions_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    import app.models  # noqa: F401 (register all tables)
+    from app.services.check_partitions import (
+        parse_bound, plan_partitions, expired_partitions, ensure_partitions, drop_expired_partitions, drop_cutoff
+    )
+    from app.models.user import User
+    from app.models.monitor import Monitor
+    from app.models.check import Check
+
+    legacy = parse_bound("checks_legacy", "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00')")
+    november = parse_bound("checks_2026_11", "FOR VALUES FROM ('2026-11-01 00:00:00') TO ('2026-12-01 00:00:00')")
+    assert legacy.lower is None and legacy.upper == datetime(2026, 11, 1)
+    assert november.lower == datetime(2026, 11, 1)
+    assert parse_bound("checks_default", "DEFAULT") is None
+
+    # Current month is covered by the legacy partition; only later gaps are planned
+    planned = plan_partitions([legacy, november], datetime(2026, 10, 17, 9, 30), months_ahead=3)
+    assert planned == [
+        ("checks_2026_12", datetime(2026, 12, 1), datetime(2027, 1, 1)),
+        ("checks_2027_01", datetime(2027, 1, 1), datetime(2027, 2, 1)),
+    ]
+    assert plan_partitions([], datetime(2026, 12, 31), months_ahead=0) == [
+        ("checks_2026_12", datetime(2026, 12, 1), datetime(2027, 1, 1))
+    ]
+
+    # Only partitions whose whole range is before the cutoff expire
+    assert expired_partitions([legacy, november], datetime(2026, 11, 15)) == [legacy]
+    assert expired_partitions([legacy, november], datetime(2026, 12, 1)) == [legacy, november]
+    assert expired_partitions([legacy, november], datetime(2026, 10, 31)) == []
+
+    # Plain (non-PostgreSQL) checks table: nothing to manage
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    assert ensure_partitions(db) == []
+    assert drop_expired_partitions(db, retention_days=30) == []
+
+    # The drop cutoff never passes the longest plan retention (AGENCY, 400 days)
+    # nor checks not compacted yet
+    now = datetime(2026, 10, 17)
+    assert drop_cutoff(db, 0, now) is None
+    assert drop_cutoff(db, 30, now) == now - timedelta(days=400)
+    assert drop_cutoff(db, 500, now) == now - timedelta(days=500)
+    user = User(email="free@example.com", hashed_password="test", plan="FREE")
+    db.add(user)
+    db.commit()
+    compacted = Monitor(user_id=user.id, name="a", url="https://a.example.com",
+                        checks_compacted_until=now - timedelta(days=450))
+    fresh = Monitor(user_id=user.id, name="b", url="https://b.example.com")
+    db.add_all([compacted, fresh])
+    db.commit()
+    assert drop_cutoff(db, 30, now) == now - timedelta(days=450)
+    db.add(Check(monitor_id=fresh.id, status="up", checked_at=now - timedelta(days=600)))
+    db.commit()
+    assert drop_cutoff(db, 30, now) == now - timedelta(days=600)
+    db.close()
@@ -0,0 +1,120 @@
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_rollups_match_raw_checks_over_any_window():
+    db_url = f"sqlite:///test_rollups_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    import app.models  # noqa: F401 (register all tables)
+    from app.models.user import User
+    from app.models.monitor import Monitor
+    from app.models.check import Check
+    from app.models.check_rollup import CheckRollup
+    from app.services.check_rollups import cover, backfill_rollups, record_rollups, rollup_totals
+    from app.services.status_page_service import calculate_uptime_percentage, get_daily_uptime
+
+    # Whole days in the middle, hours then minutes towards the edges
+    since, until = datetime(2026, 10, 1, 10, 5, 30), datetime(2026, 10, 4, 10, 20)
+    assert cover(since, until) == [
+        ("minute", datetime(2026, 10, 1, 10, 5), datetime(2026, 10, 1, 11)),
+        ("hour", datetime(2026, 10, 1, 11), datetime(2026, 10, 2)),
+        ("day", datetime(2026, 10, 2), datetime(2026, 10, 4)),
+        ("hour", datetime(2026, 10, 4), datetime(2026, 10, 4, 10)),
+        ("minute", datetime(2026, 10, 4, 10), datetime(2026, 10, 4, 10, 20)),
+    ]
+    assert cover(datetime(2026, 10, 1, 10, 5), datetime(2026, 10, 1, 10, 5)) == []
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    user = User(email="rollups@example.com", hashed_password="test", plan="FREE")
+    db.add(user)
+    db.commit()
+    monitors = [Monitor(user_id=user.id, name=f"m{i}", url=f"https://example{i}.com") for i in range(2)]
+    db.add_all(monitors)
+    db.commit()
+
+    # Three days of history written before rollups existed
+    rng = random.Random(5)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    first = today - timedelta(days=3)
+    for monitor in monitors:
+        for i in range(3 * 24 * 6):
+            up = rng.random() < 0.9
+            db.add(Check(monitor_id=monitor.id, status="up" if up else "down",
+                         response_time=rng.uniform(50, 900) if up else None,
+                         checked_at=first + timedelta(minutes=10 * i, seconds=rng.randint(0, 59))))
+    db.commit()
+
+    stats = backfill_rollups(db)
+    assert stats["days"] == 3 and stats["checks"] == 2 * 3 * 24 * 6
+    rows = db.query(CheckRollup).count()
+    assert backfill_rollups(db)["rows"] == rows  # re-running replaces, never adds
+
+    # Today's checks go through the write path (one-off checks here)
+    todays = [Check(monitor_id=monitors[0].id, status=status, response_time=rt,
+                    checked_at=today + timedelta(minutes=minute))
+              for status, rt, minute in (("up", 120.0, 1), ("down", None, 2), ("up", 80.0, 2))]
+    db.add_all(todays)
+    db.commit()
+    record_rollups(db, todays)
+
+    def raw(monitor_id, since, until):
+        checks = db.query(Check).filter(
+            Check.monitor_id == monitor_id, Check.checked_at >= since, Check.checked_at < until
+        ).all()
+        rts = [c.response_time for c in checks if c.status == "up" and c.response_time is not None]
+        return {
+            "total": len(checks),
+            "up": sum(1 for c in checks if c.status == "up"),
+            "rt_count": len(rts),
+            "rt_sum": sum(rts),
+            "rt_min": min(rts, default=None),
+            "rt_max": max(rts, default=None),
+        }
+
+    windows = [
+        (first, today + timedelta(hours=1)),
+        (first + timedelta(hours=5, minutes=17), today - timedelta(hours=2, minutes=33)),
+        (today - timedelta(minutes=45), today + timedelta(minutes=2)),
+        (today + timedelta(minutes=2), today + timedelta(minutes=3)),
+    ]
+    for since, until in windows:
+        totals = rollup_totals(db, [m.id for m in monitors], since, until)
+        for monitor in monitors:
+            expected = raw(monitor.id, since, until)
+            got = totals[monitor.id]
+            assert {k: got[k] for k in ("total", "up", "rt_count", "rt_min", "rt_max")} == \
+                {k: expected[k] for k in ("total", "up", "rt_count", "rt_min", "rt_max")}
+            assert abs(got["rt_sum"] - expected["rt_sum"]) < 1e-6
+
+    # Status page reads: 90-day bars and uptime come from the rollups
+    daily = get_daily_uptime(db, monitors[0].id, days=90)
+    assert [day["date"] for day in daily] == [(first + timedelta(days=i)).date().isoformat() for i in range(4)]
+    assert daily[-1] == {"date": today.date().isoformat(), "uptime_percentage": 66.67, "total_checks": 3}
+    week = raw(monitors[1].id, datetime.utcnow() - timedelta(days=7), datetime.utcnow())
+    assert calculate_uptime_percentage(db, monitors[1].id, days=7) == round(week["up"] / week["total"] * 100, 2)
+    db.close()
@@ -0,0 +1,124 @@
+import os
+import uuid
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_scheduler_pops_only_due_monitors_and_applies_changes():
+    _set_test_env(f"sqlite:///test_scheduler_{uuid.uuid4().hex}.db")
+
+    from app.services.check_scheduler import CheckScheduler
+
+    now = 1_000_000.0
+    scheduler = CheckScheduler(spread_phases=False)
+    scheduler.sync([
+        (1, 60, True, now - 60),   # due now
+        (2, 60, True, now - 30),   # due in 30s
+        (3, 300, True, None),      # never checked -> due now
+        (4, 60, False, now - 600), # paused
+    ], now=now)
+
+    assert sorted(scheduler.pop_due(now=now)) == [1, 3]
+    assert scheduler.seconds_until_next(now=now) == 30
+    # In-flight monitors are not dispatched twice
+    assert scheduler.pop_due(now=now + 1) == []
+
+    # Interval change moves the pending due time without a reload
+    changes = scheduler.sync([
+        (1, 60, True, now), (2, 120, True, now - 30), (3, 300, True, now), (4, 60, True, now - 600),
+    ], now=now)
+    assert changes["interval_changed"] == 1
+    assert changes["added"] == 1
+    assert scheduler.pop_due(now=now + 31) == [4]
+    assert scheduler.pop_due(now=now + 89) == []
+    assert scheduler.pop_due(now=now + 90) == [2]
+
+    # Removed monitors disappear, completed checks are rescheduled
+    scheduler.sync([(1, 60, True, now), (2, 120, True, now)], now=now)
+    assert 3 not in scheduler and 4 not in scheduler
+    scheduler.reschedule(1, checked_ts=now + 5)
+    assert scheduler.pop_due(now=now + 64) == []
+    assert scheduler.pop_due(now=now + 65) == [1]
+
+    # Pause/resume without a reload
+    scheduler.pause(2)
+    scheduler.reschedule(2, checked_ts=now + 90)
+    assert scheduler.pop_due(now=now + 1000) == []
+    scheduler.resume(2, last_checked_ts=now + 90, now=now + 1000)
+    assert scheduler.pop_due(now=now + 1000) == [2]
+
+    lag = scheduler.lag_percentiles()
+    assert lag["samples"] == 6
+    assert lag["p50"] == 0.0
+
+
+def test_phases_spread_same_interval_monitors_evenly():
+    _set_test_env(f"sqlite:///test_scheduler_{uuid.uuid4().hex}.db")
+
+    from app.services.check_scheduler import CheckScheduler, assign_phases, phase_load_histogram
+
+    monitors = [(monitor_id, 60) for monitor_id in range(1, 121)]
+    phases = assign_phases(monitors)
+    # Deterministic and spread: at most three checks in any second of the interval
+    assert phases == assign_phases(reversed(monitors))
+    assert all(0 <= phase < 60 for phase in phases.values())
+    assert max(phase_load_histogram(monitors)[60]) <= 3
+
+    # All checked at the same instant: the next checks are staggered over the interval
+    now = 1_000_020.0
+    scheduler = CheckScheduler()
+    scheduler.sync([(m, i, True, now - 60) for m, i in monitors], now=now)
+    assert scheduler.phase_load()["peak_per_second"] <= 3
+    due = scheduler.pop_due(now=now)
+    assert 0 < len(due) < len(monitors)
+    for monitor_id in due:
+        scheduler.reschedule(monitor_id, checked_ts=now)
+    # Once on their slots, at most three monitors start per second
+    for second in range(1, 61):
+        assert len(scheduler.pop_due(now=now + second)) <= 3
+
+    # Adding or removing a monitor leaves every other phase where it was
+    changes = scheduler.sync([(m, i, True, now) for m, i in monitors + [(500, 60)]], now=now)
+    assert changes["added"] == 1
+    assert changes["rephased"] == 1  # only the newcomer
+    assert assign_phases(monitors + [(500, 60)]) == {**phases, 500: assign_phases([(500, 60)])[500]}
+    changes = scheduler.sync([(m, i, True, now) for m, i in monitors[1:]], now=now)
+    assert changes["removed"] == 2 and changes["rephased"] == 0
+
+
+def test_monitor_paused_during_its_check_stays_paused():
+    _set_test_env(f"sqlite:///test_scheduler_{uuid.uuid4().hex}.db")
+
+    from app.services.check_scheduler import CheckScheduler
+
+    now = 1_000_000.0
+    scheduler = CheckScheduler(spread_phases=False)
+    scheduler.sync([(1, 60, True, now - 60)], now=now)
+    assert scheduler.pop_due(now=now) == [1]
+
+    # Paused while in flight: neither the completed nor a retried check re-queues it
+    scheduler.pause(1)
+    scheduler.reschedule(1, checked_ts=now + 2)
+    scheduler.reschedule(1, retry_in=5)
+    assert scheduler.is_paused(1)
+    assert scheduler.next_due_at() is None
+    assert scheduler.pop_due(now=now + 1000) == []
+
+    # Resumed: due one interval after the check that was in flight
+    scheduler.resume(1, now=now + 10)
+    assert scheduler.pop_due(now=now + 61) == []
+    assert scheduler.pop_due(now=now + 62) == [1]
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_writer_batches_checks_and_updates_monitor_state():
+    db_url = f"sqlite:///test_writer_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    import app.models  # noqa: F401 (register all tables)
+    from app.models.user import User
+    from app.models.monitor import Monitor
+    from app.models.check import Check
+    from app.services.check_writer import CheckResultWriter
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    db = Session()
+    user = User(email="writer@example.com", hashed_password="test", plan="FREE")
+    db.add(user)
+    db.commit()
+    monitors = [Monitor(user_id=user.id, name=f"m{i}", url=f"https://example{i}.com") for i in range(3)]
+    db.add_all(monitors)
+    db.commit()
+
+    async def run():
+        writer = CheckResultWriter(Session, batch_size=4, flush_interval_ms=20)
+        start = datetime.utcnow()
+        durables = []
+        for i in range(5):
+            monitor = monitors[i % 3]
+            check = Check(
+                monitor_id=monitor.id, status="down" if i == 4 else "up",
+                response_time=100.0, checked_at=start + timedelta(seconds=i)
+            )
+            durables.append((monitor, await writer.submit(check)))
+
+        written = [(monitor, await durable) for monitor, durable in durables]
+        stats = writer.stats()
+        await writer.aclose()
+        return written, stats
+
+    written, stats = asyncio.run(run())
+
+    # Written in bulk, not one transaction per check
+    assert stats["rows_written"] == 5
+    assert stats["flushes"] < 5
+    assert all(check.id for _, check in written)
+
+    verify = Session()
+    assert verify.query(Check).count() == 5
+    by_id = {m.id: m for m in verify.query(Monitor).all()}
+    assert by_id[monitors[1].id].last_status == "down"  # latest check of monitors[1]
+    assert by_id[monitors[0].id].last_status == "up"
+    verify.close()
+
+    # The caller's session sees the new state without writing it again
+    CheckResultWriter.apply_monitor_state(monitors[1], written[4][1])
+    assert monitors[1].last_status == "down"
+    assert monitors[1] not in db.dirty
+    db.close()
@@ -0,0 +1,82 @@
+import asyncio
+import socket
+import os
+import uuid
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_dns_resolver_caches_positive_and_negative_answers():
+    _set_test_env(f"sqlite:///test_dns_{uuid.uuid4().hex}.db")
+
+    from app.core.dns_resolver import DNSResolver
+
+    resolver = DNSResolver(ttl=60, negative_ttl=60)
+
+    async def lookups():
+        first = await resolver.resolve("localhost")
+        concurrent = await asyncio.gather(*[resolver.resolve("localhost") for _ in range(5)])
+        missing = await resolver.resolve("does-not-exist.invalid")
+        missing_again = await resolver.resolve("does-not-exist.invalid")
+        return first, concurrent, missing, missing_again
+
+    first, concurrent, missing, missing_again = asyncio.run(lookups())
+
+    assert first == "127.0.0.1"
+    assert concurrent == [first] * 5
+    assert missing is None and missing_again is None
+    assert resolver.resolve_sync("LOCALHOST") == first
+    assert resolver.resolve_sync("93.184.216.34") == "93.184.216.34"
+
+    stats = resolver.stats()
+    assert stats["misses"] == 2
+    assert stats["hits"] == 6
+    assert stats["negative_hits"] == 1
+
+
+def test_cancelled_waiter_does_not_cancel_shared_lookup():
+    _set_test_env(f"sqlite:///test_dns_{uuid.uuid4().hex}.db")
+
+    from app.core.dns_resolver import DNSResolver
+
+    resolver = DNSResolver(ttl=60, negative_ttl=60)
+
+    async def lookups():
+        loop = asyncio.get_running_loop()
+        release = asyncio.Event()
+
+        async def slow_getaddrinfo(host, port, **kwargs):
+            await release.wait()
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("203.0.113.7", 0))]
+
+        loop.getaddrinfo = slow_getaddrinfo
+        first = asyncio.create_task(resolver.resolve("slow.example"))
+        second = asyncio.create_task(resolver.resolve("slow.example"))
+        await asyncio.sleep(0)
+
+        # The waiter that started the lookup goes away; the other still gets the answer
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return first, await second
+
+    first, second = asyncio.run(lookups())
+
+    assert first.cancelled()
+    assert second == "203.0.113.7"
+    assert resolver.resolve_sync("slow.example") == "203.0.113.7"  # cached by the lookup
+    assert resolver.stats()["misses"] == 1
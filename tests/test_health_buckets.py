@@ -0,0 +1,87 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_health_buckets_track_database_score_incrementally():
+    db_url = f"sqlite:///test_health_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    import app.models  # noqa: F401 (register all tables)
+    from app.models.user import User
+    from app.models.monitor import Monitor
+    from app.models.check import Check
+    from app.models.incident import Incident
+    from app.services.health_buckets import HealthScoreTracker
+    from app.services.intelligent_incident_service import calculate_health_score
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    user = User(email="health@example.com", hashed_password="test", plan="FREE")
+    db.add(user)
+    db.commit()
+    monitor = Monitor(user_id=user.id, name="m", url="https://example.com")
+    other = Monitor(user_id=user.id, name="o", url="https://example.org")
+    db.add_all([monitor, other])
+    db.commit()
+
+    now = datetime.utcnow()
+
+    def add_check(target, status, response_time, days_ago):
+        check = Check(monitor_id=target.id, status=status, response_time=response_time,
+                      checked_at=now - timedelta(days=days_ago, minutes=1))
+        db.add(check)
+        db.commit()
+        return check
+
+    for i in range(20):
+        add_check(monitor, "up" if i % 5 else "down", 800.0 if i % 5 else None, days_ago=i % 4)
+        add_check(other, "up", 100.0, days_ago=1)
+    add_check(monitor, "up", 100.0, days_ago=45)  # outside the window
+    db.add(Incident(monitor_id=monitor.id, incident_type="down", started_at=now - timedelta(days=2)))
+    db.commit()
+
+    tracker = HealthScoreTracker(days=30, reconcile_seconds=0)
+    buckets = tracker.get(db, monitor.id)
+    assert buckets.score() == calculate_health_score(db, monitor)
+
+    # New rows are added incrementally; rows already seeded are not counted twice
+    buckets.add_check(db.query(Check).filter(Check.monitor_id == monitor.id).order_by(Check.id.desc()).first())
+    for _ in range(3):
+        buckets.add_check(add_check(monitor, "down", None, days_ago=0))
+    incident = Incident(monitor_id=monitor.id, incident_type="down", started_at=now)
+    db.add(incident)
+    db.commit()
+    buckets.add_incident(incident)
+    assert buckets.score() == calculate_health_score(db, monitor)
+    assert buckets.score()["incidents_count"] == 2
+
+    # Rows the tracker never saw are picked up by reconciliation
+    add_check(monitor, "down", None, days_ago=0)
+    drift = buckets.score()
+    assert tracker.reconcile(db) == {"reconciled": 1, "drifted": 1}
+    reconciled = tracker.get(db, monitor.id).score()
+    assert reconciled == calculate_health_score(db, monitor)
+    assert reconciled["uptime_pct"] < drift["uptime_pct"]
+    db.close()
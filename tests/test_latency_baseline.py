@@ -0,0 +1,58 @@
+import random
+from datetime import datetime, timedelta
+
+
+def test_latency_baseline_flags_sustained_slowdown_relative_to_own_baseline():
+    from app.services.latency_baseline import LatencyBaseline
+
+    rng = random.Random(7)
+    start = datetime(2026, 1, 1)
+    baseline = LatencyBaseline()
+
+    # A fast API: 150ms +-10% for a day of 10-minute checks, never flagged
+    for i in range(144):
+        assert baseline.update(150 * rng.uniform(0.9, 1.1), start + timedelta(minutes=10 * i)) is None
+    assert baseline.warm
+
+    # Restart: the state round-trips through the JSON column
+    restored = LatencyBaseline.from_state(baseline.to_state())
+    assert restored.to_state() == baseline.to_state()
+
+    # A single slow response is not a trend
+    now = start + timedelta(days=1)
+    assert restored.update(900, now) is None
+    for i in range(1, 6):
+        assert restored.update(150 * rng.uniform(0.9, 1.1), now + timedelta(minutes=10 * i)) is None
+
+    # 150ms -> 900ms sustained is flagged within a few checks (well under 2s)
+    flagged = [
+        restored.update(900 * rng.uniform(0.9, 1.1), now + timedelta(minutes=10 * (6 + i)))
+        for i in range(5)
+    ]
+    assert flagged[-1] is not None
+    assert flagged[-1]["baseline_ms"] < 200
+    assert flagged[-1]["current_ms"] > 500
+
+
+def test_latency_baseline_learns_hour_of_day_pattern():
+    from app.services.latency_baseline import LatencyBaseline, STATE_VERSION
+
+    rng = random.Random(11)
+    start = datetime(2026, 1, 1)
+    baseline = LatencyBaseline()
+
+    def latency(at: datetime) -> float:
+        # Nightly batch job: 4x slower between 02:00 and 03:00 UTC
+        return (1200 if at.hour == 2 else 300) * rng.uniform(0.9, 1.1)
+
+    verdicts = []
+    for i in range(14 * 144):
+        at = start + timedelta(minutes=10 * i)
+        verdicts.append((at, baseline.update(latency(at), at)))
+
+    # After the first nights, the slow hour is part of the baseline
+    assert not [at for at, verdict in verdicts if verdict and at >= start + timedelta(days=4)]
+    assert baseline.expected_ms(2) > 3 * baseline.expected_ms(12)
+
+    # Unknown state versions start over instead of misreading old data
+    assert LatencyBaseline.from_state({"v": STATE_VERSION + 1}).count == 0
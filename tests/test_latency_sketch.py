@@ -0,0 +1,85 @@
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_rollup_sketches_merge_into_accurate_window_percentiles():
+    db_url = f"sqlite:///test_sketch_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    import app.models  # noqa: F401 (register all tables)
+    from app.models.user import User
+    from app.models.monitor import Monitor
+    from app.models.check import Check
+    from app.models.check_rollup import CheckRollup
+    from app.services.latency_sketch import DDSketch
+    from app.services.check_rollups import RollupAccumulator, latency_percentiles
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    user = User(email="sketch@example.com", hashed_password="test", plan="FREE")
+    db.add(user)
+    db.commit()
+    monitor = Monitor(user_id=user.id, name="m", url="https://example.com")
+    db.add(monitor)
+    db.commit()
+
+    rng = random.Random(3)
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=48)
+    accumulator = RollupAccumulator()
+    values = []
+    for i in range(48 * 60):
+        # Mostly fast with a slow tail, like real endpoints
+        value = rng.lognormvariate(5, 0.3) if rng.random() < 0.95 else rng.uniform(2000, 8000)
+        values.append(value)
+        accumulator.add_check(Check(monitor_id=monitor.id, status="up", response_time=value,
+                                    checked_at=start + timedelta(minutes=i)))
+        if i % 90 == 89:
+            accumulator.flush(db)  # flushes straddle hours: rows are merged
+    accumulator.add_check(Check(monitor_id=monitor.id, status="down", response_time=None, checked_at=start))
+    accumulator.flush(db)
+
+    hours = db.query(CheckRollup).filter(CheckRollup.granularity == "hour")
+    assert hours.count() == 48
+    summary = latency_percentiles(db, monitor.id, start)
+    assert summary["count"] == len(values)
+
+    values.sort()
+    for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(summary[name] - exact) <= exact * 0.011 + 1e-9
+
+    # A window is the merge of its buckets, and sketches round-trip compactly
+    rows = hours.order_by(CheckRollup.bucket_start).all()
+    assert max(len(row.sketch) for row in rows) < 512
+    day = DDSketch()
+    for row in rows[24:]:
+        day.merge(DDSketch.from_bytes(row.sketch))
+    assert day.summary() == latency_percentiles(db, monitor.id, rows[24].bucket_start)
+    assert latency_percentiles(db, monitor.id, datetime.utcnow() + timedelta(hours=2))["p99"] is None
+
+    db.close()
+    engine.dispose()
+    os.remove(db_url.replace("sqlite:///", ""))
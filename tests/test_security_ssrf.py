@@ -0,0 +1,124 @@
+import asyncio
+import os
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_private_ranges_and_blocklist():
+    _set_test_env(f"sqlite:///test_ssrf_{uuid.uuid4().hex}.db")
+
+    from app.core.security_ssrf import is_private_ip, is_blocked_hostname, validate_url_for_ssrf
+
+    for ip in ["10.1.2.3", "172.31.255.255", "192.168.0.1", "127.0.0.1", "169.254.169.254", "::1", "fd00::1", "::ffff:127.0.0.1"]:
+        assert is_private_ip(ip), ip
+    for ip in ["8.8.8.8", "172.32.0.1", "11.0.0.0", "2001:4860:4860::8888", "not-an-ip"]:
+        assert not is_private_ip(ip), ip
+
+    assert is_blocked_hostname("METADATA.google.internal")
+    assert is_blocked_hostname("my-localhost.example")
+    assert not is_blocked_hostname("example.com")
+
+    assert validate_url_for_ssrf("http://10.0.0.1/")[0] is False
+    assert validate_url_for_ssrf("ftp://example.com/")[0] is False
+
+
+def test_check_connects_to_pinned_ip_with_original_host():
+    _set_test_env(f"sqlite:///test_ssrf_{uuid.uuid4().hex}.db")
+
+    import httpx
+    from app.core.pinned_transport import PinnedIPTransport
+    from app.core.security_ssrf import validation_cache
+
+    seen_hosts = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen_hosts.append(self.headers["Host"])
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # "pinned.invalid" does not resolve: the request only works through the pinned IP
+    validation_cache.set("pinned.invalid", "127.0.0.1", "")
+
+    async def run():
+        async with httpx.AsyncClient(transport=PinnedIPTransport()) as client:
+            ok = await client.get(f"http://pinned.invalid:{port}/")
+            try:
+                await client.get(f"http://localhost:{port}/")
+                blocked = None
+            except httpx.ConnectError as e:
+                blocked = str(e)
+        return ok, blocked
+
+    try:
+        ok, blocked = asyncio.run(run())
+    finally:
+        server.shutdown()
+        validation_cache.clear()
+
+    assert ok.status_code == 204
+    assert seen_hosts == [f"pinned.invalid:{port}"]
+    assert blocked and "SSRF Protection" in blocked
+
+
+def test_cert_expiry_handshake_connects_to_pinned_ip_only():
+    _set_test_env(f"sqlite:///test_ssrf_{uuid.uuid4().hex}.db")
+
+    import socket
+    from app.core.security_ssrf import validation_cache
+    from app.services.tls_cert_cache import CertExpiryCache
+
+    # Plain TCP listener: records connections, the TLS handshake itself fails
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    port = listener.getsockname()[1]
+    connections = []
+
+    def accept():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            connections.append(conn)
+            conn.close()
+
+    threading.Thread(target=accept, daemon=True).start()
+    validation_cache.set("pinned.invalid", "127.0.0.1", "")
+    cache = CertExpiryCache()
+
+    try:
+        # "pinned.invalid" does not resolve: the connection went to the pinned IP
+        assert asyncio.run(cache.fetch("pinned.invalid", port, timeout=2)) is None
+        assert len(connections) == 1
+        # localhost is blocked: no connection at all
+        assert asyncio.run(cache.fetch("localhost", port, timeout=2)) is None
+        assert len(connections) == 1
+    finally:
+        listener.close()
+        validation_cache.clear()
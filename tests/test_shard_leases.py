@@ -0,0 +1,94 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_workers_split_shards_and_take_over_dead_worker():
+    db_url = f"sqlite:///test_shards_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    from app.models.worker_lease import ShardLease, WorkerNode
+    from app.services.shard_leases import ShardLeaseManager
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[WorkerNode.__table__, ShardLease.__table__])
+    Session = sessionmaker(bind=engine)
+    db = Session()
+
+    a = ShardLeaseManager(shard_count=16, lease_seconds=30, worker_id="worker-a")
+    b = ShardLeaseManager(shard_count=16, lease_seconds=30, worker_id="worker-b")
+    now = datetime.utcnow()
+
+    # Alone, a worker owns everything
+    assert a.heartbeat(db, now=now)["owned"] == 16
+    assert a.owns(5)
+
+    # A second worker joins: a hands over b's share, b claims it next heartbeat
+    b.heartbeat(db, now=now)
+    a.heartbeat(db, now=now)
+    b.heartbeat(db, now=now)
+    assert a.owned and b.owned
+    assert a.owned | b.owned == frozenset(range(16))
+    assert not a.owned & b.owned
+    assert len({m for m in range(1000) if a.owns(m)} & {m for m in range(1000) if b.owns(m)}) == 0
+
+    # b dies: once its heartbeat and leases expire, a takes its shards back
+    later = now + timedelta(seconds=31)
+    changes = a.heartbeat(db, now=later)
+    assert changes["live_workers"] == 1
+    assert a.owned == frozenset(range(16))
+
+    # Graceful shutdown frees leases immediately
+    a.release_all(db)
+    assert not a.owns(5)
+    assert db.query(ShardLease).filter(ShardLease.owner != None).count() == 0
+    db.close()
+
+
+def test_pool_processes_with_configured_worker_id_get_own_leases():
+    db_url = f"sqlite:///test_shards_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    from app.models.worker_lease import ShardLease, WorkerNode
+    from app.services.shard_leases import ShardLeaseManager, pool_worker_id
+
+    assert pool_worker_id("node-1", 0, 1) == "node-1"
+    assert pool_worker_id(None, 1, 2) is None  # hostname:pid differs per process
+    ids = [pool_worker_id("node-1", index, 2) for index in range(2)]
+    assert ids == ["node-1:0", "node-1:1"]
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[WorkerNode.__table__, ShardLease.__table__])
+    db = sessionmaker(bind=engine)()
+
+    # Both processes of WORKER_ID=node-1 split the shards instead of sharing them
+    now = datetime.utcnow()
+    first, second = (ShardLeaseManager(shard_count=16, lease_seconds=30, worker_id=worker_id) for worker_id in ids)
+    for manager in (first, second, first, second):
+        manager.heartbeat(db, now=now)
+    assert first.owned and second.owned
+    assert first.owned | second.owned == frozenset(range(16))
+    assert not first.owned & second.owned
+    db.close()
@@ -0,0 +1,62 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+
+def _set_test_env(db_url: str) -> None:
+    os.environ["DATABASE_URL"] = db_url
+    os.environ["JWT_SECRET"] = "test_jwt_secret"
+    os.environ["SMTP_HOST"] = "smtp.test.local"
+    os.environ["SMTP_PORT"] = "587"
+    os.environ["SMTP_USER"] = "test"
+    os.environ["SMTP_PASS"] = "test"
+    os.environ["SMTP_FROM"] = "test@example.com"
+    os.environ["TELEGRAM_BOT_TOKEN"] = "test"
+    os.environ["STRIPE_SECRET_KEY"] = "sk_test"
+    os.environ["STRIPE_PUBLISHABLE_KEY"] = "pk_test"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+    os.environ["STRIPE_PRICE_ID_MONTHLY"] = "price_test"
+    os.environ["APP_BASE_URL"] = "http://testserver"
+
+
+def test_detect_patterns_counts_incidents_in_sql():
+    db_url = f"sqlite:///test_dna_{uuid.uuid4().hex}.db"
+    _set_test_env(db_url)
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    import app.models  # noqa: F401 (register all tables)
+    from app.models.user import User
+    from app.models.monitor import Monitor
+    from app.models.incident import Incident
+    from app.services.intelligent_incident_service import detect_patterns
+
+    engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+
+    user = User(email="dna@example.com", hashed_password="test", plan="FREE")
+    db.add(user)
+    db.commit()
+    monitor = Monitor(user_id=user.id, name="m", url="https://example.com")
+    db.add(monitor)
+    db.commit()
+    assert detect_patterns(db, monitor)["total_incidents"] == 0
+
+    # Three recent incidents at 03:xx on Mondays, one older at 14:xx on a Friday
+    now = datetime.utcnow()
+    last_monday = (now - timedelta(days=now.weekday() + 7)).replace(hour=3, minute=15)
+    started = [last_monday, last_monday - timedelta(days=7), last_monday - timedelta(days=14, minutes=-10)]
+    old_friday = now - timedelta(days=45)
+    old_friday = (old_friday - timedelta(days=(old_friday.weekday() - 4) % 7)).replace(hour=14)
+    started.append(old_friday)
+    db.add_all(Incident(monitor_id=monitor.id, incident_type="down", started_at=s) for s in started)
+    db.commit()
+
+    patterns = detect_patterns(db, monitor)
+    assert patterns["total_incidents"] == 4
+    assert patterns["high_risk_hours"][:2] == ["03:00-03:59", "14:00-14:59"]
+    assert patterns["high_risk_days"] == ["Monday", "Friday"]
+    assert patterns["stability_trend"] == "degrading"
+    db.close()